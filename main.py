@@ -1,20 +1,40 @@
 import os
+import sys
 import time
 import yaml
 import shutil
 import csv
+import traceback
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from script.GeneralCreationPlan import createPlans
 from script.RemoveDuplicatePlans import removeDuplicatePlans
-from script.GeneralCreationEventLog import createEventLog
+from script.GeneralCreationEventLog import createEventLog, parse_domain
+from script.VariantCompression import compressVariants
 from script.GeneralClean import puliziaEventLog
-from script.GeneralGrounding import aggregateColumns
+from script.GeneralGrounding import aggregateColumns, virtualAggregations
 from script.GeneralCompoundEvents import compoundEvents
 from script.GeneralExtraction import extraction
-
-from script.TC import apply_trajectory_constraints
-from script.ReverseTC import apply_reverse_mapping
+from script.MinerfulWorker import MinerfulWorker
+from script.MinerfulScheduler import runMinerfulJobs
+from script.ThresholdSweep import thresholdSweep
+from script.TraceSampling import sampleLog
+from script.OnlineDiscovery import IncrementalDeclareMiner
+
+from script.TC import apply_trajectory_constraints, rewrite_problem_sets
+from script.TCConformance import checkConformance
+from script.TCMinimizer import minimizeTCFile
+from script.TCCompiler import compileTC
+from script.PlanningBenchmark import benchmarkPlanning
+from script.ReverseTC import apply_reverse_mapping, find_tc_csvs, reverse_map_all
+from script.RoundTripDiff import find_round_trips, diffAll
+from script.ConstraintStore import ConstraintStore
+from script.StageScheduler import Task, runGraph
+from script.StageCache import StageCache
+from script.StageProfiler import StageProfiler, count_rows
+from script.EventLogFrame import write_log, log_size
+from script.AlphabetGuard import parse_memory_mb
 
 # ----------------- Utility -----------------
 
@@ -24,20 +44,45 @@ def ensure_dir(d):
     return d
 
 # Generates a unique filename by appending an index if the file already exists
-def unique_file(path):
+# (or was already handed out in `taken`, for outputs that are not written yet).
+# With overwrite, existing files are replaced: incremental runs keep their output names
+def unique_file(path, taken=None, overwrite=False):
     directory, filename = os.path.split(path)
     name, ext = os.path.splitext(filename)
     i = 0
     new_path = path
-    while os.path.exists(new_path):
+    while (not overwrite and os.path.exists(new_path)) or (taken is not None and new_path in taken):
         new_path = os.path.join(directory, f"{name}_{i}{ext}")
         i += 1
+    if taken is not None:
+        taken.add(new_path)
     return new_path
 
 # Helper to validate if a file path is provided and exists
 def file_exists_and_not_none(value):
     return value is not None and value != "" and os.path.exists(value)
 
+# Plan files of a plans folder, selected as the event log does
+def count_plans(plans_dir):
+    if not file_exists_and_not_none(plans_dir):
+        return None
+    return sum("plan" in f.lower() for _, _, files in os.walk(plans_dir) for f in files)
+
+# Runs the compound stage on one grounded file (only paths and log sizes travel back from worker processes)
+def compound_file(g_csv, out_csv, out_xes, compound_conf):
+    df = compoundEvents(g_csv, out_csv, out_xes, compound_conf=compound_conf)
+    return out_csv, (log_size(df) if df is not None else None)
+
+# Output stem and MINERful configuration of one input log
+def minerful_job_conf(minerful_conf, input_xes, virtual=None):
+    # Virtual grounding: same shared XES, the aggregation is selected by its classifier
+    if virtual:
+        return virtual["stem"], dict(minerful_conf,
+                                     use_classifier=True,
+                                     classifier_name=virtual["classifier_name"],
+                                     classifier_keys=virtual["classifier_keys"])
+    return Path(input_xes).stem, minerful_conf
+
 # ----------------- Pipeline -----------------
 def pipeline(config, exp, rep_index, base_output_dir):
     timings = {}
@@ -59,23 +104,138 @@ def pipeline(config, exp, rep_index, base_output_dir):
 
     pipeline_opts = exp.get("pipeline_options", {})
 
+    # Virtual groundings are mined by the native engine, which reads the classifier keys of each
+    # aggregation from the shared log: MINERful only uses the first classifier of a log, so it
+    # would need one copy of the log per aggregation again
+    virtual_grounding = exp.get("grounding", {}).get("virtual", False)
+    if virtual_grounding and exp.get("minerful", {}).get("engine", "minerful") != "native":
+        print("Virtual grounding needs minerful.engine: native; the aggregations are materialized.")
+        virtual_grounding = False
+
+    # In-memory handoff (script/EventLogFrame.py): event log, variants, cleaning, grounding and
+    # compound pass their DataFrame to the next stage, and only the stages listed in
+    # handoff.materialize, plus the one MINERful reads, write their CSV/XES
+    handoff_conf = exp.get("handoff", config.get("handoff", {}))
+    frames = {}     # CSV path -> DataFrame of the logs kept in memory
+    log_stages = [stage for stage, enabled in (
+        ("event_log", pipeline_opts.get("run_event_log", True)),
+        ("variant_compression", pipeline_opts.get("run_variant_compression", False)),
+        ("cleaning", pipeline_opts.get("run_cleaning", False)),
+        ("grounding", pipeline_opts.get("run_grounding", False)),
+        ("compound", pipeline_opts.get("run_compound", False) and not virtual_grounding),
+    ) if enabled]
+    materialized = set(handoff_conf.get("materialize") or []) | set(log_stages[-1:])
+    # Virtual grounding adds its classifiers to the XES of the stage before it
+    if "grounding" in log_stages[1:] and virtual_grounding:
+        materialized.add(log_stages[log_stages.index("grounding") - 1])
+
+    def materialize(stage):
+        return not handoff_conf.get("in_memory", False) or stage in materialized
+
+    # Input of a log stage: the frame kept in memory, or the file
+    def log_input(csv_path):
+        return frames.get(csv_path, csv_path)
+
+    # Files of a log kept in memory, written the first time something needs them
+    def log_files(csv_path, xes_path=None):
+        if csv_path in frames and not os.path.exists(csv_path):
+            write_log(frames[csv_path], csv_path, xes_path or str(Path(csv_path).with_suffix(".xes")))
+        return csv_path, xes_path
+
+    # Incremental re-execution: stages whose inputs, configuration and code did not change
+    # since the last run in this folder are skipped (script/StageCache.py)
+    stages = StageCache(base_output_dir, exp.get("incremental", config.get("incremental", {})), frames)
+    overwrite = stages.enabled
+
+    # Resource profile of every stage and sub-task, saved to profile.json (script/StageProfiler.py)
+    profiler = StageProfiler(base_output_dir, exp.get("profiling", config.get("profiling", {})))
+    log_sizes = {}  # CSV path -> (rows, traces) of the logs produced by this run
+
+    def sized(csv_path, df):
+        if profiler.enabled and df is not None:
+            log_sizes[csv_path] = log_size(df)
+
+    # Output of a log stage: its DataFrame stays in memory when the stage wrote no files
+    def keep(stage, csv_path, df):
+        if not materialize(stage):
+            frames[csv_path] = df
+        sized(csv_path, df)
+
+    # Rows/traces of a group of logs as profile counts (none when a log was not produced here)
+    def log_counts(direction, *csv_paths):
+        sizes = [log_sizes.get(p) for p in csv_paths]
+        if not sizes or None in sizes:
+            return {}
+        return {f"rows_{direction}": sum(rows for rows, _ in sizes),
+                f"traces_{direction}": sum(traces or 0 for _, traces in sizes)}
+
+    # Runs one stage: timing, resource profile and incremental skip. fn returns the stage result
+    # and the files it wrote; when the stage is unchanged the recorded result is returned instead
+    # (the fingerprint includes the source of fn). counts_out(result) are the profile counts
+    def run_stage(name, fn, inputs=(), conf=None, code=(), counts_in=None, counts_out=None,
+                  rewritten=(), cache=True, label=None):
+        start = time.perf_counter()
+        prof = profiler.start(name, **(counts_in or {}))
+        cached = stages.lookup(name, inputs, conf, code, caller=fn.__code__) if cache else None
+        if cached:
+            result = cached["result"]
+        else:
+            result, outputs = fn()
+            stages.record(name, result, outputs=outputs, rewritten=rewritten)
+        elapsed = time.perf_counter() - start
+        print(f"Time for {label or name.replace('_', ' ')}: {elapsed:.2f} sec")
+        timings[name] = elapsed
+        profiler.stop(prof, **(counts_out(result) if prof and counts_out else {}))
+        return result
+
+    # Online discovery: the constraint model is updated plan by plan
+    online_conf = exp.get("minerful", {}).get("online", {})
+    online_miner = None
+    if online_conf.get("enabled", False):
+        online_dir = ensure_dir(os.path.join(base_output_dir, "minerful", "online"))
+        state_file = online_conf.get("state_file") or os.path.join(online_dir, "state.npz")
+        if os.path.exists(state_file):
+            online_miner = IncrementalDeclareMiner.load(state_file)
+            print(f"Online discovery resumed from {state_file} ({online_miner.counters.n_traces:.0f} traces)")
+        else:
+            online_miner = IncrementalDeclareMiner()
+        actions_def = parse_domain(domain_file)
+        skip_duplicates = pipeline_opts.get("run_remove_duplicates", False)
+
     # ----------------- PLAN GENERATION -----------------
     run_create_plans = pipeline_opts.get("run_create_plans", True)
     run_event_log = pipeline_opts.get("run_event_log", True)
     if run_create_plans or run_event_log:
         if run_create_plans:
             print("1) PLAN GENERATION")
-            start = time.perf_counter()
             planning_conf = exp.get("planning", {})
-            createPlans(domain_file, 
-                        problems_dir, 
-                        plans_output_dir, 
-                        fast_downward_path=fd_path,
-                        planning_conf=planning_conf
-            )
-            print(f"Time for plan generation: {time.perf_counter() - start:.2f} sec")
-            elapsed = time.perf_counter() - start
-            timings["plan_generation"] = elapsed
+
+            def generate_plans():
+                if online_miner is None:
+                    createPlans(domain_file, 
+                                problems_dir, 
+                                plans_output_dir, 
+                                fast_downward_path=fd_path,
+                                planning_conf=planning_conf
+                    )
+                    return None, [plans_output_dir]
+                # Plans are mined while the searches are still running
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    planning = executor.submit(createPlans,
+                                               domain_file,
+                                               problems_dir,
+                                               plans_output_dir,
+                                               fast_downward_path=fd_path,
+                                               planning_conf=planning_conf)
+                    while not planning.done():
+                        online_miner.add_plans(plans_output_dir, actions_def, skip_duplicates)
+                        time.sleep(online_conf.get("poll_seconds", 10))
+                    planning.result()
+                return None, []
+
+            # Without online discovery (it follows the searches while they run) unchanged plans are reused
+            run_stage("plan_generation", generate_plans, [domain_file, problems_dir], [planning_conf, fd_path], [createPlans],
+                      counts_out=lambda _: {"traces_out": count_plans(plans_output_dir)}, cache=online_miner is None)
         elif file_exists_and_not_none(override.get("plans_dir")):
             plans_output_dir = override.get("plans_dir")
             print(f"Plan generation skipped; using override: {plans_output_dir}")
@@ -88,31 +248,57 @@ def pipeline(config, exp, rep_index, base_output_dir):
     # ----------------- DUPLICATE PLAN REMOVAL -----------------
     if pipeline_opts.get("run_remove_duplicates", False):
         print("1.1) DUPLICATE PLAN REMOVAL")
-        start = time.perf_counter()
-        removeDuplicatePlans(plans_output_dir)
-        print(f"Time for duplicate removal: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["duplicate_removal"] = elapsed
+
+        def remove_duplicates():
+            removeDuplicatePlans(plans_output_dir)
+            return None, [plans_output_dir]
+
+        run_stage("duplicate_removal", remove_duplicates, [plans_output_dir], None, [removeDuplicatePlans],
+                  counts_in={"traces_in": count_plans(plans_output_dir) if profiler.enabled else None},
+                  counts_out=lambda _: {"traces_out": count_plans(plans_output_dir)},
+                  rewritten=[plans_output_dir])
     else:
         print("Duplicate removal skipped.")
 
+    # ----------------- ONLINE DISCOVERY -----------------
+    if online_miner is not None and plans_output_dir is not None:
+        print("1.2) ONLINE DISCOVERY")
+
+        def discover_online():
+            added = online_miner.add_plans(plans_output_dir, actions_def, skip_duplicates)
+            online_csv = os.path.join(online_dir, "online_minerful.csv")
+            online_json = os.path.join(online_dir, "online_minerful.json")
+            rows = online_miner.write(online_csv, online_json, exp.get("minerful", {}))
+            online_miner.save(state_file)
+            print(f"Online model: {online_miner.counters.n_traces:.0f} traces ({added} added now), "
+                  f"{len(rows)} constraints → {online_csv}")
+            return {"traces_in": added, "rows_out": len(rows)}, []
+
+        # The model and its state change with every run: never skipped
+        run_stage("online_discovery", discover_online, counts_out=lambda counts: counts, cache=False)
+
     # ----------------- EVENT LOG -----------------
     run_event_log = pipeline_opts.get("run_event_log", True)
-    event_csv = unique_file(os.path.join(eventlog_dir, f"event_log_{Path(problems_dir).name}.csv"))
-    event_xes = unique_file(os.path.join(eventlog_dir, f"event_log_{Path(problems_dir).name}.xes"))
+    event_csv = unique_file(os.path.join(eventlog_dir, f"event_log_{Path(problems_dir).name}.csv"), overwrite=overwrite)
+    event_xes = unique_file(os.path.join(eventlog_dir, f"event_log_{Path(problems_dir).name}.xes"), overwrite=overwrite)
 
     if run_event_log:
         print("2) EVENT LOG")
-        start = time.perf_counter()
         eventlog_conf = exp.get("eventlog", {})
-        createEventLog(domain_file, 
-                       plans_output_dir, 
-                       event_csv, 
-                       event_xes,
-                       eventlog_conf=eventlog_conf)
-        print(f"Time for event log: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["event_log"] = elapsed
+
+        def build_event_log():
+            event_df = createEventLog(domain_file, 
+                                      plans_output_dir, 
+                                      event_csv if materialize("event_log") else None, 
+                                      event_xes if materialize("event_log") else None,
+                                      eventlog_conf=eventlog_conf)
+            keep("event_log", event_csv, event_df)
+            return [event_csv, event_xes], [event_csv, event_xes]
+
+        event_csv, event_xes = run_stage("event_log", build_event_log, [domain_file, plans_output_dir], eventlog_conf,
+                                         [createEventLog],
+                                         counts_in={"traces_in": count_plans(plans_output_dir) if profiler.enabled else None},
+                                         counts_out=lambda log: log_counts("out", log[0]))
     elif file_exists_and_not_none(override.get("event_log_csv")):
         event_csv = override.get("event_log_csv")
         event_xes = override.get("event_log_xes")
@@ -120,26 +306,48 @@ def pipeline(config, exp, rep_index, base_output_dir):
     else:
         raise RuntimeError("No event log available.")
 
+    # ----------------- VARIANT COMPRESSION -----------------
+    # Identical plans collapse into one weighted trace before cleaning and discovery
+    if pipeline_opts.get("run_variant_compression", False):
+        print("2.1) VARIANT COMPRESSION")
+        variant_csv = unique_file(os.path.join(eventlog_dir, f"variants_{Path(problems_dir).name}.csv"), overwrite=overwrite)
+        variant_xes = unique_file(os.path.join(eventlog_dir, f"variants_{Path(problems_dir).name}.xes"), overwrite=overwrite)
+
+        def compress_variants():
+            variant_df = compressVariants(log_input(event_csv),
+                                          variant_csv if materialize("variant_compression") else None,
+                                          variant_xes if materialize("variant_compression") else None,
+                                          variant_conf=exp.get("variants", {}))
+            keep("variant_compression", variant_csv, variant_df)
+            return [variant_csv, variant_xes], [variant_csv, variant_xes]
+
+        event_csv, event_xes = run_stage("variant_compression", compress_variants, [event_csv], exp.get("variants", {}),
+                                         [compressVariants],
+                                         counts_in=log_counts("in", event_csv),
+                                         counts_out=lambda log: log_counts("out", log[0]))
+
     # ----------------- CLEANING -----------------
     run_cleaning = pipeline_opts.get("run_cleaning", False)
-    cleaned_csv = unique_file(os.path.join(cleaned_dir, f"cleaned_event_log_{Path(problems_dir).name}.csv"))
-    cleaned_xes = unique_file(os.path.join(cleaned_dir, f"cleaned_event_log_{Path(problems_dir).name}.xes"))
+    cleaned_csv = unique_file(os.path.join(cleaned_dir, f"cleaned_event_log_{Path(problems_dir).name}.csv"), overwrite=overwrite)
+    cleaned_xes = unique_file(os.path.join(cleaned_dir, f"cleaned_event_log_{Path(problems_dir).name}.xes"), overwrite=overwrite)
 
     if run_cleaning:
         print("3) CLEANING")
-        start = time.perf_counter()
         cleaning_conf = exp.get("cleaning", {})
 
+        def clean():
+            cleaned_df = puliziaEventLog(
+                csvInput=log_input(event_csv),
+                csvOutput=cleaned_csv if materialize("cleaning") else None,
+                xesOutput=cleaned_xes if materialize("cleaning") else None,
+                cleaning_conf=cleaning_conf
+            )
+            keep("cleaning", cleaned_csv, cleaned_df)
+            return [cleaned_csv, cleaned_xes], [cleaned_csv, cleaned_xes]
 
-        puliziaEventLog(
-            csvInput=event_csv,
-            csvOutput=cleaned_csv,
-            xesOutput=cleaned_xes,
-            cleaning_conf=cleaning_conf
-        )
-        print(f"Time for cleaning: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["cleaning"] = elapsed
+        cleaned_csv, cleaned_xes = run_stage("cleaning", clean, [event_csv], cleaning_conf, [puliziaEventLog],
+                                             counts_in=log_counts("in", event_csv),
+                                             counts_out=lambda log: log_counts("out", log[0]))
     elif file_exists_and_not_none(override.get("cleaned_csv")):
         cleaned_csv = override.get("cleaned_csv")
         cleaned_xes = override.get("cleaned_xes")
@@ -158,33 +366,52 @@ def pipeline(config, exp, rep_index, base_output_dir):
 
     grounded_csv_list = []
     grounded_xes_list = []
+    # Classifier used by MINERful for each grounded XES (None = plain activity name)
+    grounded_classifiers = []
 
     grounded_csv = None 
     grounded_xes = None
 
     if run_grounding:
         print("4) GROUNDING")
-        start = time.perf_counter()
-        aggregateColumns(cleaned_csv, 
-                         output_prefix,
-                         grounding_conf=grounding_conf) 
-
-        grounded_csv_list = sorted(str(p) for p in Path(grounded_dir).glob("*.csv"))
-        grounded_xes_list = sorted(str(p) for p in Path(grounded_dir).glob("*.xes"))
 
-        if not grounded_csv_list:
-            print("No grounding files found, falling back to cleaned log.")
-            grounded_csv_list = [cleaned_csv]
-            grounded_xes_list = [cleaned_xes]
+        def ground():
+            if virtual_grounding:
+                # Aggregations are only classifier definitions on one shared XES
+                virtual_groundings = virtualAggregations(cleaned_csv,
+                                                         cleaned_xes,
+                                                         output_prefix,
+                                                         grounding_conf=grounding_conf)
+                csv_list = [cleaned_csv for _ in virtual_groundings]
+                xes_list = [v["xes"] for v in virtual_groundings]
+                classifiers = virtual_groundings
+            else:
+                grounded = aggregateColumns(log_input(cleaned_csv), 
+                                            output_prefix,
+                                            grounding_conf=grounding_conf,
+                                            materialize=materialize("grounding")) 
+                for g_csv, g_df in grounded.items():
+                    keep("grounding", g_csv, g_df)
+                csv_list = sorted(grounded)
+                xes_list = [str(Path(p).with_suffix(".xes")) for p in csv_list]
+                classifiers = [None] * len(xes_list)
+
+            if not csv_list:
+                print("No grounding files found, falling back to cleaned log.")
+                csv_list, xes_list, classifiers = [cleaned_csv], [cleaned_xes], [None]
+                log_files(cleaned_csv, cleaned_xes)
+            return [csv_list, xes_list, classifiers], csv_list + xes_list
+
+        grounded_csv_list, grounded_xes_list, grounded_classifiers = run_stage(
+            "grounding", ground, [cleaned_csv, cleaned_xes], [grounding_conf, virtual_grounding],
+            [aggregateColumns, virtualAggregations],
+            counts_in=log_counts("in", cleaned_csv),
+            counts_out=lambda grounded: log_counts("out", *grounded[0]))
 
         grounded_csv = grounded_csv_list[0]
         grounded_xes = grounded_xes_list[0]
 
         print(f"Grounding generated {len(grounded_csv_list)} aggregations.")
-
-        print(f"Time for grounding: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["grounding"] = elapsed
     elif file_exists_and_not_none(override.get("grounded_csv")):
         grounded_csv = override.get("grounded_csv")
         grounded_xes = override.get("grounded_xes")
@@ -199,11 +426,16 @@ def pipeline(config, exp, rep_index, base_output_dir):
 
     compound_csv_list = []
     compound_xes_list = []
+    compound_classifiers = []
+
+    if run_compound and any(grounded_classifiers):
+        print("Compound skipped: virtual groundings have no per-aggregation CSV to merge.")
+        run_compound = False
 
     if run_compound:
         print("5) COMPOUND")
-        start = time.perf_counter()
         compound_conf = exp.get("compound", {})
+        file_workers = int(compound_conf.get("file_workers", 1))
 
         for g_csv, g_xes in zip(grounded_csv_list, grounded_xes_list):
 
@@ -211,29 +443,52 @@ def pipeline(config, exp, rep_index, base_output_dir):
             out_csv = os.path.join(compound_dir, f"compound_{stem}.csv")
             out_xes = os.path.join(compound_dir, f"compound_{stem}.xes")
 
-            compoundEvents(g_csv, out_csv, out_xes, compound_conf=compound_conf)
-
             compound_csv_list.append(out_csv)
             compound_xes_list.append(out_xes)
-
-        print(f"Time for compound: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["compound"] = elapsed
+            compound_classifiers.append(None)
+
+        jobs = list(zip(grounded_csv_list, compound_csv_list, compound_xes_list))
+
+        def compound():
+            # Grounded files are independent: compound several of them at once
+            if file_workers > 1 and len(jobs) > 1:
+                with ProcessPoolExecutor(max_workers=file_workers) as executor:
+                    futures = [
+                        executor.submit(compound_file, log_input(g_csv), out_csv, out_xes, compound_conf)
+                        for g_csv, out_csv, out_xes in jobs
+                    ]
+                    results = [f.result() for f in futures]
+            else:
+                results = [compound_file(log_input(g_csv), out_csv, out_xes, compound_conf)
+                           for g_csv, out_csv, out_xes in jobs]
+            if profiler.enabled:
+                for (g_csv, _, _), (out_csv, size) in zip(jobs, results):
+                    log_sizes[out_csv] = size
+                    profiler.add(f"compound/{Path(out_csv).stem}", **log_counts("in", g_csv), **log_counts("out", out_csv))
+            return None, compound_csv_list + compound_xes_list
+
+        run_stage("compound", compound, grounded_csv_list, compound_conf, [compoundEvents],
+                  counts_in=log_counts("in", *grounded_csv_list),
+                  counts_out=lambda _: log_counts("out", *compound_csv_list))
         print(f"Compound generated for {len(compound_csv_list)} aggregations.")
     else:
         compound_csv_list = grounded_csv_list
         compound_xes_list = grounded_xes_list
+        compound_classifiers = grounded_classifiers
 
 
     # ----------------- MINERful -----------------
     run_minerful = pipeline_opts.get("run_minerful", True)
     minerful_conf = exp.get("minerful", {})
     minerful_dir = ensure_dir(os.path.join(base_output_dir, "minerful"))
+    # Section the discovery depends on (the sweep and the online model are separate stages)
+    mining_conf = {k: v for k, v in minerful_conf.items() if k not in ("sweep", "online")}
 
     explicit_file = minerful_conf.get("input_file")
     explicit_dir  = minerful_conf.get("input_directory")
 
     xes_files = []
+    xes_classifiers = []
 
     if explicit_file:
         if not os.path.isfile(explicit_file):
@@ -252,9 +507,11 @@ def pipeline(config, exp, rep_index, base_output_dir):
     else:
         if run_compound:
             xes_files = compound_xes_list
+            xes_classifiers = compound_classifiers
 
         elif run_grounding:
             xes_files = grounded_xes_list
+            xes_classifiers = grounded_classifiers
 
         elif run_cleaning:
             xes_files = [cleaned_xes]
@@ -265,18 +522,53 @@ def pipeline(config, exp, rep_index, base_output_dir):
     if not xes_files:
         raise ValueError(f"No .xes files found")
 
+    if len(xes_classifiers) != len(xes_files):
+        xes_classifiers = [None] * len(xes_files)
+
+    # ----------------- SAMPLING -----------------
+    sampling_conf = minerful_conf.get("sampling", {})
+    if run_minerful and sampling_conf.get("enabled", False):
+        print("5.1) SAMPLING")
+        sampling_dir = ensure_dir(os.path.join(minerful_dir, "sampling"))
+
+        def sample():
+            sampled_files = []
+            for input_xes, virtual in zip(xes_files, xes_classifiers):
+                stem, job_conf = minerful_job_conf(minerful_conf, input_xes, virtual)
+                sub = profiler.start(f"sampling/{stem}")
+                # A shared virtual log has no CSV of its own: its events are the cleaned log
+                input_csv = str(Path(input_xes).with_suffix(".csv"))
+                if virtual and not os.path.exists(input_csv):
+                    input_csv, _ = log_files(cleaned_csv, cleaned_xes)
+                sampled_files.append(sampleLog(input_xes, os.path.join(sampling_dir, stem), job_conf, sampling_conf,
+                                               input_csv=input_csv))
+                profiler.stop(sub)
+            sampled_csvs = [c for c in (str(Path(f).with_suffix(".csv")) for f in sampled_files) if os.path.exists(c)]
+            return sampled_files, sampled_files + sampled_csvs
+
+        xes_files = run_stage("sampling", sample, xes_files, [mining_conf, xes_classifiers], [sampleLog])
+
     print("Files that will be used for MINERful:")
-    for f in xes_files:
-        print("  -", f)
+    for f, virtual in zip(xes_files, xes_classifiers):
+        if virtual:
+            print("  -", f, f"(classifier: {virtual['classifier_keys']})")
+        else:
+            print("  -", f)
 
     minerful_csv = []
     minerful_json = []
+    # Log and configuration each MINERful output was discovered from
+    minerful_logs = []
+    # Aggregations not mined (alphabet over alphabet_guard.max_alphabet)
+    minerful_skipped = []
 
     if run_minerful:
         print("6) MINERful")
-        start = time.perf_counter()
 
-        for input_xes in xes_files:
+        jobs = []
+        taken = set()
+
+        for input_xes, virtual in zip(xes_files, xes_classifiers):
 
             input_csv = override.get("event_log_csv")  
 
@@ -288,36 +580,86 @@ def pipeline(config, exp, rep_index, base_output_dir):
                     input_csv = potential_csv
                 else:
                     print(f"[WARN] Specific CSV not found for {Path(input_xes).name}. Fallback back on {cleaned_csv}")
-                    input_csv = cleaned_csv
+                    input_csv, _ = log_files(cleaned_csv, cleaned_xes)
 
             
-            stem = Path(input_xes).stem
-
-            output_xes_with_classifier = unique_file(
-                os.path.join(minerful_dir, f"classified_{stem}.xes")
-            )
-            output_csv = unique_file(
-                os.path.join(minerful_dir, f"{stem}{minerful_conf.get('output_csv_suffix', '_minerful.csv')}")
-            )
-            output_json = unique_file(
-                os.path.join(minerful_dir, f"{stem}{minerful_conf.get('output_json_suffix', '_minerful.json')}")
-            )
-
-            csv_out, json_out = extraction(
-                input_xes=input_xes,
-                input_csv=input_csv,
-                output_xes_with_classifier=output_xes_with_classifier,
-                output_csv=output_csv,
-                output_json=output_json,
-                minerful_conf=minerful_conf
-            )
-
-            minerful_csv.append(csv_out)
-            minerful_json.append(json_out)
-
-        print(f"Time for MINERful: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["minerful"] = elapsed
+            stem, job_conf = minerful_job_conf(minerful_conf, input_xes, virtual)
+
+            jobs.append({
+                "stem": stem,
+                "input_xes": input_xes,
+                "input_csv": input_csv,
+                "output_xes_with_classifier": unique_file(
+                    os.path.join(minerful_dir, f"classified_{stem}.xes"), taken, overwrite
+                ),
+                "output_csv": unique_file(
+                    os.path.join(minerful_dir, f"{stem}{minerful_conf.get('output_csv_suffix', '_minerful.csv')}"), taken, overwrite
+                ),
+                "output_json": unique_file(
+                    os.path.join(minerful_dir, f"{stem}{minerful_conf.get('output_json_suffix', '_minerful.json')}"), taken, overwrite
+                ),
+                "minerful_conf": job_conf,
+            })
+
+        inputs = [job["input_xes"] for job in jobs] + [job["input_csv"] for job in jobs]
+        if minerful_conf.get("engine", "minerful") != "native":
+            inputs.append(minerful_conf.get("minerful_jar"))
+
+        def mine():
+            results = []
+            if minerful_conf.get("persistent_worker", False) and minerful_conf.get("engine", "minerful") != "native":
+                # One long-lived JVM for all the mining jobs of this run (jobs run one after another)
+                with MinerfulWorker(minerful_conf["minerful_jar"],
+                                    minerful_conf["minerful_lib"],
+                                    minerful_conf["xmx_memory"]) as worker:
+                    for job in jobs:
+                        sub = profiler.start(f"minerful/{job['stem']}", **log_counts("in", job["input_csv"]))
+                        result = extraction(
+                            input_xes=job["input_xes"],
+                            input_csv=job["input_csv"],
+                            output_xes_with_classifier=job["output_xes_with_classifier"],
+                            output_csv=job["output_csv"],
+                            output_json=job["output_json"],
+                            minerful_conf=job["minerful_conf"],
+                            worker=worker
+                        )
+                        profiler.stop(sub, rows_out=sub and count_rows(job["output_csv"]))
+                        results.append(result)
+            else:
+                # Separate JVMs, run concurrently under the shared memory budget
+                stats_csv = os.path.join(minerful_dir, "minerful_jobs.csv")
+                results = runMinerfulJobs(jobs, minerful_conf, stats_csv)
+                # The jobs overlap: each one is profiled by the scheduler itself
+                if profiler.enabled:
+                    with open(stats_csv, newline="") as f:
+                        for row, job in zip(csv.DictReader(f), jobs):
+                            # events/traces are only profiled with auto_heap, the native engine has no JVM stats
+                            counts = {"rows_in": row["events"] and int(row["events"]),
+                                      "traces_in": row["traces"] and int(row["traces"])}
+                            profiler.add(f"minerful/{job['stem']}",
+                                         wall_s=float(row["elapsed_s"]) if row["elapsed_s"] else None,
+                                         peak_rss_mb=float(row["peak_rss_mb"]) if row["peak_rss_mb"] else None,
+                                         **(log_counts("in", job["input_csv"]) | {k: v for k, v in counts.items() if v}),
+                                         rows_out=count_rows(job["output_csv"]))
+
+            mined_csv, mined_json, mined_logs, skipped = [], [], [], []
+            for job, result in zip(jobs, results):
+                if result is None:
+                    skipped.append(job["stem"])
+                    continue
+                mined_csv.append(result[0])
+                mined_json.append(result[1])
+                mined_logs.append((job["input_xes"], job["minerful_conf"]))
+            return [mined_csv, mined_json, mined_logs, skipped], mined_csv + mined_json
+
+        minerful_csv, minerful_json, minerful_logs, minerful_skipped = run_stage(
+            "minerful", mine, inputs, [mining_conf, xes_classifiers], [extraction, runMinerfulJobs, MinerfulWorker],
+            counts_in=log_counts("in", *[job["input_csv"] for job in jobs]),
+            counts_out=lambda mined: {"rows_out": sum(count_rows(c) or 0 for c in mined[0])},
+            label="MINERful")
+
+        for stem in minerful_skipped:
+            print(f"[MINERful] {stem}: not mined, its alphabet exceeds alphabet_guard.max_alphabet")
 
     elif file_exists_and_not_none(override.get("minerful_dir")):
         minerful_dir = override.get("minerful_dir")
@@ -326,13 +668,31 @@ def pipeline(config, exp, rep_index, base_output_dir):
         print("MINERful skipped.")
 
 
+    # ----------------- THRESHOLD SWEEP -----------------
+    sweep_conf = minerful_conf.get("sweep", {})
+
+    if sweep_conf.get("enabled", False):
+        print("6.1) THRESHOLD SWEEP")
+
+        def sweep():
+            for input_xes, virtual in zip(xes_files, xes_classifiers):
+                stem, job_conf = minerful_job_conf(minerful_conf, input_xes, virtual)
+                sub = profiler.start(f"threshold_sweep/{stem}")
+                thresholdSweep(input_xes,
+                               os.path.join(minerful_dir, "sweep", stem),
+                               job_conf,
+                               sweep_conf)
+                profiler.stop(sub)
+            return None, [os.path.join(minerful_dir, "sweep")]
+
+        run_stage("threshold_sweep", sweep, xes_files, [minerful_conf, xes_classifiers], [thresholdSweep])
+
     # ----------------- TRAJECTORY CONSTRAINTS -----------------
     tc_conf = exp.get("trajectory_constraints", {})
     run_tc = pipeline_opts.get("run_traj_constraint", False)
 
     if run_tc:
         print("7) TRAJECTORY CONSTRAINTS")
-        start = time.perf_counter()
 
         explicit_file = tc_conf.get("input_file")
         explicit_dir  = tc_conf.get("input_directory")
@@ -349,61 +709,195 @@ def pipeline(config, exp, rep_index, base_output_dir):
 
         else:
             tc_csv_files = minerful_csv 
+            for stem in minerful_skipped:
+                print(f"[TC] {stem}: no trajectory constraints, the aggregation was not mined (max_alphabet)")
 
         if not tc_csv_files:
             raise ValueError("No CSV available for TC")
 
         base_tc_output_dir = ensure_dir(os.path.join(base_output_dir, "problems_constraints"))
+        compile_conf = tc_conf.get("compile", {})
+        # Conformance and benchmark are separate stages reading these outputs
+        constraints_conf = {k: v for k, v in tc_conf.items() if k not in ("conformance", "benchmark")}
+        planner_conf = [exp.get("planning", {}), fd_path] if compile_conf.get("run_planner", False) else None
+
+        def apply_constraints():
+            tc_outputs = []
+
+            for csv_tc in tc_csv_files:
+                stem = Path(csv_tc).stem.replace("_minerful", "")
+                current_output_dir = ensure_dir(os.path.join(base_tc_output_dir, stem))
+
+                print(f"Applying constraints from: {Path(csv_tc).name}")
+                print(f"Output folder: {current_output_dir}")
+                sub = profiler.start(f"trajectory_constraints/{stem}", rows_in=count_rows(csv_tc) if profiler.enabled else None)
+
+                tc_csv = apply_trajectory_constraints(
+                    csv_path=csv_tc,
+                    pddl_dir=exp["problems_dir"],
+                    output_dir=current_output_dir
+                )
+                # Entailed constraints are removed (<stem>_tc_min.csv)
+                if tc_csv is not None and tc_conf.get("minimize", {}).get("enabled", False):
+                    tc_csv = minimizeTCFile(str(tc_csv))
+                tc_outputs.append((csv_tc, tc_csv, current_output_dir))
+
+                # Constraints compiled into classical STRIPS (monitor automata) for Fast Downward
+                if tc_csv is not None and compile_conf.get("enabled", False):
+                    strips_dir = os.path.join(current_output_dir, "strips")
+                    strips_domain = compileTC(str(tc_csv), domain_file, exp["problems_dir"], strips_dir)
+                    if compile_conf.get("run_planner", False):
+                        createPlans(strips_domain,
+                                    strips_dir,
+                                    os.path.join(current_output_dir, "strips_plans"),
+                                    fast_downward_path=fd_path,
+                                    planning_conf=exp.get("planning", {})
+                        )
+                profiler.stop(sub, rows_out=sub and count_rows(str(tc_csv) if tc_csv is not None else None))
+
+            # PDDL3 problems with the (:constraints ...) block, all the problem sets in one pool
+            if tc_conf.get("write_pddl", False):
+                suffix = tc_conf.get("output_folder_suffix", "_with_constraints")
+                rewrite_problem_sets(
+                    [(tc_csv, exp["problems_dir"], os.path.join(current_output_dir, Path(exp["problems_dir"]).name + suffix))
+                     for csv_tc, tc_csv, current_output_dir in tc_outputs if tc_csv is not None],
+                    max_workers=tc_conf.get("max_workers")
+                )
 
-        for csv_tc in tc_csv_files:
-            stem = Path(csv_tc).stem.replace("_minerful", "")
-            current_output_dir = ensure_dir(os.path.join(base_tc_output_dir, stem))
-
-            print(f"Applying constraints from: {Path(csv_tc).name}")
-            print(f"Output folder: {current_output_dir}")
-
-            apply_trajectory_constraints(
-                csv_path=csv_tc,
-                pddl_dir=exp["problems_dir"],
-                output_dir=current_output_dir
-            )
-        print(f"Time for trajectory constraints: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["trajectory_constraints"] = elapsed
+            tc_outputs = [[csv_tc, str(tc_csv) if tc_csv is not None else None, current_output_dir]
+                          for csv_tc, tc_csv, current_output_dir in tc_outputs]
+            return tc_outputs, [path for _, tc_csv, current_output_dir in tc_outputs for path in (tc_csv, current_output_dir)]
+
+        tc_outputs = run_stage("trajectory_constraints", apply_constraints,
+                               tc_csv_files + [domain_file, exp["problems_dir"]],
+                               [constraints_conf, planner_conf],
+                               [apply_trajectory_constraints, minimizeTCFile, compileTC, createPlans],
+                               counts_out=lambda outputs: {
+                                   "rows_in": sum(count_rows(csv_tc) or 0 for csv_tc, _, _ in outputs),
+                                   "rows_out": sum(count_rows(tc_csv) or 0 for _, tc_csv, _ in outputs)})
+
+    # ----------------- TC CONFORMANCE -----------------
+    conformance_conf = tc_conf.get("conformance", {})
+
+    def stage_tc_conformance():
+        print("7.1) TC CONFORMANCE")
+        discovered_from = dict(zip(minerful_csv, minerful_logs))
+
+        tc_files = [tc_csv for _, tc_csv, _ in tc_outputs if tc_csv is not None]
+        logs = [log_xes for log_xes, _ in minerful_logs] + [conformance_conf.get("input_xes")]
+
+        def check():
+            reports = []
+            for csv_tc, tc_csv, current_output_dir in tc_outputs:
+                if tc_csv is None:
+                    continue
+                # Log the constraints come from, or the configured one for explicit TC inputs
+                if csv_tc in discovered_from:
+                    log_xes, job_conf = discovered_from[csv_tc]
+                    keys = job_conf["classifier_keys"].split() if job_conf.get("use_classifier") else ["concept:name"]
+                elif file_exists_and_not_none(conformance_conf.get("input_xes")):
+                    log_xes, keys = conformance_conf["input_xes"], ["concept:name"]
+                else:
+                    print(f"No event log to check {Path(tc_csv).name} against: skipped.")
+                    continue
+
+                reports.extend(checkConformance(str(tc_csv), log_xes, current_output_dir, keys))
+            return None, reports
+
+        run_stage("tc_conformance", check, tc_files + logs, [conformance_conf, minerful_logs], [checkConformance],
+                  counts_out=lambda _: {"rows_in": sum(count_rows(tc_csv) or 0 for tc_csv in tc_files)},
+                  label="TC conformance")
+
+    # ----------------- PLANNING BENCHMARK -----------------
+    benchmark_conf = tc_conf.get("benchmark", {})
+
+    def stage_planning_benchmark():
+        print("7.2) PLANNING BENCHMARK")
+        strips_dirs = [os.path.join(current_output_dir, "strips") for _, _, current_output_dir in tc_outputs]
+
+        def benchmark():
+            summaries = []
+            for csv_tc, tc_csv, current_output_dir in tc_outputs:
+                # Compiled problems of trajectory_constraints.compile
+                strips_dir = os.path.join(current_output_dir, "strips")
+                strips_domain = os.path.join(strips_dir, "domain.pddl")
+                if not os.path.exists(strips_domain):
+                    print(f"No compiled problems for {Path(csv_tc).name}: enable trajectory_constraints.compile.")
+                    continue
+
+                summaries.append(benchmarkPlanning(domain_file,
+                                  exp["problems_dir"],
+                                  strips_domain,
+                                  strips_dir,
+                                  os.path.join(current_output_dir, "benchmark"),
+                                  fast_downward_path=fd_path,
+                                  planning_conf=exp.get("planning", {}),
+                                  benchmark_conf=benchmark_conf
+                ))
+            return None, summaries
+
+        run_stage("planning_benchmark", benchmark, strips_dirs + [domain_file, exp["problems_dir"]],
+                  [benchmark_conf, exp.get("planning", {}), fd_path], [benchmarkPlanning])
 
     # ----------------- REVERSE MAPPING (NEW) -----------------
     rev_conf = exp.get("reverse_mapping", {})
     run_reverse = pipeline_opts.get("run_reverse_mapping", False)
 
-    if run_reverse:
+    def stage_reverse_mapping():
         print("8) REVERSE MAPPING (TC -> Declare)")
-        start = time.perf_counter()
         
         explicit_file = rev_conf.get("input_file")
         reverse_output_dir = ensure_dir(os.path.join(base_output_dir, "reverse_mapping"))
+        use_explicit = explicit_file and os.path.exists(explicit_file)
 
-        if explicit_file and os.path.exists(explicit_file):
-            print(f"Using explicit input file: {explicit_file}")
-            apply_reverse_mapping(
-                tc_csv_path=explicit_file,
-                output_dir=reverse_output_dir
-            )
-        
+        if use_explicit:
+            tc_files = [explicit_file]
         else:
             base_tc_dir = Path(base_output_dir) / "problems_constraints"
-            tc_files = list(base_tc_dir.rglob("*.csv"))
-            
-            for tc_csv in tc_files:
-                if "recovered_declare" in tc_csv.name: continue
+            tc_files = find_tc_csvs(base_tc_dir)
+
+        roundtrip_inputs = minerful_csv if rev_conf.get("roundtrip_diff", False) else []
+
+        def reverse():
+            if use_explicit:
+                print(f"Using explicit input file: {explicit_file}")
                 apply_reverse_mapping(
-                    tc_csv_path=tc_csv,
+                    tc_csv_path=explicit_file,
                     output_dir=reverse_output_dir
                 )
-        print(f"Time for reverse mapping: {time.perf_counter() - start:.2f} sec")
-        elapsed = time.perf_counter() - start
-        timings["reverse_mapping"] = elapsed
 
-    
+            else:
+                # Every TC CSV (all aggregations) in parallel
+                reverse_map_all(tc_files, reverse_output_dir, max_workers=rev_conf.get("max_workers"))
+
+            # Recovered Declare models compared with the discovered ones
+            if rev_conf.get("roundtrip_diff", False):
+                diffAll(find_round_trips(base_output_dir), reverse_output_dir, max_workers=rev_conf.get("max_workers"))
+            return None, [reverse_output_dir]
+
+        run_stage("reverse_mapping", reverse, tc_files + roundtrip_inputs, rev_conf,
+                  [apply_reverse_mapping, reverse_map_all, diffAll],
+                  counts_out=lambda _: {"rows_in": sum(count_rows(str(tc_csv)) or 0 for tc_csv in tc_files)})
+
+    # ----------------- STAGE GRAPH -----------------
+    # Conformance, benchmark and reverse mapping only read the outputs of the TC stage,
+    # so they run concurrently within the CPU budget. The per-aggregation compound -> MINERful
+    # -> TC chains are not separate nodes: the stage cache, the in-memory handoff and the
+    # profile work per stage. Compound and MINERful run their aggregations in parallel inside the
+    # stage (compound.file_workers, minerful.max_parallel_jobs) and the TC stage rewrites the
+    # problem sets of all aggregations in one pool (trajectory_constraints.max_workers)
+    tail_tasks = []
+    if run_tc and conformance_conf.get("enabled", False):
+        tail_tasks.append(Task("tc_conformance", stage_tc_conformance))
+    if run_tc and benchmark_conf.get("enabled", False):
+        tail_tasks.append(Task("planning_benchmark", stage_planning_benchmark,
+                               cpus=benchmark_conf.get("max_workers") or exp.get("planning", {}).get("max_workers", 1)))
+    if run_reverse:
+        tail_tasks.append(Task("reverse_mapping", stage_reverse_mapping, cpus=rev_conf.get("max_workers") or 1))
+
+    for name, result in runGraph(tail_tasks).items():
+        if result.status != "done":
+            raise RuntimeError(f"Stage {name} failed: {result.error}")
 
     #-----------------------------------------------
 
@@ -417,6 +911,8 @@ def pipeline(config, exp, rep_index, base_output_dir):
         writer.writerow(["phase", "time_seconds"])
         for phase, t in timings.items():
             writer.writerow([phase, t])
+
+    profiler.write(os.path.join(base_output_dir, "profile.json"))
             
     return {
         "plans_dir": plans_output_dir,
@@ -433,6 +929,56 @@ def pipeline(config, exp, rep_index, base_output_dir):
     }
 
 # ----------------- Main -----------------
+
+# One repeat of an experiment. With log_file (runs executed in parallel) the output, including
+# the one of Fast Downward and MINERful, goes to that file instead of the console
+def run_experiment(config, exp, exp_name, r, run_dir, store_conf, base_results, log_file=None):
+    if log_file:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = os.dup(1), os.dup(2)
+        fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(fd)
+
+    try:
+        repeat = int(exp.get("repeat", 1))
+        print(f"Starting experiment: {exp_name} run {r}/{repeat}")
+        try:
+            pipeline(config=config, exp=exp, rep_index=r, base_output_dir=run_dir)
+            # Constraints of the run added to the cross-run store
+            if store_conf.get("enabled", False):
+                with ConstraintStore(store_conf.get("db_path") or os.path.join(base_results, "constraints.sqlite")) as store:
+                    print(f"[STORE] {store.add_run(run_dir, exp_name, r)} constraints stored for {exp_name} run {r}")
+            print(f"Experiment {exp_name} run {r} finished successfully.\n")
+        except Exception as e:
+            # runGraph records the failure and prints its traceback on the console; a run with its
+            # own pipeline.log gets it there too
+            print(f"Experiment {exp_name} run {r} failed: {str(e)}")
+            if log_file:
+                print(traceback.format_exc())
+            raise
+    finally:
+        if log_file:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+
+# CPUs and memory one run takes in the scheduler budget
+def run_resources(exp):
+    resources = exp.get("resources", {})
+    xmx = exp.get("minerful", {}).get("xmx_memory")
+    memory_mb = resources.get("memory_mb")
+    if memory_mb is None:
+        memory_mb = parse_memory_mb(xmx) if xmx else 0
+    # By default a run takes the CPUs of its planning workers
+    cpus = resources.get("cpus") or exp.get("planning", {}).get("max_workers", 1)
+    return cpus, memory_mb
+
 def main():
     with open("config.yaml", "r") as f:
         config = yaml.safe_load(f)
@@ -440,22 +986,39 @@ def main():
     base_results = config.get("output_dirs", {}).get("base_dir", "results/")
     ensure_dir(base_results)
     experiments = config.get("experiments", [])
-
+    store_conf = config.get("constraint_store", {})
+    scheduler_conf = config.get("scheduler", {})
+    # Concurrent runs are opt-in: their console output goes to the run folders
+    max_cpus = scheduler_conf.get("max_cpus") or 1
+    parallel = max_cpus > 1
+
+    # Every repeat of every experiment is an independent node of the graph
+    tasks = []
     for exp in experiments:
         exp_name = exp.get("name", Path(exp.get("problems_dir", "unnamed")).name)
         repeat = int(exp.get("repeat", 1))
+        cpus, memory_mb = run_resources(exp)
         for r in range(1, repeat + 1):
             run_dir = os.path.join(base_results, exp_name, f"run_{r}")
             ensure_dir(run_dir)
           
             shutil.copy("config.yaml", os.path.join(run_dir, "config_used.yaml"))
-            print(f"Starting experiment: {exp_name} run {r}/{repeat}")
-            try:
-                pipeline(config=config, exp=exp, rep_index=r, base_output_dir=run_dir)
-                print(f"Experiment {exp_name} run {r} finished successfully.\n")
-            except Exception as e:
-                print(f"Experiment {exp_name} run {r} failed: {str(e)}\nContinuing with next experiment.\n")
-                continue
+            log_file = os.path.join(run_dir, "pipeline.log") if parallel else None
+            tasks.append(Task(f"{exp_name}/run_{r}", run_experiment,
+                              args=(config, exp, exp_name, r, run_dir, store_conf, base_results, log_file),
+                              cpus=min(cpus, max_cpus), memory_mb=memory_mb))
+
+    # Runs in separate processes when several of them fit in the budget
+    results = runGraph(tasks,
+                       max_cpus=max_cpus,
+                       max_memory_mb=scheduler_conf.get("max_memory_mb"),
+                       executor="process" if parallel else "thread")
+
+    failed = [name for name, result in results.items() if result.status != "done"]
+    print(f"{len(results) - len(failed)}/{len(results)} runs completed.")
+    for name in failed:
+        where = f" (traceback in {os.path.join(base_results, name, 'pipeline.log')})" if parallel else ""
+        print(f"  Failed: {name}: {results[name].error}{where}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,158 @@
+import os
+import re
+import csv
+import json
+from collections import Counter
+from script.XesStream import iter_xes_traces, VARIANT_COUNT_KEY
+from script.TC import clean_field
+
+# Pre-mining analysis of the activity alphabet. Binary Declare discovery grows with the square
+# of the alphabet, so the alphabet size, the label frequencies and the predicted cost are
+# reported before running the miner. Labels found in fewer traces than the `support` threshold
+# can optionally be merged into one bucket label: the events stay where they are, so the
+# adjacency (Chain* templates) of the other labels is unchanged, but the constraints a rare
+# label takes part in on its own (AtMostOnce, Absence, Choice through the other label, ...)
+# are no longer discovered.
+
+
+# Parses JVM memory strings ("8096m", "4g", "512") into megabytes
+def parse_memory_mb(value):
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)b?\s*", str(value).lower())
+    if not m:
+        raise ValueError(f"Invalid memory size: {value}")
+    number, unit = float(m.group(1)), m.group(2)
+    factor = {"k": 1 / 1024, "": 1, "m": 1, "g": 1024, "t": 1024 * 1024}[unit]
+    return int(number * factor)
+
+# Streams the log once to measure what the mining cost depends on.
+# labels: label -> (traces containing it, events), weighted by the trace variant counts
+def profile_log(xes_path, keys=("concept:name",)):
+    trace_freq = Counter()
+    event_freq = Counter()
+    traces = events = 0
+    for attrs, labels in iter_xes_traces(xes_path, keys):
+        weight = int(float(attrs.get(VARIANT_COUNT_KEY) or 1))
+        traces += weight
+        events += weight * len(labels)
+        for label, n in Counter(labels).items():
+            trace_freq[label] += weight
+            event_freq[label] += weight * n
+
+    return {
+        "size_mb": round(os.path.getsize(xes_path) / 2**20, 2),
+        "traces": traces,
+        "events": events,
+        "alphabet": len(trace_freq),
+        "labels": {label: (trace_freq[label], event_freq[label]) for label in trace_freq},
+    }
+
+# Heap of one job: fixed base + share of the log size + per activity-pair tables, capped by xmx_memory
+def estimate_heap_mb(profile, minerful_conf):
+    base = minerful_conf.get("heap_base_mb", 256)
+    per_log_mb = minerful_conf.get("heap_per_log_mb", 6)
+    per_pair_kb = minerful_conf.get("heap_per_pair_kb", 2)
+
+    heap = base + per_log_mb * profile["size_mb"] + per_pair_kb * profile["alphabet"] ** 2 / 1024
+    return int(min(heap, parse_memory_mb(minerful_conf["xmx_memory"])))
+
+# Predicted cost of mining a log with the given alphabet size
+def predict_cost(profile, minerful_conf, alphabet):
+    pairs = alphabet * (alphabet - 1)
+    return {
+        "alphabet": alphabet,
+        "candidate_pairs": pairs,
+        # Every binary template is checked on every pair of every trace
+        "pair_trace_checks": pairs * profile["traces"],
+        "heap_mb": estimate_heap_mb(dict(profile, alphabet=alphabet), minerful_conf),
+    }
+
+
+# Analyses the log, writes the report to report_json and returns (event_hook, report).
+# event_hook is None when no label has to be changed; otherwise it is meant for transform_xes.
+def guardAlphabet(input_xes, report_json, minerful_conf):
+    guard_conf = minerful_conf.get("alphabet_guard") or {}
+    mode = guard_conf.get("rare_labels", "keep")
+    bucket_label = guard_conf.get("bucket_label", "rare_label")
+    support = minerful_conf["support"]
+
+    keys = minerful_conf["classifier_keys"].split() if minerful_conf.get("use_classifier") else ["concept:name"]
+    profile = profile_log(input_xes, keys)
+    labels = profile["labels"]
+
+    # Labels in fewer than `support` of the traces (they can still be part of constraints that
+    # hold where they are absent, which the bucket gives up)
+    rare = {
+        label for label, (n_traces, _) in labels.items()
+        if profile["traces"] and n_traces / profile["traces"] < support
+    }
+
+    # Deleting rare events would create adjacencies that are not in the plans
+    if mode not in ("keep", "bucket"):
+        raise ValueError(f"Invalid alphabet_guard.rare_labels: {mode} (keep | bucket)")
+
+    if mode == "bucket" and rare:
+        alphabet_after = len(labels) - len(rare) + 1
+    else:
+        alphabet_after = len(labels)
+
+    report = {
+        "input_xes": input_xes,
+        "traces": profile["traces"],
+        "events": profile["events"],
+        "support": support,
+        "rare_labels_mode": mode,
+        "rare_labels": len(rare),
+        "cost": predict_cost(profile, minerful_conf, len(labels)),
+        "cost_after_guard": predict_cost(profile, minerful_conf, alphabet_after),
+        "labels": [
+            {"label": label, "traces": n_traces, "events": n_events,
+             "support": round(n_traces / profile["traces"], 6), "rare": label in rare}
+            for label, (n_traces, n_events) in sorted(labels.items(), key=lambda item: -item[1][0])
+        ],
+    }
+
+    with open(report_json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[ALPHABET] {len(labels)} labels ({len(rare)} below support {support}), "
+          f"{report['cost']['candidate_pairs']} candidate pairs, ~{report['cost']['heap_mb']} MB heap")
+    if mode == "bucket" and rare:
+        print(f"[ALPHABET] Rare labels merged into {bucket_label}: "
+              f"{alphabet_after} labels, {report['cost_after_guard']['candidate_pairs']} candidate pairs")
+    print(f"[ALPHABET] Report saved to: {report_json}")
+
+    if mode != "bucket" or not rare:
+        return None, report
+
+    def event_hook(attrs):
+        label = "+".join(attrs.get(k, "") for k in keys)
+        if label not in rare:
+            return {}
+        # The bucket label replaces the first classifier key, the other keys are emptied
+        return {k: (bucket_label if i == 0 else "") for i, k in enumerate(keys)}
+
+    return event_hook, report
+
+
+# Removes the discovered constraints that mention the bucket label (not a real action)
+def drop_bucket_constraints(output_csv, bucket_label):
+    if not os.path.exists(output_csv):
+        return 0
+
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f, delimiter=";", quotechar="'")
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+
+    bucket = clean_field(bucket_label)
+    kept = [
+        r for r in rows
+        if clean_field(r.get("Activation")) != bucket and clean_field(r.get("Target")) != bucket
+    ]
+
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";", quotechar="'")
+        writer.writeheader()
+        writer.writerows(kept)
+
+    return len(rows) - len(kept)
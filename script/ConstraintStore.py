@@ -0,0 +1,279 @@
+import os
+import re
+import csv
+import sys
+import sqlite3
+import argparse
+from script.TC import clean_field, parse_tc
+
+# Embedded SQLite store of the discovered constraints of every experiment and run:
+# the Declare constraints of minerful/<stem>_minerful.csv and the TC of
+# problems_constraints/<stem>/<stem>_tc*.csv, indexed by experiment, run, aggregation (<stem>),
+# template and activity, so cross-run questions are one query instead of parsing every CSV.
+# Layout of the results: <base_dir>/<experiment>/run_<n>/...
+
+# Seconds a writer waits for the lock (concurrent runs load into the same file; sqlite gives up after 5)
+BUSY_TIMEOUT = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    experiment TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    aggregation TEXT NOT NULL,
+    kind TEXT NOT NULL                  -- declare, tc, tc_min
+);
+CREATE TABLE IF NOT EXISTS declare (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    template TEXT NOT NULL,
+    activation TEXT NOT NULL,
+    target TEXT NOT NULL,
+    support REAL,
+    confidence REAL,
+    coverage REAL
+);
+CREATE TABLE IF NOT EXISTS tc (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    tc TEXT NOT NULL,
+    operator TEXT NOT NULL,
+    template TEXT NOT NULL,             -- Declare template the TC comes from
+    activation TEXT NOT NULL,
+    target TEXT NOT NULL
+);
+-- Activities of every constraint, for "constraints on X" whatever its role
+CREATE TABLE IF NOT EXISTS activities (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    row_id INTEGER NOT NULL,            -- rowid in declare or tc (by files.kind)
+    activity TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_run ON files (experiment, run, aggregation, kind);
+CREATE INDEX IF NOT EXISTS declare_template ON declare (template, activation, target);
+CREATE INDEX IF NOT EXISTS declare_file ON declare (file_id);
+CREATE INDEX IF NOT EXISTS tc_operator ON tc (operator, activation, target);
+CREATE INDEX IF NOT EXISTS tc_template ON tc (template);
+CREATE INDEX IF NOT EXISTS tc_file ON tc (file_id);
+CREATE INDEX IF NOT EXISTS activities_activity ON activities (activity, file_id);
+"""
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+# Constraint CSVs of a run folder: (path, aggregation, kind)
+def run_files(run_dir):
+    minerful_dir = os.path.join(run_dir, "minerful")
+    if os.path.isdir(minerful_dir):
+        for file in sorted(os.listdir(minerful_dir)):
+            if file.endswith("_minerful.csv"):
+                yield os.path.join(minerful_dir, file), file[:-len("_minerful.csv")], "declare"
+
+    tc_dir = os.path.join(run_dir, "problems_constraints")
+    if os.path.isdir(tc_dir):
+        for stem in sorted(os.listdir(tc_dir)):
+            for kind in ("tc", "tc_min"):
+                path = os.path.join(tc_dir, stem, f"{stem}_{kind}.csv")
+                if os.path.exists(path):
+                    yield path, stem, kind
+
+
+class ConstraintStore:
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----------------- Loading -----------------
+
+    # Loads one CSV; files already loaded and not modified since are skipped
+    def add_file(self, path, experiment, run, aggregation, kind):
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        old = self.conn.execute("SELECT id, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        if old and old[1] == mtime:
+            return 0
+        if old:
+            self.conn.execute("DELETE FROM files WHERE id = ?", (old[0],))
+
+        file_id = self.conn.execute(
+            "INSERT INTO files (path, mtime, experiment, run, aggregation, kind) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, mtime, experiment, run, aggregation, kind)
+        ).lastrowid
+
+        n = 0
+        activities = []
+        if kind == "declare":
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f, delimiter=";", quotechar="'"):
+                    if not row.get("Template"):
+                        continue
+                    a, b = clean_field(row.get("Activation")), clean_field(row.get("Target"))
+                    row_id = self.conn.execute(
+                        "INSERT INTO declare VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (file_id, row["Template"], a, b, to_float(row.get("Support")),
+                         to_float(row.get("Confidence level")), to_float(row.get("Coverage")))
+                    ).lastrowid
+                    activities.extend((file_id, row_id, x) for x in {a, b} if x)
+                    n += 1
+        else:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f, delimiter=";"):
+                    if not row.get("tc"):
+                        continue
+                    # A malformed row is reported and left out, the rest of the file is loaded
+                    try:
+                        op, _ = parse_tc(row["tc"])
+                    except ValueError as e:
+                        print(f"[STORE WARNING] {path}: {e}, row skipped")
+                        continue
+                    a, b = clean_field(row.get("activation")), clean_field(row.get("target"))
+                    row_id = self.conn.execute(
+                        "INSERT INTO tc VALUES (?, ?, ?, ?, ?, ?)",
+                        (file_id, row["tc"], op, row.get("template") or "", a, b)
+                    ).lastrowid
+                    activities.extend((file_id, row_id, x) for x in {a, b} if x)
+                    n += 1
+
+        self.conn.executemany("INSERT INTO activities VALUES (?, ?, ?)", activities)
+        return n
+
+    def add_run(self, run_dir, experiment, run):
+        n = 0
+        with self.conn:
+            for path, aggregation, kind in run_files(run_dir):
+                n += self.add_file(path, experiment, run, aggregation, kind)
+        return n
+
+    # Loads every <experiment>/run_<n> folder under base_dir
+    def load_results(self, base_dir):
+        n = runs = 0
+        for experiment in sorted(os.listdir(base_dir)):
+            exp_dir = os.path.join(base_dir, experiment)
+            if not os.path.isdir(exp_dir):
+                continue
+            for run_name in sorted(os.listdir(exp_dir)):
+                m = re.fullmatch(r"run_(\d+)", run_name)
+                if m:
+                    n += self.add_run(os.path.join(exp_dir, run_name), experiment, int(m.group(1)))
+                    runs += 1
+        print(f"[STORE] {runs} runs scanned, {n} constraints loaded")
+        return n
+
+    # ----------------- Queries -----------------
+
+    @staticmethod
+    def _filters(table, experiment=None, run=None, aggregation=None, template=None, activity=None, kind=None, **fields):
+        where, params = [], []
+        for column, value in (("f.experiment", experiment), ("f.run", run), ("f.aggregation", aggregation),
+                              ("f.kind", kind), (f"{table}.template", template),
+                              *((f"{table}.{k}", v) for k, v in fields.items())):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if activity is not None:
+            where.append(f"{table}.rowid IN (SELECT row_id FROM activities WHERE activity = ? AND file_id = f.id)")
+            params.append(activity)
+        return (" WHERE " + " AND ".join(where)) if where else "", params
+
+    # Declare constraints matching the filters (activity: as activation or target)
+    def declare(self, **filters):
+        where, params = self._filters("d", **filters)
+        return self.query(
+            "SELECT f.experiment, f.run, f.aggregation, d.template, d.activation, d.target, "
+            "d.support, d.confidence, d.coverage "
+            f"FROM declare d JOIN files f ON f.id = d.file_id{where} "
+            "ORDER BY f.experiment, f.run, f.aggregation, d.template, d.activation, d.target",
+            params
+        )
+
+    # TC matching the filters (kind: tc or tc_min)
+    def tc(self, **filters):
+        where, params = self._filters("t", **filters)
+        return self.query(
+            "SELECT f.experiment, f.run, f.aggregation, f.kind, t.tc, t.operator, t.template, t.activation, t.target "
+            f"FROM tc t JOIN files f ON f.id = t.file_id{where} "
+            "ORDER BY f.experiment, f.run, f.aggregation, t.tc",
+            params
+        )
+
+    # Declare constraints found in every run of the experiment (per aggregation)
+    def in_every_run(self, experiment, **filters):
+        where, params = self._filters("d", experiment=experiment, **filters)
+        return self.query(
+            "SELECT f.aggregation, d.template, d.activation, d.target, COUNT(DISTINCT f.run) AS runs, "
+            "AVG(d.support) AS support, AVG(d.confidence) AS confidence "
+            f"FROM declare d JOIN files f ON f.id = d.file_id{where} "
+            "GROUP BY f.aggregation, d.template, d.activation, d.target "
+            "HAVING runs = (SELECT COUNT(DISTINCT run) FROM files WHERE experiment = ? AND kind = 'declare') "
+            "ORDER BY f.aggregation, d.template, d.activation, d.target",
+            params + [experiment]
+        )
+
+    def query(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+def print_rows(rows):
+    if not rows:
+        print("(no results)")
+        return
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]), delimiter=";")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the constraints discovered across experiments and runs")
+    parser.add_argument("db", help="SQLite file (e.g. results/constraints.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="Load (or refresh) every <experiment>/run_<n> of a results folder")
+    load.add_argument("base_dir")
+
+    for name, help_text in (("declare", "Declare constraints"), ("tc", "Trajectory constraints"),
+                            ("every-run", "Declare constraints found in every run of an experiment")):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("--experiment", required=name == "every-run")
+        sub.add_argument("--run", type=int)
+        sub.add_argument("--aggregation")
+        sub.add_argument("--template")
+        sub.add_argument("--activity", help="Activation or target")
+        if name == "tc":
+            sub.add_argument("--kind", choices=["tc", "tc_min"])
+            sub.add_argument("--operator")
+
+    sql = commands.add_parser("sql", help="Any SELECT on the files/declare/tc/activities tables")
+    sql.add_argument("statement")
+
+    args = parser.parse_args()
+    with ConstraintStore(args.db) as store:
+        if args.command == "load":
+            store.load_results(args.base_dir)
+        elif args.command == "sql":
+            print_rows(store.query(args.statement))
+        else:
+            filters = {k: v for k, v in vars(args).items()
+                       if k in ("experiment", "run", "aggregation", "template", "activity", "kind", "operator")}
+            if args.command == "declare":
+                print_rows(store.declare(**filters))
+            elif args.command == "tc":
+                print_rows(store.tc(**filters))
+            else:
+                print_rows(store.in_every_run(**filters))
@@ -0,0 +1,276 @@
+import os
+import csv
+import json
+import numpy as np
+from script.XesStream import iter_xes_traces, VARIANT_COUNT_KEY
+
+# In-process Declare miner for exactly the templates that script/TC.py can map to
+# trajectory constraints. Traces are encoded as integer arrays and all the statistics
+# come from NumPy counting over every activity pair, so no JVM is needed.
+#
+# Every template is evaluated trace by trace (weighted by trace multiplicity):
+#   support    = traces where the constraint is activated and satisfied / all traces
+#   coverage   = traces where the constraint is activated / all traces
+#   confidence = support / coverage
+# Unary templates, Choice and ExclusiveChoice are activated by every trace.
+
+UNARY_TEMPLATES = ("AtLeast1", "AtMostOnce", "ExactlyOne")
+BINARY_TEMPLATES = ("Response", "Precedence", "Succession", "ChainResponse")
+SYMMETRIC_TEMPLATES = ("Choice", "ExclusiveChoice")
+
+CSV_FIELDS = ["Constraint", "Template", "Activation", "Target", "Support", "Confidence level", "Coverage"]
+
+
+# Sufficient statistics for all the supported templates (weighted trace counts):
+#   present[a] / once[a] / multi[a]   traces where a occurs at least once / exactly once / more than once
+#   both[a, b]                         traces where a and b both occur
+#   resp[a, b]                         ... and the last b follows the last a
+#   prec[a, b]                         ... and the first a precedes the first b
+#   succ[a, b]                         ... and both of the above hold
+#   chain[a, b]                        traces with a where every a is immediately followed by b
+class DeclareCounters:
+    def __init__(self, activities=()):
+        self.activities = list(activities)
+        self.index = {a: i for i, a in enumerate(self.activities)}
+        n = len(self.activities)
+        self.n_traces = 0.0
+        self.present = np.zeros(n)
+        self.once = np.zeros(n)
+        self.multi = np.zeros(n)
+        self.both = np.zeros((n, n))
+        self.resp = np.zeros((n, n))
+        self.prec = np.zeros((n, n))
+        self.succ = np.zeros((n, n))
+        self.chain = np.zeros((n, n))
+
+
+# Maps labels to integer ids: returns (alphabet, list of integer arrays)
+def encode_traces(traces):
+    alphabet = {}
+    encoded = [
+        np.array([alphabet.setdefault(label, len(alphabet)) for label in labels], dtype=np.int64)
+        for labels in traces
+    ]
+    return list(alphabet), encoded
+
+
+# Adds a block of encoded traces to the counters
+def _count_block(counters, block, weights):
+    A = len(counters.activities)
+    T = len(block)
+
+    lengths = np.array([len(t) for t in block], dtype=np.int64)
+    if lengths.sum() == 0:
+        counters.n_traces += weights.sum()
+        return
+
+    acts = np.concatenate(block)
+    trace_ids = np.repeat(np.arange(T), lengths)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(len(acts)) - np.repeat(starts, lengths)
+
+    # Per (trace, activity): occurrences, first and last position (-1 when absent)
+    codes = trace_ids * A + acts
+    count = np.bincount(codes, minlength=T * A).reshape(T, A)
+
+    uniq, first_idx = np.unique(codes, return_index=True)
+    first = np.full(T * A, -1, dtype=np.int64)
+    first[uniq] = positions[first_idx]
+    first = first.reshape(T, A)
+
+    uniq_rev, last_idx = np.unique(codes[::-1], return_index=True)
+    last = np.full(T * A, -1, dtype=np.int64)
+    last[uniq_rev] = positions[::-1][last_idx]
+    last = last.reshape(T, A)
+
+    present = count > 0
+    pw = present * weights[:, None]
+
+    counters.n_traces += weights.sum()
+    counters.present += pw.sum(axis=0)
+    counters.once += ((count == 1) * weights[:, None]).sum(axis=0)
+    counters.multi += ((count > 1) * weights[:, None]).sum(axis=0)
+    counters.both += pw.T @ present
+
+    # Ordering relations: only the traces containing a are involved in row a
+    for a in range(A):
+        rows = np.nonzero(present[:, a])[0]
+        if len(rows) == 0:
+            continue
+        w = weights[rows]
+        after_last = last[rows] > last[rows, a][:, None]
+        after_first = first[rows] > first[rows, a][:, None]
+        counters.resp[a] += w @ after_last
+        counters.prec[a] += w @ after_first
+        counters.succ[a] += w @ (after_last & after_first)
+
+    # Immediate successions: (trace, a, b) pairs of consecutive events
+    same_trace = trace_ids[:-1] == trace_ids[1:]
+    if same_trace.any():
+        pair_codes = (trace_ids[:-1] * A + acts[:-1]) * A + acts[1:]
+        pair_codes, n_pairs = np.unique(pair_codes[same_trace], return_counts=True)
+        t, rest = np.divmod(pair_codes, A * A)
+        a, b = np.divmod(rest, A)
+        # every a of the trace is followed by b
+        ok = n_pairs == count[t, a]
+        np.add.at(counters.chain, (a[ok], b[ok]), weights[t[ok]])
+
+
+# Computes the counters of a whole log, in blocks of traces to bound the dense matrices
+def count_traces(traces, weights=None, block_cells=2_000_000):
+    activities, encoded = encode_traces(traces)
+    counters = DeclareCounters(activities)
+
+    if weights is None:
+        weights = np.ones(len(encoded))
+    weights = np.asarray(weights, dtype=float)
+
+    block = max(1, block_cells // max(1, len(activities)))
+    for i in range(0, len(encoded), block):
+        _count_block(counters, encoded[i:i + block], weights[i:i + block])
+
+    return counters
+
+
+# Support/confidence/coverage of every candidate constraint above the given thresholds
+def constraint_statistics(counters, support=0.0, confidence=0.0, coverage=0.0):
+    N = counters.n_traces
+    acts = counters.activities
+    rows = []
+    if N == 0 or not acts:
+        return rows
+
+    def collect(template, sat, act, pairs=None):
+        sup = sat / N
+        cov = act / N
+        with np.errstate(divide="ignore", invalid="ignore"):
+            conf = np.where(act > 0, sat / act, 0.0)
+        mask = (sup >= support) & (conf >= confidence) & (cov >= coverage) & (act > 0)
+        if pairs is not None:
+            mask &= pairs
+        for idx in zip(*np.nonzero(mask)):
+            a = acts[idx[0]]
+            b = acts[idx[1]] if len(idx) > 1 else ""
+            rows.append({
+                "Template": template,
+                "Activation": a,
+                "Target": b,
+                "Support": float(sup[idx]),
+                "Confidence level": float(conf[idx]),
+                "Coverage": float(cov[idx]),
+            })
+
+    ones = np.full(len(acts), N)
+    collect("AtLeast1", counters.present, ones)
+    collect("AtMostOnce", N - counters.multi, ones)
+    collect("ExactlyOne", counters.once, ones)
+
+    A = len(acts)
+    distinct = ~np.eye(A, dtype=bool)
+    pa = counters.present[:, None]
+    pb = counters.present[None, :]
+
+    collect("Response", counters.resp, np.broadcast_to(pa, (A, A)), distinct)
+    collect("Precedence", counters.prec, np.broadcast_to(pb, (A, A)), distinct)
+    collect("Succession", counters.succ, pa + pb - counters.both, distinct)
+    collect("ChainResponse", counters.chain, np.broadcast_to(pa, (A, A)), distinct)
+
+    # Symmetric templates are reported once per unordered pair
+    labels = np.array(acts, dtype=object)
+    ordered = labels[:, None] < labels[None, :]
+    all_traces = np.full((A, A), N)
+    collect("Choice", pa + pb - counters.both, all_traces, ordered)
+    collect("ExclusiveChoice", pa + pb - 2 * counters.both, all_traces, ordered)
+
+    return rows
+
+
+# Removes constraints implied by a stronger one that is also kept
+def prune_hierarchy(rows):
+    kept = {(r["Template"], r["Activation"], r["Target"]) for r in rows}
+
+    def implied(r):
+        t, a, b = r["Template"], r["Activation"], r["Target"]
+        if t in ("AtLeast1", "AtMostOnce"):
+            return ("ExactlyOne", a, "") in kept
+        if t in ("Response", "Precedence"):
+            return ("Succession", a, b) in kept or (t == "Response" and ("ChainResponse", a, b) in kept)
+        if t == "Choice":
+            return (("ExclusiveChoice", a, b) in kept
+                    or ("AtLeast1", a, "") in kept or ("ExactlyOne", a, "") in kept
+                    or ("AtLeast1", b, "") in kept or ("ExactlyOne", b, "") in kept)
+        return False
+
+    return [r for r in rows if not implied(r)]
+
+
+# Full selection: thresholds of minerful_conf, then hierarchy pruning unless disabled
+def select_constraints(counters, support, confidence, coverage, pruning="hierarchy"):
+    rows = constraint_statistics(counters, support, confidence, coverage)
+    if pruning and pruning != "none":
+        rows = prune_hierarchy(rows)
+    rows.sort(key=lambda r: (r["Template"], r["Activation"], r["Target"]))
+    return rows
+
+
+# Writes the constraints with the same column layout used for MINERful output
+def write_constraints_csv(rows, output_csv):
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, delimiter=";", quotechar="'")
+        writer.writeheader()
+        for r in rows:
+            params = f"{r['Activation']}, {r['Target']}" if r["Target"] else r["Activation"]
+            writer.writerow(dict(r, Constraint=f"{r['Template']}({params})"))
+
+def write_constraints_json(rows, activities, output_json):
+    model = {
+        "name": "Model discovered by the native Declare miner",
+        "tasks": sorted(activities),
+        "constraints": [
+            {
+                "template": r["Template"],
+                "parameters": [[r["Activation"]], [r["Target"]]] if r["Target"] else [[r["Activation"]]],
+                "support": r["Support"],
+                "confidence": r["Confidence level"],
+                "coverage": r["Coverage"],
+            }
+            for r in rows
+        ],
+    }
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+
+
+# Reads the traces of an XES log with the classifier keys configured for MINERful.
+# Returns (traces, weights): a compressed trace variant weighs as many traces as it stands for.
+def load_traces(input_xes, minerful_conf):
+    keys = minerful_conf["classifier_keys"].split() if minerful_conf.get("use_classifier") else ["concept:name"]
+    traces, weights = [], []
+    for attrs, labels in iter_xes_traces(input_xes, keys):
+        traces.append(labels)
+        weights.append(float(attrs.get(VARIANT_COUNT_KEY) or 1))
+    return traces, weights
+
+
+def mineDeclare(input_xes, output_csv, output_json, minerful_conf):
+    if not os.path.exists(input_xes):
+        raise FileNotFoundError(f"[Native miner ERROR] Input XES not found: {input_xes}")
+
+    print(f"[Native miner] Reading {input_xes}...")
+    traces, weights = load_traces(input_xes, minerful_conf)
+    counters = count_traces(traces, weights)
+    print(f"[Native miner] {len(traces)} variants ({counters.n_traces:.0f} traces), {len(counters.activities)} activities")
+
+    rows = select_constraints(
+        counters,
+        minerful_conf["support"],
+        minerful_conf["confidence"],
+        minerful_conf["coverage"],
+        minerful_conf.get("pruning_strategy", "hierarchy"),
+    )
+
+    write_constraints_csv(rows, output_csv)
+    write_constraints_json(rows, counters.activities, output_json)
+
+    print(f"\n[Extraction completed]\nConstraints: {len(rows)}\nCSV: {output_csv}\nJSON: {output_json}")
+    return output_csv, output_json
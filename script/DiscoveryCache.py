@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+# Content-addressed cache of constraint discovery results.
+# The key hashes the input log contents, the classifier settings, the thresholds, the pruning
+# strategy, the alphabet guard, the engine and (for MINERful) the jar, so any change of these
+# misses the cache.
+
+CACHE_VERSION = 1
+
+_digests = {}
+
+# SHA-256 of a file, memoized on (path, size, mtime) so big logs and the jar are hashed once
+def file_digest(path):
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _digests:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+        _digests[memo_key] = hasher.hexdigest()
+    return _digests[memo_key]
+
+def discovery_key(input_xes, minerful_conf):
+    engine = minerful_conf.get("engine", "minerful")
+    use_classifier = bool(minerful_conf.get("use_classifier"))
+    guard_conf = minerful_conf.get("alphabet_guard") or {}
+
+    settings = {
+        "version": CACHE_VERSION,
+        "log": file_digest(input_xes),
+        "engine": engine,
+        "use_classifier": use_classifier,
+        "classifier_name": minerful_conf.get("classifier_name") if use_classifier else None,
+        "classifier_keys": minerful_conf.get("classifier_keys") if use_classifier else None,
+        "support": minerful_conf["support"],
+        "confidence": minerful_conf["confidence"],
+        "coverage": minerful_conf["coverage"],
+        "pruning_strategy": minerful_conf["pruning_strategy"],
+        "alphabet_guard": guard_conf if guard_conf.get("enabled") else None,
+        "jar": file_digest(minerful_conf["minerful_jar"]) if engine != "native" else None,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DiscoveryCache:
+    def __init__(self, cache_dir, max_size_mb=2048):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 2**20)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    # On a hit, the stored CSV/JSON are placed at the output paths and True is returned
+    def lookup(self, key, output_csv, output_json):
+        entry = self._entry(key)
+        cached_csv = os.path.join(entry, "result.csv")
+        cached_json = os.path.join(entry, "result.json")
+        if not (os.path.exists(cached_csv) and os.path.exists(cached_json)):
+            return False
+
+        try:
+            shutil.copyfile(cached_csv, output_csv)
+            shutil.copyfile(cached_json, output_json)
+            # Last use time drives the eviction order
+            os.utime(entry)
+        except FileNotFoundError:
+            # Evicted meanwhile by a concurrent run
+            return False
+        return True
+
+    def store(self, key, output_csv, output_json):
+        entry = self._entry(key)
+        tmp = f"{entry}.tmp{os.getpid()}_{time.monotonic_ns()}"
+        os.makedirs(tmp)
+        shutil.copyfile(output_csv, os.path.join(tmp, "result.csv"))
+        shutil.copyfile(output_json, os.path.join(tmp, "result.json"))
+
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Stored meanwhile by a concurrent job
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.evict()
+
+    # Removes least recently used entries until the cache fits in max_size_mb
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(path) or ".tmp" in name:
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+                entries.append((os.stat(path).st_mtime, size, path))
+            except FileNotFoundError:
+                # Evicted meanwhile by a concurrent run
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            print(f"[CACHE] Evicted {os.path.basename(path)[:12]}... ({size / 2**20:.1f} MB)")
@@ -0,0 +1,41 @@
+import pandas as pd
+from pm4py.objects.log.util import dataframe_utils
+from pm4py.objects.conversion.log import converter as log_converter
+from pm4py.objects.log.exporter.xes import exporter as xes_exporter
+
+# In-memory handoff between the log stages (event log -> variants -> cleaning -> grounding ->
+# compound): a stage takes either the CSV path or the DataFrame of the previous stage, and writes
+# its CSV/XES only when it is given their paths. Frames are handed over as the next stage would
+# read them back from the CSV: every value a string, missing values empty.
+
+
+# Log of a CSV path, or the handed-over DataFrame itself (the stages fillna it into a copy
+# before changing anything)
+def read_log(source, sep=";", **read_args):
+    if isinstance(source, pd.DataFrame):
+        return source
+    return pd.read_csv(source, sep=sep, dtype=str, **read_args)
+
+# The frame as it would be read back from its CSV
+def handoff_frame(df):
+    return df.fillna("").astype(str)
+
+# Events and traces of a log frame
+def log_size(df, case_col=None):
+    case_col = case_col or next((c for c in ("case:concept:name", "case_id") if c in df.columns), None)
+    return len(df), (int(df[case_col].nunique()) if case_col in df.columns else None)
+
+# Writes a log kept in memory once its files turn out to be needed
+def write_log(df, csv_path, xes_path, sep=";"):
+    df.to_csv(csv_path, sep=sep, index=False, encoding="utf-8")
+    # Raw event logs still have the column names of script/GeneralCreationEventLog.py
+    df = df.rename(columns={
+        "case_id": "case:concept:name",
+        "activity": "concept:name",
+        "timestamp": "time:timestamp"
+    })
+    df = dataframe_utils.convert_timestamp_columns_in_df(df)
+    log = log_converter.apply(df, parameters={
+        log_converter.Variants.TO_EVENT_LOG.value.Parameters.CASE_ID_KEY: "case:concept:name"
+    })
+    xes_exporter.apply(log, xes_path)
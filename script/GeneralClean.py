@@ -3,7 +3,11 @@ from pm4py.objects.log.util import dataframe_utils
 from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.objects.log.exporter.xes import exporter as xes_exporter
 import datetime
+from script.VariantCompression import VARIANT_COUNT_COL
+from script.EventLogFrame import read_log, handoff_frame
 
+# csvInput: CSV path or the DataFrame of the previous stage; csvOutput/xesOutput None: that file
+# is not written. Returns the cleaned DataFrame
 def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
     # Initialize configuration and cleaning options
     if cleaning_conf is None:
@@ -21,8 +25,8 @@ def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
 
 
     # Load CSV file and handle missing values
-    df = pd.read_csv(csvInput, sep=sep, dtype=str,
-                    keep_default_na=False, na_values=["nan", "NaN", ""])
+    df = read_log(csvInput, sep=sep,
+                  keep_default_na=False, na_values=["nan", "NaN", ""])
     # replace missing values with empty string
     df = df.fillna("")  
 
@@ -50,7 +54,7 @@ def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
 
     # Remove columns that contain only empty values
     if remove_empty_columns:
-        empty_cols = [c for c in df.columns if df[c].eq("").all()]
+        empty_cols = [c for c in df.columns if df[c].eq("").all() and c != VARIANT_COUNT_COL]
         if empty_cols:
             print(f"Removing empty columns: {empty_cols}")
             df.drop(columns=empty_cols, inplace=True)
@@ -58,7 +62,8 @@ def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
 
     # Remove redundant columns (different columns with identical values)
     if remove_redundant_columns:
-        cols = list(df.columns)
+        # Variant multiplicities are kept even when they look redundant
+        cols = [c for c in df.columns if c != VARIANT_COUNT_COL]
         redundant = set()
 
         for i in range(len(cols)):
@@ -76,6 +81,8 @@ def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
     if remove_constant_columns:
         constant_cols = []
         for col in df.columns:
+            if col == VARIANT_COUNT_COL:
+                continue
             unique_vals = set(df[col].astype(str).str.strip().unique()) - {""}
             if len(unique_vals) <= 1:
                 constant_cols.append(col)
@@ -84,10 +91,11 @@ def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
             print(f"Removing columns with constant values: {constant_cols}")
             df.drop(columns=constant_cols, inplace=True)
 
-    # Save the cleaned dataframe to a CSV file
-    df.to_csv(csvOutput, sep=";", index=False, encoding="utf-8")
+    cleaned = handoff_frame(df)
 
-    df = dataframe_utils.convert_timestamp_columns_in_df(df)  
+    # Save the cleaned dataframe to a CSV file
+    if csvOutput:
+        df.to_csv(csvOutput, sep=";", index=False, encoding="utf-8")
 
     required = ["case:concept:name", "concept:name", "time:timestamp"]
     missing = [c for c in required if c not in df.columns]
@@ -98,7 +106,10 @@ def puliziaEventLog(csvInput, csvOutput, xesOutput, cleaning_conf=None):
             f"Available columns: {list(df.columns)}"
         )
 
-    log = log_converter.apply(df)                              
-    xes_exporter.apply(log, xesOutput)           
+    if xesOutput:
+        df = dataframe_utils.convert_timestamp_columns_in_df(df)
+        log = log_converter.apply(df)
+        xes_exporter.apply(log, xesOutput)
 
     print("\nCleaning completed.")
+    return cleaned
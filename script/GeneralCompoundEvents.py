@@ -1,12 +1,105 @@
 import pandas as pd
 import re
 import os
+from collections import deque
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from pm4py.objects.log.util import dataframe_utils
 from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.objects.log.exporter.xes import exporter as xes_exporter
+from script.EventLogFrame import read_log
 
 
-def merge_generic_events(df, manual_cols=None):
+# Splits the events of one (case, activity) group into chains where the destination
+# of each event equals the source of the next one (columns[1] of current == columns[0] of next).
+# Events are indexed by their source values, so the chain end's destination finds the
+# next link in O(1) instead of scanning every later event.
+# Each chain takes the earliest unused event whose source matches: since every event
+# before the current start is already used, that is always the front of its bucket.
+def link_chains(sources, destinations):
+    pending = {}
+    for j, key in enumerate(sources):
+        pending.setdefault(key, deque()).append(j)
+
+    used = [False] * len(sources)
+    chains = []
+
+    for i in range(len(sources)):
+        if used[i]:
+            continue
+
+        # i is the earliest unused event, hence the front of its own bucket
+        pending[sources[i]].popleft()
+        used[i] = True
+        chain = [i]
+
+        # Build the chain following destination -> source matches
+        while True:
+            bucket = pending.get(destinations[chain[-1]])
+            if not bucket:
+                break
+            j = bucket.popleft()
+            used[j] = True
+            chain.append(j)
+
+        chains.append(chain)
+
+    return chains
+
+
+# Merges the chains of every (case, activity) group of df into single rows
+def merge_chains(df, numbered_cols):
+    src_cols = [cols[0] for cols in numbered_cols.values()]
+    dest_cols = [cols[1] for cols in numbered_cols.values()]
+
+    merged_rows = []
+    key_cols = ["case:concept:name", "concept:name"]
+
+    # Group by Case and Activity to find sequential chains within the same process instance
+    for keys, group in df.groupby(key_cols):
+        # Sort by timestamp to ensure chronological order
+        group = group.sort_values("time:timestamp").reset_index(drop=True)
+
+        # Work on plain NumPy arrays instead of per-cell group.loc lookups
+        columns = group.columns.tolist()
+        values = group.to_numpy()
+        dest_pos = [columns.index(c) for c in dest_cols]
+        sources = list(map(tuple, group[src_cols].to_numpy()))
+        destinations = list(map(tuple, group[dest_cols].to_numpy()))
+
+        for chain in link_chains(sources, destinations):
+            # Create a single merged row from the detected chain
+            first_idx, last_idx = chain[0], chain[-1]
+
+            row_data = dict(zip(columns, values[first_idx]))
+
+            # Update destination columns with the values from the LAST event in the chain
+            # E.g., if chain is A->B, B->C, C->D, the final row represents A->D
+            for dest_col, pos in zip(dest_cols, dest_pos):
+                row_data[dest_col] = values[last_idx, pos]
+
+            merged_rows.append(row_data)
+
+    return merged_rows
+
+
+# Splits the log into at most n partitions of whole cases with a similar number of events
+def partition_by_case(df, n):
+    case_rows = df.groupby("case:concept:name", sort=False).indices
+    buckets = [[] for _ in range(min(n, len(case_rows)))]
+    loads = [0] * len(buckets)
+
+    # Largest cases first, each one to the currently lightest partition
+    for case, rows in sorted(case_rows.items(), key=lambda item: -len(item[1])):
+        k = loads.index(min(loads))
+        buckets[k].append(rows)
+        loads[k] += len(rows)
+
+    return [df.iloc[np.sort(np.concatenate(rows))] for rows in buckets if rows]
+
+
+def merge_generic_events(df, manual_cols=None, workers=1):
     
     # Normalize column names
     original_cols = df.columns.tolist()
@@ -42,60 +135,15 @@ def merge_generic_events(df, manual_cols=None):
         return df
 
 
-    merged_rows = []
-
-    # Group by Case and Activity to find sequential chains within the same process instance
-    for keys, group in df.groupby(key_cols):
-        # Sort by timestamp to ensure chronological order
-        group = group.sort_values("time:timestamp").reset_index(drop=True)
-        used = set()
-
-        for i in range(len(group)):
-            if i in used:
-                continue
-            
-            chain = [i]
-            
-            # Build the chain: columns[1] of current row == column[0] of next row
-            progress = True
-            while progress:
-                progress = False
-                # Search for a subsequent event that 'fits' the chain
-                for j in range(i + 1, len(group)):
-                    if j in used or j in chain:
-                        continue
-                    
-                    match_all = True
-                    for base, cols in numbered_cols.items():
-                        val_prev_dest = group.loc[chain[-1], cols[1]]
-                        val_curr_src = group.loc[j, cols[0]]
-                        
-                        if val_prev_dest != val_curr_src:
-                            match_all = False
-                            break
-                    
-                    if match_all:
-                        chain.append(j)
-                        progress = True
-                        break 
-            
-
-            # Create a single merged row from the detected chain
-            first_idx, last_idx = chain[0], chain[-1]
-            
-            row_data = group.loc[first_idx].to_dict()
-            
-            # Update destination columns with the values from the LAST event in the chain
-            # E.g., if chain is A->B, B->C, C->D, the final row represents A->D
-            for base, cols in numbered_cols.items():
-                dest_col = cols[1] 
-                row_data[dest_col] = group.loc[last_idx, dest_col]
-            
-            # Keep the start timestamp of the first event
-            row_data["time:timestamp"] = group.loc[first_idx, "time:timestamp"]
-            
-            merged_rows.append(row_data)
-            used.update(chain)
+    if workers > 1 and df["case:concept:name"].nunique() > 1:
+        # Chains never cross a case boundary: merge case partitions in a process pool
+        partitions = partition_by_case(df, workers)
+        print(f"[COMPOUND] Merging {len(partitions)} case partitions ({workers} workers)...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(merge_chains, partitions, repeat(numbered_cols))
+            merged_rows = [row for rows in results for row in rows]
+    else:
+        merged_rows = merge_chains(df, numbered_cols)
 
     # Reconstruct the DataFrame with merged data
     df_merged = pd.DataFrame(merged_rows)
@@ -132,13 +180,14 @@ def compoundEvents(csvInput, csvOutput, xesOutput, compound_conf=None):
     
     target_columns = compound_conf.get("columns", [])
 
-    print(f"[COMPOUND] Reading {csvInput}...")
+    # csvInput: CSV path or the DataFrame handed over by the grounding stage
+    if not isinstance(csvInput, pd.DataFrame):
+        print(f"[COMPOUND] Reading {csvInput}...")
 
     try:
-        df = pd.read_csv(
+        df = read_log(
             csvInput,
             sep=sep,
-            dtype=str,
             keep_default_na=False,
             na_values=["nan", "NaN", ""]
         )
@@ -166,8 +215,9 @@ def compoundEvents(csvInput, csvOutput, xesOutput, compound_conf=None):
 
 
     manual_cols_param = target_columns if target_columns else None
+    case_workers = int(compound_conf.get("case_workers", 1))
     
-    df_merged = merge_generic_events(df, manual_cols=manual_cols_param)
+    df_merged = merge_generic_events(df, manual_cols=manual_cols_param, workers=case_workers)
 
 
     df_merged.to_csv(csvOutput, sep=sep, index=False)
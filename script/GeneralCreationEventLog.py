@@ -6,6 +6,7 @@ import pandas as pd
 from pm4py.objects.log.util import dataframe_utils
 from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.objects.log.exporter.xes import exporter as xes_exporter
+from script.EventLogFrame import handoff_frame
 
 # Checks if a parameter name is generic (e.g., a, b, obj1, var2, p3, etc.)
 def is_generic_name(name):
@@ -228,20 +229,24 @@ def generate_event_log(domain_file, root_plans_dir, output_csv, output_xes, even
 
     fieldnames = order + other_cols
 
-    print("\nWriting CSV...")
-    with open(output_csv, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=csv_delimiter)
-        writer.writeheader()
-        writer.writerows(rows)
+    # Same frame as reading the CSV back, built without the round trip
+    log_df = handoff_frame(pd.DataFrame(rows, columns=fieldnames))
 
+    if output_csv:
+        print("\nWriting CSV...")
+        with open(output_csv, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=csv_delimiter)
+            writer.writeheader()
+            writer.writerows(rows)
 
-    print(f"CSV generated: {output_csv}")
+        print(f"CSV generated: {output_csv}")
     print(f"Number of events: {len(rows)}")
 
+    if not output_xes:
+        return log_df
+
     print("\nConverting to XES...")
-    df = pd.read_csv(output_csv, sep=";", dtype=str, keep_default_na=False, na_values=["nan", "NaN", ""])
-    df = df.fillna("")
-    df = dataframe_utils.convert_timestamp_columns_in_df(df)
+    df = dataframe_utils.convert_timestamp_columns_in_df(log_df.copy())
 
     df = df.rename(columns={
         "case_id": "case:concept:name",
@@ -255,8 +260,10 @@ def generate_event_log(domain_file, root_plans_dir, output_csv, output_xes, even
 
     xes_exporter.apply(log, output_xes)
     print(f"XES generated: {output_xes}")
-    
+    return log_df
+
 
+# Returns the event log DataFrame; csvOutput/xesOutput None: that file is not written
 def createEventLog(domainPath, planDirectory, csvOutput, xesOutput, eventlog_conf=None):
     return generate_event_log(
         domain_file=domainPath,
@@ -1,7 +1,6 @@
 import subprocess
 import os
 import shutil
-import time
 import signal
 import threading
 from concurrent.futures import ProcessPoolExecutor
@@ -40,6 +39,56 @@ def translate_problem(domain_file, problem_file, base_output_dir, fast_downward_
     return sas_file
 
 
+# Fast Downward command line of one search command on inputs ("output.sas", or domain and
+# problem files): alias commands get --overall-time-limit, the others the returned timeout
+def search_command(fast_downward_path, cmd_str, inputs, time_limit_alias, time_limit_non_alias):
+    if "--alias" in cmd_str:
+        return [fast_downward_path] + cmd_str.split() + ["--overall-time-limit", time_limit_alias] + inputs, None
+    return [fast_downward_path] + inputs + cmd_str.split(), time_limit_non_alias
+
+
+# Runs a Fast Downward command in cwd; every output line is passed to on_line.
+# The driver leads its own session, so a timeout stops the translator and search it started too
+# (SIGTERM, then SIGKILL after 5 s). Returns (exit code, or "timeout", and the whole output)
+def run_search(cmd_parts, cwd, timeout=None, on_line=None):
+    proc = subprocess.Popen(
+        cmd_parts,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        start_new_session=True
+    )
+
+    # Thread for streaming output
+    lines = []
+    def stream_output(pipe):
+        for line in iter(pipe.readline, ''):
+            lines.append(line)
+            if on_line:
+                on_line(line)
+        pipe.close()
+
+    t = threading.Thread(target=stream_output, args=(proc.stdout,))
+    t.daemon = True
+    t.start()
+
+    try:
+        exit_code = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+        exit_code = "timeout"
+
+    t.join(timeout=5)
+    return exit_code, "".join(lines)
+
+
 def run_search_for_problem(
     problem_name,
     sas_file,
@@ -75,57 +124,16 @@ def run_search_for_problem(
         local_sas = os.path.join(cmd_dir, "output.sas")
         shutil.copy(sas_file, local_sas)
 
-        # Build command differently for alias and non-alias searches:
-        # alias can use --overall-time-limit; 
-        if is_alias:
-            cmd_parts = [
-                fast_downward_path
-            ] + cmd_str.split() + [
-                "--overall-time-limit", time_limit_alias,
-                "output.sas"
-            ]
-        else:
-            cmd_parts = [
-                fast_downward_path,
-                "output.sas"
-            ] + cmd_str.split()
+        # Alias commands use --overall-time-limit; the others are stopped after time_limit_non_alias
+        cmd_parts, timeout = search_command(fast_downward_path, cmd_str, ["output.sas"],
+                                            time_limit_alias, time_limit_non_alias)
 
         print(f"[{problem_name} / CMD {idx}] command: {' '.join(cmd_parts)}")
 
-        proc = subprocess.Popen(
-            cmd_parts,
-            cwd=cmd_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-            preexec_fn=os.setsid
-        )
-
-        # Thread for streaming output
-        def stream_output(pipe):
-            for line in iter(pipe.readline, ''):
-                print(f"[{problem_name} / CMD {idx}] {line.strip()}")
-            pipe.close()
-
-        t = threading.Thread(target=stream_output, args=(proc.stdout,))
-        t.daemon = True
-        t.start()
-
-        # Timeout management for non-alias searches: stop and go to the next command after around 800s
-        start_time = time.time()
-        timeout = time_limit_non_alias if not is_alias else None
-
-        while t.is_alive() and proc.poll() is None:
-            if timeout and (time.time() - start_time > timeout):
-                print(f"Timeout for {problem_name} CMD {idx}")
-                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-                break
-            time.sleep(1)
-
-        t.join(timeout=5)
-        proc.wait(timeout=5)
+        exit_code, _ = run_search(cmd_parts, cmd_dir, timeout,
+                                  on_line=lambda line: print(f"[{problem_name} / CMD {idx}] {line.strip()}"))
+        if exit_code == "timeout":
+            print(f"Timeout for {problem_name} CMD {idx}")
 
         # Move generated plans to the plan directory
         for entry in os.scandir(cmd_dir):
@@ -135,7 +143,7 @@ def run_search_for_problem(
                 print(f"Plan saved: {plan_dir}/{new_name}")
 
         shutil.rmtree(cmd_dir, ignore_errors=True)
-        print(f"[{problem_name} / CMD {idx}] finished (exit {proc.returncode})")
+        print(f"[{problem_name} / CMD {idx}] finished (exit {exit_code})")
 
     print(f"All searches for {problem_name} completed.\n")
 
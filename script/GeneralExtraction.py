@@ -1,62 +1,82 @@
-import xml.etree.ElementTree as ET
-import subprocess
 import os
+import time
+import signal
+import tempfile
 import pandas as pd
 from pathlib import Path
+from script.XesStream import transform_xes
+from script.DeclareMiner import mineDeclare
+from script.DiscoveryCache import DiscoveryCache, discovery_key
+from script.AlphabetGuard import guardAlphabet, drop_bucket_constraints
+from script.MinerfulWorker import TERMINATED
 
 # Convertion of numeric attributes (float/int) to strings and replace 'NaN' or null values with an empty string
-def clean_numeric_fields_in_xes(input_file, output_file):
-    tree = ET.parse(input_file)
-    root = tree.getroot()
-
-    ET.register_namespace('', "http://www.xes-standard.org/")
-    ET.register_namespace('concept', "http://www.xes-standard.org/concept.xesext")
-
-    for elem in root.iter():
-        if elem.tag.endswith('float') or elem.tag.endswith('int'):
-            val = elem.get('value')
-
-            if val is None or val.lower() == 'nan':
-                elem.set('value', '')
-
-            elem.tag = elem.tag.replace('float', 'string').replace('int', 'string')
-
-    tree.write(output_file, encoding="utf-8", xml_declaration=True)
-    return output_file
+# (compressed trace variants are expanded back, MINERful has no trace weights)
+def clean_numeric_fields_in_xes(input_file, output_file, expand_variants=False, event_hook=None):
+    return transform_xes(input_file, output_file, expand_variants=expand_variants, event_hook=event_hook)
 
 # Injects a classifier into the XES log
 def add_classifier_to_xes(input_file, output_file, name, keys):
-    # Parse the original XES file into an XML tree
-    tree = ET.parse(input_file)
-    # get root element (log)
-    root = tree.getroot()
-
-    ET.register_namespace('', "http://www.xes-standard.org/")
-    ET.register_namespace('concept', "http://www.xes-standard.org/concept.xesext")
-    
-    # Create new classifier element
-    classifier_elem = ET.Element("{http://www.xes-standard.org/}classifier")
-    # set the classifier name attribute
-    classifier_elem.set("name", name)
-    # set the keys attribute
-    classifier_elem.set("keys", keys)
-
-    # Insert classifier as the first child of the root element
-    root.insert(0, classifier_elem)
-
-    tree.write(output_file, encoding="utf-8", xml_declaration=True)
+    # Stream the log, inserting the classifier as the first child of the root element
+    transform_xes(input_file, output_file, classifiers=[(name, keys)], retype_numeric=False)
     print(f"New XES file created with classifier: {output_file}")
     return output_file
 
 
 
+
+# Runs a java command with an optional timeout; also returns elapsed time and peak RSS of the JVM.
+# The JVM is spawned directly (not through subprocess) so that wait4 reaps it and reports the
+# resource usage of this child alone; it leads its own session, so a timeout kills its whole group.
+def run_java(cmd, timeout=None):
+    with tempfile.TemporaryFile(mode="w+") as out, tempfile.TemporaryFile(mode="w+") as err:
+        start = time.perf_counter()
+        pid = os.posix_spawnp(cmd[0], cmd, os.environ, file_actions=[
+            (os.POSIX_SPAWN_DUP2, out.fileno(), 1),
+            (os.POSIX_SPAWN_DUP2, err.fileno(), 2),
+        ], setsid=True)
+        timed_out = False
+
+        try:
+            while True:
+                waited, status, usage = os.wait4(pid, os.WNOHANG)
+                if waited != 0:
+                    break
+                if timeout and time.perf_counter() - start > timeout:
+                    timed_out = True
+                    os.killpg(pid, signal.SIGKILL)
+                    _, status, usage = os.wait4(pid, 0)
+                    break
+                time.sleep(0.2)
+        except BaseException:
+            # Interrupted: do not leave the JVM running (or unreaped) behind
+            os.killpg(pid, signal.SIGKILL)
+            os.wait4(pid, 0)
+            raise
+
+        out.seek(0)
+        err.seek(0)
+        stats = {
+            "returncode": os.waitstatus_to_exitcode(status),
+            "timed_out": timed_out,
+            "elapsed_s": round(time.perf_counter() - start, 3),
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        }
+        return out.read(), err.read(), stats
+
+
+# Discovers the constraints of one log: returns (output_csv, output_json), or None when the
+# alphabet guard skips the log (more labels than alphabet_guard.max_alphabet)
 def extraction(
     input_xes,
     input_csv,
     output_xes_with_classifier,
     output_csv,
     output_json,
-    minerful_conf
+    minerful_conf,
+    worker=None,
+    job_stats=None
 ):
 
     # Input Validation
@@ -66,6 +86,92 @@ def extraction(
     if not os.path.exists(input_csv):
         raise FileNotFoundError(f"[Extraction ERROR] Input CSV not found: {input_csv}")
 
+    # Same log and same discovery settings already mined: reuse the stored result
+    cache_conf = minerful_conf.get("cache") or {}
+    cache = None
+    if cache_conf.get("enabled", False):
+        cache = DiscoveryCache(cache_conf.get("dir", "cache/discovery"), cache_conf.get("max_size_mb", 2048))
+        key = discovery_key(input_xes, minerful_conf)
+        if cache.lookup(key, output_csv, output_json):
+            print(f"[CACHE] Discovery result reused ({key[:12]}...)")
+            print(f"\n[Extraction completed]\nCSV: {output_csv}\nJSON: {output_json}")
+            return output_csv, output_json
+
+    # Outputs of an earlier run (overwritten names) must not pass for the result of this one
+    for path in (output_csv, output_json):
+        if os.path.exists(path):
+            os.remove(path)
+
+    # Outcome of the job (returncode, timeout), also when the scheduler does not collect it
+    if job_stats is None:
+        job_stats = {}
+
+    # Alphabet analysis before mining, with optional pruning/bucketing of rare labels
+    guard_conf = minerful_conf.get("alphabet_guard") or {}
+    event_hook = None
+    if guard_conf.get("enabled", False):
+        report_json = f"{os.path.splitext(output_csv)[0]}_alphabet.json"
+        event_hook, report = guardAlphabet(input_xes, report_json, minerful_conf)
+
+        max_alphabet = guard_conf.get("max_alphabet")
+        if max_alphabet and report["cost_after_guard"]["alphabet"] > max_alphabet:
+            print(f"[Extraction WARNING] {report['cost_after_guard']['alphabet']} labels exceed "
+                  f"max_alphabet ({max_alphabet}): mining skipped for {input_xes}")
+            job_stats["skipped"] = f"alphabet {report['cost_after_guard']['alphabet']} > max_alphabet {max_alphabet}"
+            return None
+
+    output_csv, output_json = run_discovery(
+        input_xes,
+        input_csv,
+        output_xes_with_classifier,
+        output_csv,
+        output_json,
+        minerful_conf,
+        worker=worker,
+        job_stats=job_stats,
+        event_hook=event_hook
+    )
+
+    # The bucket of rare labels is not an action: its constraints are dropped
+    if event_hook is not None and guard_conf.get("rare_labels") == "bucket":
+        dropped = drop_bucket_constraints(output_csv, guard_conf.get("bucket_label", "rare_label"))
+        print(f"[ALPHABET] {dropped} constraints on the bucket label removed from {output_csv}")
+
+    # Only a confirmed success is cached
+    succeeded = job_stats.get("returncode") == 0 and not job_stats.get("timed_out")
+    if cache is not None and succeeded and _completed(output_csv) and _completed(output_json):
+        cache.store(key, output_csv, output_json)
+
+    return output_csv, output_json
+
+# A discovery output is usable if it exists and is not empty
+def _completed(path):
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+# Runs the configured discovery engine on one log
+def run_discovery(
+    input_xes,
+    input_csv,
+    output_xes_with_classifier,
+    output_csv,
+    output_json,
+    minerful_conf,
+    worker=None,
+    job_stats=None,
+    event_hook=None
+):
+    # In-process miner for the templates supported by the TC mapping (no JVM)
+    if minerful_conf.get("engine", "minerful") == "native":
+        if event_hook is not None:
+            guarded_xes = f"{os.path.splitext(output_csv)[0]}_guarded.xes"
+            transform_xes(input_xes, guarded_xes, retype_numeric=False, event_hook=event_hook)
+            input_xes = guarded_xes
+        result = mineDeclare(input_xes, output_csv, output_json, minerful_conf)
+        if job_stats is not None:
+            job_stats["returncode"] = 0
+        return result
+
     # Configuration Setup
     sep = minerful_conf["csv_separator"]
     use_classifier = minerful_conf["use_classifier"]
@@ -82,24 +188,26 @@ def extraction(
     jar_path = minerful_conf["minerful_jar"]
     lib_path = minerful_conf["minerful_lib"]
 
-    output_dir = minerful_conf.get("output_dir", "minerful")
+    # Intermediate logs next to the outputs, inside the run folder (concurrent runs share the CWD)
+    output_dir = minerful_conf.get("output_dir") or os.path.dirname(os.path.abspath(output_csv))
     os.makedirs(output_dir, exist_ok=True)
 
-    # XES Normalization
+    # XES Normalization (single streaming pass, classifier injected in the same pass)
     cleaned_xes = os.path.join(
         output_dir,
         os.path.basename(input_xes).replace(".xes", "_cleaned.xes")
     )
 
-    clean_numeric_fields_in_xes(input_xes, cleaned_xes)
-
     # If enabled, use the XES classifier to group events by custom keys
     if use_classifier:
         final_xes = output_xes_with_classifier
-        add_classifier_to_xes(cleaned_xes, final_xes, classifier_name, classifier_keys)
+        transform_xes(input_xes, final_xes, classifiers=[(classifier_name, classifier_keys)],
+                      expand_variants=True, event_hook=event_hook)
+        print(f"New XES file created with classifier: {final_xes}")
         classifier_flag = ["-iLClassif", "logspec"]
     else:
         final_xes = cleaned_xes
+        clean_numeric_fields_in_xes(input_xes, cleaned_xes, expand_variants=True, event_hook=event_hook)
         classifier_flag = []
 
     # Load CSV
@@ -112,11 +220,7 @@ def extraction(
 
     classpath = f"{jar_path}:{lib_path}"
 
-    cmd = [
-        "java",
-        f"-Xmx{xmx_memory}",
-        "-cp", classpath,
-        "minerful.MinerFulMinerStarter",
+    minerful_args = [
         "-iLF", os.path.abspath(final_xes),
         "-s", str(support),
         "-c", str(confidence),
@@ -126,14 +230,46 @@ def extraction(
         "-oJSON", os.path.abspath(output_json),
     ] + classifier_flag
 
+    # Persistent JVM: the job is sent to the already running worker
+    if worker is not None and worker.usable:
+        print("Running MINERful (persistent worker):\n", " ".join(minerful_args))
+        status, output = worker.run(minerful_args)
+
+        print("\n--- MINERful output ---")
+        print(output)
+        if job_stats is not None:
+            job_stats["returncode"] = 0 if status == "OK" else 1
+
+        if status != TERMINATED:
+            if status != "OK":
+                print(f"[Extraction WARNING] MINERful job failed: {status}")
+            print(f"\n[Extraction completed]\nCSV: {output_csv}\nJSON: {output_json}")
+            return output_csv, output_json
+
+        # The worker died with the job: this and the next jobs run in their own JVM
+        print("[Extraction WARNING] MINERful worker terminated: running the job in its own JVM")
+
+    cmd = [
+        "java",
+        f"-Xmx{xmx_memory}",
+        "-cp", classpath,
+        "minerful.MinerFulMinerStarter",
+    ] + minerful_args
+
     print("Running MINERful:\n", " ".join(cmd))
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    stdout, stderr, stats = run_java(cmd, timeout=minerful_conf.get("timeout_seconds"))
 
     print("\n--- MINERful stdout ---")
-    print(result.stdout)
+    print(stdout)
     print("\n--- MINERful stderr ---")
-    print(result.stderr)
+    print(stderr)
+
+    if stats["timed_out"]:
+        print(f"[Extraction WARNING] MINERful timed out after {minerful_conf.get('timeout_seconds')} sec")
+
+    if job_stats is not None:
+        job_stats.update(stats)
 
     print(f"\n[Extraction completed]\nCSV: {output_csv}\nJSON: {output_json}")
 
@@ -5,12 +5,17 @@ from datetime import datetime, timedelta
 from pm4py.objects.log.util import dataframe_utils
 from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.objects.log.exporter.xes import exporter as xes_exporter
+from script.XesStream import transform_xes
+from script.EventLogFrame import read_log, handoff_frame
 
 
+# input_csv: CSV path or the DataFrame of the previous stage. Returns {CSV path: DataFrame} of
+# every aggregation; with materialize=False the CSV/XES files are not written
 def aggregateColumns(
     input_csv,
     output_prefix,
-    grounding_conf = None
+    grounding_conf = None,
+    materialize = True
 ):
     # Initialize configuration
     if grounding_conf is None:
@@ -25,7 +30,7 @@ def aggregateColumns(
     aggregations = grounding_conf["aggregations"]
 
     # Load the CSV file
-    original_df = pd.read_csv(input_csv, sep=sep, dtype=str, keep_default_na=False)
+    original_df = read_log(input_csv, sep=sep, keep_default_na=False)
     original_df = original_df.fillna("")
 
     # Map custom column names to standard Process Mining attributes (Case ID, Activity, Timestamp)
@@ -42,6 +47,8 @@ def aggregateColumns(
         agg["columns"] = [rename_map.get(c, c) for c in agg["columns"]]
 
  
+    grounded = {}
+
     # Iterate through each aggregation
     for agg in aggregations:
         name = agg["name"]
@@ -93,6 +100,10 @@ def aggregateColumns(
         output_xes = f"{base}_{bname}.xes"
 
 
+        grounded[output_csv] = handoff_frame(df)
+        if not materialize:
+            continue
+
         df.to_csv(output_csv, sep=sep, index=False, encoding="utf-8")
         print(f"[GROUNDING] CSV generato: {output_csv}")
 
@@ -102,4 +113,91 @@ def aggregateColumns(
         print(f"[GROUNDING] XES generato: {output_xes}")
 
     print("[GROUNDING] Operazione completata.")
+    return grounded
+
+
+
+# Virtual grounding: every aggregation is kept as an XES classifier on one shared log
+# instead of materializing a new CSV/XES pair that only differs in the activity column.
+# Each event gets one attribute per aggregation ("grounding:<name>") holding the label
+# aggregateColumns would give it (non-empty values joined by "_"), and the classifier of the
+# aggregation selects it (the case column is read from the trace); aggregations without the
+# activity column keep the activity, as the materialized logs do. The native miner reads the
+# classifier keys directly from the shared log
+def virtualAggregations(
+    input_csv,
+    input_xes,
+    output_prefix,
+    grounding_conf = None
+):
+    # Initialize configuration
+    if grounding_conf is None:
+        grounding_conf = {}
+
+    sep = grounding_conf["csv_separator"]
+    plan_col = grounding_conf["plan_column"]
+    timestamp_col = grounding_conf["timestamp_column"]
+    activity_col = grounding_conf["activity_column"]
+    aggregations = grounding_conf["aggregations"]
+
+    # Only the header is needed to validate the aggregation columns
+    columns = pd.read_csv(input_csv, sep=sep, dtype=str, nrows=0).columns.tolist()
 
+    rename_map = {
+        plan_col: "case:concept:name",
+        activity_col: "concept:name",
+        timestamp_col: "time:timestamp"
+    }
+    columns = [rename_map.get(c, c) for c in columns]
+
+    base, ext = os.path.splitext(output_prefix)
+    shared_xes = f"{base}_virtual.xes"
+
+    groundings = []
+    classifiers = []
+    # Label attribute -> aggregated columns
+    labels = {}
+
+    for agg in aggregations:
+        name = agg["name"]
+        cols = [rename_map.get(c, c) for c in agg["columns"]]
+
+        missing = [c for c in cols if c not in columns]
+        if missing:
+            print(f"Aggregation '{name}' skipped. Missing columns: {missing}")
+            continue
+
+        # The label is an event attribute, classifier keys are separated by blanks
+        if " " in name:
+            print(f"Aggregation '{name}' skipped. Name not usable as a classifier key: {name}")
+            continue
+
+        if "concept:name" in cols:
+            keys = f"grounding:{name}"
+            labels[keys] = cols
+        else:
+            keys = "concept:name"
+        print(f"[GROUNDING] Virtual aggregation: {name} -> classifier keys '{keys}'")
+
+        classifiers.append((name, keys))
+        groundings.append({
+            "name": name,
+            "stem": f"{os.path.basename(base)}_{name}",
+            "xes": shared_xes,
+            "classifier_name": name,
+            "classifier_keys": keys
+        })
+
+    def add_labels(attrs):
+        return {
+            key: "_".join(attrs.get(c, "").strip() for c in cols if attrs.get(c, "").strip() != "")
+            for key, cols in labels.items()
+        }
+
+    if groundings:
+        transform_xes(input_xes, shared_xes, classifiers=classifiers, retype_numeric=False,
+                      event_hook=add_labels if labels else None)
+        print(f"[GROUNDING] Shared XES with {len(classifiers)} classifiers: {shared_xes}")
+
+    print("[GROUNDING] Operazione completata.")
+    return groundings
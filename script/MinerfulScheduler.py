@@ -0,0 +1,98 @@
+import os
+import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from script.AlphabetGuard import parse_memory_mb, profile_log, estimate_heap_mb
+from script.GeneralExtraction import extraction
+
+# Concurrent MINERful runs: every job gets a heap sized on its own log and the jobs running
+# together never exceed a shared memory budget.
+
+
+# Shared memory budget: a job waits until its heap fits next to the running ones
+class MemoryBudget:
+    def __init__(self, total_mb):
+        self.total_mb = total_mb
+        self.used_mb = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, mb):
+        with self.cond:
+            # A job larger than the whole budget still runs, but alone
+            while self.used_mb > 0 and self.used_mb + mb > self.total_mb:
+                self.cond.wait()
+            self.used_mb += mb
+
+    def release(self, mb):
+        with self.cond:
+            self.used_mb -= mb
+            self.cond.notify_all()
+
+
+STATS_FIELDS = [
+    "stem", "input_xes", "size_mb", "traces", "events", "alphabet", "heap_mb",
+    "returncode", "timed_out", "elapsed_s", "peak_rss_mb", "skipped", "error"
+]
+
+# Runs the MINERful jobs concurrently and writes per-job stats (heap, timeout, peak memory) to stats_csv.
+# Each job is a dict with the extraction arguments plus its "stem".
+# A failing job does not stop the others: the stats of every job are written, then the failures raised.
+# Returns the extraction result of every job (None for a job skipped by the alphabet guard).
+def runMinerfulJobs(jobs, minerful_conf, stats_csv):
+    max_jobs = int(minerful_conf.get("max_parallel_jobs", 1))
+    auto_heap = minerful_conf.get("auto_heap", False)
+    budget = MemoryBudget(parse_memory_mb(minerful_conf.get("memory_budget", minerful_conf["xmx_memory"])))
+
+    all_stats = [{"stem": job["stem"], "input_xes": job["input_xes"]} for job in jobs]
+
+    def run(job, stats):
+        job_conf = job["minerful_conf"]
+
+        if auto_heap:
+            keys = job_conf["classifier_keys"].split() if job_conf["use_classifier"] else ["concept:name"]
+            profile = profile_log(job["input_xes"], keys)
+            heap_mb = estimate_heap_mb(profile, job_conf)
+        else:
+            profile = {"size_mb": round(os.path.getsize(job["input_xes"]) / 2**20, 2)}
+            heap_mb = parse_memory_mb(job_conf["xmx_memory"])
+
+        stats.update(heap_mb=heap_mb, **profile)
+        print(f"[MINERful] {job['stem']}: heap {heap_mb} MB (waiting for memory budget)")
+
+        budget.acquire(heap_mb)
+        try:
+            return extraction(
+                input_xes=job["input_xes"],
+                input_csv=job["input_csv"],
+                output_xes_with_classifier=job["output_xes_with_classifier"],
+                output_csv=job["output_csv"],
+                output_json=job["output_json"],
+                minerful_conf=dict(job_conf, xmx_memory=f"{heap_mb}m"),
+                job_stats=stats
+            )
+        finally:
+            budget.release(heap_mb)
+
+    results = [None] * len(jobs)
+    failures = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_jobs) as executor:
+            futures = [executor.submit(run, job, stats) for job, stats in zip(jobs, all_stats)]
+            for i, (stats, future) in enumerate(zip(all_stats, futures)):
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    stats["error"] = f"{type(e).__name__}: {e}"
+                    failures.append((stats["stem"], e))
+    finally:
+        with open(stats_csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=STATS_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(all_stats)
+        print(f"[MINERful] Job stats saved to: {stats_csv}")
+
+    if failures:
+        stems = ", ".join(stem for stem, _ in failures)
+        raise RuntimeError(f"[MINERful] {len(failures)} of {len(jobs)} jobs failed: {stems}") from failures[0][1]
+
+    return results
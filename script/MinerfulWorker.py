@@ -0,0 +1,153 @@
+import os
+import re
+import tempfile
+import subprocess
+from pathlib import Path
+
+WORKER_SOURCE = Path(__file__).parent / "java" / "MinerfulWorker.java"
+READY_MARK = "@@MINERFUL_READY"
+DONE_MARK = "@@MINERFUL_DONE"
+TERMINATED = "ERROR worker terminated"
+
+
+# Major version of the java on PATH (8 for "1.8.0_x", 17 for "17.0.2"), None if unknown
+def java_feature_version():
+    try:
+        result = subprocess.run(["java", "-version"], capture_output=True, text=True)
+    except OSError:
+        return None
+    m = re.search(r'version "(?:1\.)?(\d+)', result.stderr)
+    return int(m.group(1)) if m else None
+
+
+# Long-lived MINERful JVM: the classpath is loaded once and each mining job
+# (the MinerFulMinerStarter arguments) is sent on stdin, so many small per-aggregation
+# jobs do not pay JVM startup, classloading and JIT warm-up every time.
+# The markers travel on a pipe of their own (fd passed as minerful.worker.fd): stdout and
+# stderr only carry MINERful output, collected in a file and returned with each job.
+class MinerfulWorker:
+    def __init__(self, jar_path, lib_path, xmx_memory, build_dir=None):
+        if not os.path.exists(jar_path):
+            raise FileNotFoundError(f"MINERful.jar not found at: {jar_path}")
+
+        self.classpath = f"{jar_path}:{lib_path}"
+        self.xmx_memory = xmx_memory
+        self.build_dir = build_dir or os.path.join(os.path.dirname(jar_path), "worker")
+        self.proc = None
+        self.protocol = None
+        self.output = None
+        # False once a job has taken the JVM down: the remaining jobs get one JVM each
+        self.usable = True
+
+    # Compiles the worker classes against the MINERful classpath (only once). Concurrent runs
+    # share build_dir: the classes are compiled apart and moved in, the main class last
+    def compile(self):
+        class_file = os.path.join(self.build_dir, "MinerfulWorker.class")
+        if os.path.exists(class_file) and os.path.getmtime(class_file) >= os.path.getmtime(WORKER_SOURCE):
+            return class_file
+
+        os.makedirs(self.build_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.build_dir) as tmp:
+            cmd = ["javac", "-cp", self.classpath, "-d", tmp, str(WORKER_SOURCE)]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"[MINERful worker] Compilation failed:\n{result.stderr}")
+            for name in sorted(os.listdir(tmp), key=lambda n: n == "MinerfulWorker.class"):
+                os.replace(os.path.join(tmp, name), os.path.join(self.build_dir, name))
+        return class_file
+
+    def start(self):
+        self.compile()
+
+        read_fd, write_fd = os.pipe()
+        cmd = ["java", f"-Xmx{self.xmx_memory}", f"-Dminerful.worker.fd={write_fd}"]
+        # The exit guard installs a SecurityManager: Java 18-23 only allow it with this flag
+        # (known since Java 12), Java 24+ refuse the flag (no guard there, the fallback applies)
+        version = java_feature_version()
+        if version is not None and 12 <= version < 24:
+            cmd.append("-Djava.security.manager=allow")
+        cmd += ["-cp", f"{self.classpath}:{self.build_dir}", "MinerfulWorker"]
+        print("Starting MINERful worker:\n", " ".join(cmd))
+
+        # MINERful output goes to an unlinked file, read back through a handle of our own
+        output_fd, output_path = tempfile.mkstemp(prefix="minerful_worker_", suffix=".log")
+        self.output = open(output_path)
+        os.unlink(output_path)
+        try:
+            self.proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=output_fd,
+                stderr=subprocess.STDOUT,
+                pass_fds=(write_fd,),
+                text=True,
+                bufsize=1
+            )
+        finally:
+            # Only the worker keeps the write end: the pipe reaches EOF when it dies
+            os.close(write_fd)
+            os.close(output_fd)
+        self.protocol = os.fdopen(read_fd, "r")
+
+        # Wait until the classpath is loaded
+        status, output = self._read_until(READY_MARK)
+        if status is None:
+            self.proc.wait()
+            raise RuntimeError(f"[MINERful worker] Worker did not start:\n{output}")
+        return self
+
+    # Waits for the given marker on the protocol pipe; returns (status, output written meanwhile)
+    def _read_until(self, mark):
+        status = None
+        for line in self.protocol:
+            if line.startswith(mark):
+                status = line[len(mark):].strip()
+                break
+        return status, self.output.read()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    # Runs one mining job; args are the MinerFulMinerStarter command line arguments
+    def run(self, args):
+        if not self.alive():
+            self.start()
+
+        if any("\t" in a or "\n" in a for a in args):
+            raise ValueError(f"[MINERful worker] Arguments cannot contain tabs or newlines: {args}")
+
+        self.proc.stdin.write("\t".join(args) + "\n")
+        self.proc.stdin.flush()
+
+        status, output = self._read_until(DONE_MARK)
+
+        # The JVM died during the job (System.exit without the exit guard, out of memory, ...)
+        if status is None:
+            self.proc.wait()
+            self._release()
+            self.usable = False
+            return TERMINATED, output
+
+        return status, output
+
+    def close(self):
+        if self.alive():
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self._release()
+
+    def _release(self):
+        for stream in (self.protocol, self.output):
+            if stream is not None:
+                stream.close()
+        self.proc = self.protocol = self.output = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,167 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from script.DeclareMiner import DeclareCounters, select_constraints, write_constraints_csv, write_constraints_json
+from script.GeneralCreationEventLog import parse_plan_line
+from script.XesStream import iter_xes_traces, VARIANT_COUNT_KEY
+
+# Online Declare discovery: the counters of script/DeclareMiner.py are updated one trace at a
+# time, so the current constraint set is available at any moment and new plans are added to an
+# existing model (saved state) without mining the whole log again.
+
+COUNTER_MATRICES = ("both", "resp", "prec", "succ", "chain")
+COUNTER_VECTORS = ("present", "once", "multi")
+# Working folder of a running search (script/GeneralCreationPlan.py): its sas_plan files may
+# still be written, and are moved to <problem>/plans/ when the search ends
+SEARCH_DIR = re.compile(r"cmd_\d+")
+
+
+class IncrementalDeclareMiner:
+    def __init__(self):
+        self.counters = DeclareCounters()
+        # Plan files already added, and their contents (duplicate plans can be skipped)
+        self.seen_files = set()
+        self.seen_hashes = set()
+
+    # Adds the new activities to the alphabet, growing the counters
+    def _grow(self, labels):
+        c = self.counters
+        new = [label for label in dict.fromkeys(labels) if label not in c.index]
+        if not new:
+            return
+
+        for label in new:
+            c.index[label] = len(c.activities)
+            c.activities.append(label)
+
+        extra = len(new)
+        for name in COUNTER_VECTORS:
+            setattr(c, name, np.pad(getattr(c, name), (0, extra)))
+        for name in COUNTER_MATRICES:
+            setattr(c, name, np.pad(getattr(c, name), ((0, extra), (0, extra))))
+
+    # Updates the counters with one trace; only the activities of the trace are touched
+    def add_trace(self, labels, weight=1.0):
+        self._grow(labels)
+        c = self.counters
+        c.n_traces += weight
+        if not labels:
+            return
+
+        ids = np.array([c.index[label] for label in labels], dtype=np.int64)
+        acts, first, count = np.unique(ids, return_index=True, return_counts=True)
+        _, rev_first = np.unique(ids[::-1], return_index=True)
+        last = len(ids) - 1 - rev_first
+
+        c.present[acts] += weight
+        c.once[acts[count == 1]] += weight
+        c.multi[acts[count > 1]] += weight
+
+        # [a, b] entries over the activities of the trace
+        pairs = np.ix_(acts, acts)
+        after_last = last[None, :] > last[:, None]
+        after_first = first[None, :] > first[:, None]
+        c.both[pairs] += weight
+        c.resp[pairs] += weight * after_last
+        c.prec[pairs] += weight * after_first
+        c.succ[pairs] += weight * (after_last & after_first)
+
+        # Chain: every a of the trace is immediately followed by b
+        if len(ids) > 1:
+            steps, n_steps = np.unique(np.stack([ids[:-1], ids[1:]]), axis=1, return_counts=True)
+            occurrences = dict(zip(acts, count))
+            for (a, b), n in zip(steps.T, n_steps):
+                if n == occurrences[a]:
+                    c.chain[a, b] += weight
+
+    # Adds every trace of an XES log (compressed variants count with their multiplicity)
+    def add_xes(self, input_xes, keys=("concept:name",)):
+        n = 0
+        for attrs, labels in iter_xes_traces(input_xes, keys):
+            self.add_trace(labels, float(attrs.get(VARIANT_COUNT_KEY) or 1))
+            n += 1
+        return n
+
+    # Adds the plan files of plans_dir not seen yet: returns the number of new traces.
+    # Only finished plans are read (never the search folders), so a plan is seen once, by its final path
+    def add_plans(self, plans_dir, actions_def, skip_duplicates=False):
+        added = 0
+        for root, dirs, files in os.walk(plans_dir):
+            dirs[:] = sorted(d for d in dirs if not SEARCH_DIR.fullmatch(d))
+            for file in sorted(files):
+                plan_path = os.path.join(root, file)
+                # Same plan files as generate_event_log
+                if "plan" not in file.lower() or plan_path in self.seen_files:
+                    continue
+
+                with open(plan_path, "rb") as f:
+                    content = f.read()
+                self.seen_files.add(plan_path)
+
+                # Same criterion as removeDuplicatePlans: identical file contents
+                digest = hashlib.sha256(content).hexdigest()
+                if skip_duplicates and digest in self.seen_hashes:
+                    continue
+                self.seen_hashes.add(digest)
+
+                labels = []
+                for line in content.decode("utf-8").splitlines():
+                    line = line.strip()
+                    if not line or line.startswith(";"):
+                        continue
+                    labels.append(parse_plan_line(line, actions_def)["activity"])
+
+                self.add_trace(labels)
+                added += 1
+
+        return added
+
+    # Current constraint set
+    def constraints(self, minerful_conf):
+        return select_constraints(
+            self.counters,
+            minerful_conf["support"],
+            minerful_conf["confidence"],
+            minerful_conf["coverage"],
+            minerful_conf.get("pruning_strategy", "hierarchy"),
+        )
+
+    def write(self, output_csv, output_json, minerful_conf):
+        rows = self.constraints(minerful_conf)
+        write_constraints_csv(rows, output_csv)
+        write_constraints_json(rows, self.counters.activities, output_json)
+        return rows
+
+    # State file: counter arrays (.npz) plus a JSON sidecar with alphabet and seen plans
+    def save(self, path):
+        c = self.counters
+        np.savez_compressed(
+            path,
+            n_traces=np.array(c.n_traces),
+            **{name: getattr(c, name) for name in COUNTER_VECTORS + COUNTER_MATRICES}
+        )
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "activities": c.activities,
+                "seen_files": sorted(self.seen_files),
+                "seen_hashes": sorted(self.seen_hashes),
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        miner = cls()
+        with open(f"{path}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        c = DeclareCounters(meta["activities"])
+        with np.load(path) as data:
+            c.n_traces = float(data["n_traces"])
+            for name in COUNTER_VECTORS + COUNTER_MATRICES:
+                setattr(c, name, data[name])
+
+        miner.counters = c
+        miner.seen_files = set(meta["seen_files"])
+        miner.seen_hashes = set(meta["seen_hashes"])
+        return miner
@@ -0,0 +1,193 @@
+import re
+
+# Minimal PDDL reader/writer: a file is read as nested lists of lowercase symbols (comments
+# are dropped, PDDL is case-insensitive) and written back with one section per line.
+# Files can also be tokenized as a stream with character offsets, so that top-level sections
+# are located and replaced (splice_sections) keeping the rest of the file untouched.
+
+TOKEN_RE = re.compile(r";[^\n]*|\(|\)|[^\s();]+")
+CHUNK_SIZE = 1 << 16
+
+
+# Yields (token, start, end) from a text stream, reading it in chunks; comments are tokens too
+def iter_tokens(f, chunk_size=CHUNK_SIZE):
+    buf, offset = "", 0
+    while True:
+        chunk = f.read(chunk_size)
+        buf += chunk
+        keep = len(buf)
+        for m in TOKEN_RE.finditer(buf):
+            tok = m.group()
+            # A symbol or comment reaching the end of the buffer may go on in the next chunk
+            if chunk and m.end() == len(buf) and tok not in ("(", ")"):
+                keep = m.start()
+                break
+            yield tok, offset + m.start(), offset + m.end()
+        offset += keep
+        buf = buf[keep:]
+        if not chunk:
+            return
+
+# Top-level expressions of a token stream as nested lists (symbols lowercased unless lower=False)
+def parse_expressions(tokens, lower=True):
+    stack = [[]]
+    for tok in tokens:
+        if tok.startswith(";"):
+            continue
+        if tok == "(":
+            stack.append([])
+        elif tok == ")":
+            if len(stack) == 1:
+                raise ValueError("Unbalanced ')'")
+            expr = stack.pop()
+            stack[-1].append(expr)
+        else:
+            stack[-1].append(tok.lower() if lower else tok)
+
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '('")
+    return stack[0]
+
+def parse_tokens(tokens):
+    try:
+        exprs = parse_expressions(tokens)
+    except ValueError as e:
+        raise ValueError(f"{e} in PDDL") from None
+    if len(exprs) != 1:
+        raise ValueError(f"Expected one (define ...) expression, found {len(exprs)}")
+    return exprs[0]
+
+def parse_pddl(text):
+    return parse_tokens(TOKEN_RE.findall(text))
+
+def read_pddl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_tokens(tok for tok, _, _ in iter_tokens(f))
+
+# Top-level sections of the (define ...) expression from a token stream:
+# returns ([(keyword, start, end)], offset of the closing parenthesis of the define)
+def scan_sections(tokens):
+    depth, found, close = 0, [], None
+    start = head = None
+    after_open = False
+    for tok, s, e in tokens:
+        if tok.startswith(";"):
+            continue
+        if tok == "(":
+            depth += 1
+            if depth == 2:
+                start, head = s, None
+        elif tok == ")":
+            if depth == 0:
+                raise ValueError("Unbalanced ')' in PDDL")
+            if depth == 2:
+                found.append((head, start, e))
+            elif depth == 1:
+                close = s
+            depth -= 1
+        elif depth == 2 and after_open:
+            head = tok.lower()
+        after_open = tok == "("
+
+    if depth:
+        raise ValueError("Unbalanced '(' in PDDL")
+    return found, close
+
+def scan_pddl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return scan_sections(iter_tokens(f))
+
+def copy_chars(src, out, n):
+    while n > 0:
+        chunk = src.read(min(n, CHUNK_SIZE))
+        if not chunk:
+            break
+        out.write(chunk)
+        n -= len(chunk)
+
+# Copies a PDDL file removing every top-level section with the given keyword and inserting
+# `block` (text) before the end of the (define ...); the rest of the file is kept as it is
+def splice_sections(input_path, output_path, keyword, block=None):
+    found, close = scan_pddl(input_path)
+    if close is None:
+        raise ValueError(f"No (define ...) expression in {input_path}")
+
+    cuts = [(s, e) for head, s, e in found if head == keyword]
+    with open(input_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+        pos = 0
+        for s, e in cuts + [(close, close)]:
+            copy_chars(src, out, s - pos)
+            src.read(e - s)
+            pos = e
+        if block:
+            out.write(f"\n\n    {block}\n")
+        copy_chars(src, out, float("inf"))
+
+# Sections of a (define ...) expression with the given keyword, e.g. ":action"
+def sections(define, keyword):
+    return [s for s in define if isinstance(s, list) and s and s[0] == keyword]
+
+def section(define, keyword):
+    found = sections(define, keyword)
+    return found[0] if found else None
+
+# Value following a keyword inside a section, e.g. (:action a :effect X) -> X
+def keyword_value(expr, keyword):
+    for i, item in enumerate(expr[:-1]):
+        if item == keyword:
+            return expr[i + 1]
+    return None
+
+def set_keyword_value(expr, keyword, value, before=None):
+    for i, item in enumerate(expr[:-1]):
+        if item == keyword:
+            expr[i + 1] = value
+            return
+    # Missing keyword: inserted before `before` if present, at the end otherwise
+    at = expr.index(before) if before in expr else len(expr)
+    expr[at:at] = [keyword, value]
+
+# Conjunction of a formula with extra conditions, without nesting (and ...) blocks
+def conjoin(formula, extra):
+    if not extra:
+        return formula
+    if not formula:
+        parts = []
+    elif formula[0] == "and":
+        parts = formula[1:]
+    else:
+        parts = [formula]
+    return ["and", *parts, *extra]
+
+
+def to_text(expr, indent=0, width=100):
+    if not isinstance(expr, list):
+        return expr
+    flat = "(" + " ".join(to_text(e) for e in expr) + ")"
+    if len(flat) + indent <= width or len(expr) < 2:
+        return flat
+
+    # Children on their own lines; a keyword stays on the line of its value
+    pad = " " * (indent + 2)
+    head = to_text(expr[0])
+    lines, i = [], 1
+    # Action names stay on the line of their keyword
+    if head in (":action", ":durative-action") and isinstance(expr[1], str):
+        head, i = f"{head} {expr[1]}", 2
+    while i < len(expr):
+        item = expr[i]
+        if isinstance(item, str) and item.startswith(":") and i + 1 < len(expr):
+            value = to_text(expr[i + 1], indent + 3 + len(item), width)
+            lines.append(f"{pad}{item} {value}")
+            i += 2
+        else:
+            lines.append(pad + to_text(item, indent + 2, width))
+            i += 1
+    return f"({head}\n" + "\n".join(lines) + ")"
+
+def write_pddl(expr, path):
+    # Top-level sections are separated by a blank line
+    head = " ".join(to_text(e) for e in expr[:2])
+    body = "\n\n".join(to_text(e) for e in expr[2:])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"({head}\n\n{body}\n)\n")
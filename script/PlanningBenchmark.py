@@ -0,0 +1,181 @@
+import os
+import re
+import csv
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from script.TCCompiler import compile_counts
+from script.GeneralCreationPlan import search_command, run_search
+
+# Planning benchmark: every configured search command is run on each problem twice, on the
+# original domain/problem and on its constraint-compiled version (script/TCCompiler.py), and
+# search time, expanded states and plan cost are compared.
+
+RUN_FIELDS = ["problem", "command", "variant", "solved", "exit_code", "wall_time", "search_time", "expanded", "plan_cost"]
+SUMMARY_FIELDS = [
+    "problem", "command",
+    "baseline_solved", "constrained_solved",
+    "baseline_search_time", "constrained_search_time", "speedup",
+    "baseline_expanded", "constrained_expanded", "expansion_ratio",
+    "baseline_plan_cost", "constrained_plan_cost",
+]
+
+
+# Statistics of a Fast Downward run from its output; anytime aliases run several searches,
+# so times and expansions are summed and the lowest plan cost is kept
+def parse_search_output(text):
+    search_times = [float(t) for t in re.findall(r"Search time:\s*([\d.]+)s", text)]
+    expanded = [int(n) for n in re.findall(r"Expanded (\d+) state\(s\)\.", text)]
+    costs = [int(c) for c in re.findall(r"Plan cost:\s*(\d+)", text)]
+    return {
+        "solved": "Solution found" in text or bool(costs),
+        "search_time": sum(search_times) if search_times else None,
+        "expanded": sum(expanded) if expanded else None,
+        "plan_cost": min(costs) if costs else None,
+    }
+
+# Runs one command on one domain/problem pair inside run_dir; returns a RUN_FIELDS row
+def run_benchmark(problem_name, variant, domain, problem, run_dir, cmd_idx, cmd_str,
+                  fast_downward_path, time_limit_alias, time_limit_non_alias):
+    os.makedirs(run_dir, exist_ok=True)
+    domain_abs = os.path.abspath(domain)
+    problem_abs = os.path.abspath(problem)
+
+    # Same command layout and timeout handling as the planning stage, with translation included
+    cmd_parts, timeout = search_command(fast_downward_path, cmd_str, [domain_abs, problem_abs],
+                                        time_limit_alias, time_limit_non_alias)
+
+    start = time.perf_counter()
+    exit_code, output = run_search(cmd_parts, run_dir, timeout)
+    wall_time = time.perf_counter() - start
+
+    with open(os.path.join(run_dir, "output.log"), "w", encoding="utf-8") as f:
+        f.write(output)
+
+    stats = parse_search_output(output)
+    print(f"[BENCHMARK] {problem_name} / CMD {cmd_idx} / {variant}: "
+          f"{'solved' if stats['solved'] else 'not solved'} in {wall_time:.2f} sec")
+    return {
+        "problem": problem_name,
+        "command": cmd_str,
+        "variant": variant,
+        "exit_code": exit_code,
+        "wall_time": round(wall_time, 4),
+        **stats,
+    }
+
+
+def ratio(a, b):
+    if a is None or b is None or not b:
+        return None
+    return a / b
+
+def geometric_mean(values):
+    values = [v for v in values if v]
+    return math.exp(sum(math.log(v) for v in values) / len(values)) if values else None
+
+# Per (problem, command) comparison of the baseline and constrained runs
+def summarize(rows):
+    runs = {(r["problem"], r["command"], r["variant"]): r for r in rows}
+    summary = []
+    for problem, command in dict.fromkeys((r["problem"], r["command"]) for r in rows):
+        base = runs.get((problem, command, "baseline"), {})
+        cons = runs.get((problem, command, "constrained"), {})
+        # Search time when Fast Downward reports it, wall time otherwise
+        base_time = base.get("search_time") if base.get("search_time") is not None else base.get("wall_time")
+        cons_time = cons.get("search_time") if cons.get("search_time") is not None else cons.get("wall_time")
+        both = base.get("solved") and cons.get("solved")
+        summary.append({
+            "problem": problem,
+            "command": command,
+            "baseline_solved": base.get("solved"),
+            "constrained_solved": cons.get("solved"),
+            "baseline_search_time": base_time,
+            "constrained_search_time": cons_time,
+            "speedup": ratio(base_time, cons_time) if both else None,
+            "baseline_expanded": base.get("expanded"),
+            "constrained_expanded": cons.get("expanded"),
+            "expansion_ratio": ratio(base.get("expanded"), cons.get("expanded")) if both else None,
+            "baseline_plan_cost": base.get("plan_cost"),
+            "constrained_plan_cost": cons.get("plan_cost"),
+        })
+    return summary
+
+
+# Benchmarks the original problems against the compiled ones (same file names in strips_dir).
+# Writes benchmark_runs.csv and benchmark_summary.csv to output_dir; returns the summary CSV,
+# or None when no constraint was compiled (both variants would be the same problems)
+def benchmarkPlanning(domain_file, problems_dir, strips_domain, strips_dir, output_dir,
+                      fast_downward_path, planning_conf, benchmark_conf=None):
+    benchmark_conf = benchmark_conf or {}
+
+    compiled, skipped = compile_counts(strips_dir)
+    if not compiled:
+        print(f"[BENCHMARK WARNING] No constraint compiled in {strips_dir} ({skipped} skipped): "
+              f"no speedup to measure, benchmark skipped")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    commands = benchmark_conf.get("commands") or planning_conf["commands"]
+    run_alias = planning_conf.get("run_alias", True)
+    run_non_alias = planning_conf.get("run_non_alias", True)
+    max_workers = benchmark_conf.get("max_workers") or planning_conf.get("max_workers", 1)
+
+    # Problems that have a compiled version
+    problems = sorted(
+        f for f in os.listdir(strips_dir)
+        if f.endswith(".pddl") and "domain" not in f.lower() and os.path.exists(os.path.join(problems_dir, f))
+    )
+
+    jobs = []
+    for f in problems:
+        name = f.replace(".pddl", "")
+        for idx, cmd_str in enumerate(commands, 1):
+            is_alias = "--alias" in cmd_str
+            if (is_alias and not run_alias) or (not is_alias and not run_non_alias):
+                continue
+            for variant, domain, pdir in (("baseline", domain_file, problems_dir),
+                                          ("constrained", strips_domain, strips_dir)):
+                run_dir = os.path.join(output_dir, variant, name, f"cmd_{idx}")
+                jobs.append((name, variant, domain, os.path.join(pdir, f), run_dir, idx, cmd_str,
+                             fast_downward_path, planning_conf["time_limit_alias"],
+                             planning_conf["time_limit_non_alias"]))
+
+    print(f"[BENCHMARK] {len(problems)} problems, {len(jobs)} runs ({max_workers} workers)")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_benchmark, *job) for job in jobs]
+        rows = [f.result() for f in futures]
+
+    runs_csv = os.path.join(output_dir, "benchmark_runs.csv")
+    with open(runs_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RUN_FIELDS, delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    summary = summarize(rows)
+    speedups = [s["speedup"] for s in summary if s["speedup"] is not None]
+    expansion_ratios = [s["expansion_ratio"] for s in summary if s["expansion_ratio"] is not None]
+    aggregate = {
+        "problem": "ALL",
+        "command": "geometric mean",
+        "baseline_solved": sum(bool(s["baseline_solved"]) for s in summary),
+        "constrained_solved": sum(bool(s["constrained_solved"]) for s in summary),
+        "speedup": geometric_mean(speedups),
+        "expansion_ratio": geometric_mean(expansion_ratios),
+    }
+
+    summary_csv = os.path.join(output_dir, "benchmark_summary.csv")
+    with open(summary_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, delimiter=";")
+        writer.writeheader()
+        writer.writerows(summary)
+        writer.writerow(aggregate)
+
+    print(f"[BENCHMARK] Solved: {aggregate['baseline_solved']} baseline, "
+          f"{aggregate['constrained_solved']} constrained (of {len(summary)})")
+    if aggregate["speedup"] is not None:
+        print(f"[BENCHMARK] Speedup (geometric mean over {len(speedups)} pairs solved by both): "
+              f"{aggregate['speedup']:.2f}x, expansions ratio {aggregate['expansion_ratio'] or 0:.2f}x")
+    print(f"[BENCHMARK] Results saved to: {runs_csv}, {summary_csv}")
+    return summary_csv
@@ -1,7 +1,11 @@
 import csv
+import os
+import sys
 from pathlib import Path
-import re
+from functools import lru_cache
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from script.TC import parse_tc
 
 # Mapping semplice one-to-one
 TC_TO_DECLARE_SINGLE = {
@@ -12,36 +16,30 @@ TC_TO_DECLARE_SINGLE = {
     "always-next": "ChainResponse",
 }
 
-def parse_tc(tc):
-    tc = tc.strip()
-
-    m = re.match(r"\(sometime-after ([^\s\)]+) ([^\s\)]+)\)", tc)
-    if m:
-        return {"type": "sometime-after", "A": m.group(1), "B": m.group(2)}
-
-    m = re.match(r"\(sometime-before ([^\s\)]+) ([^\s\)]+)\)", tc)
-    if m:
-        return {"type": "sometime-before", "A": m.group(2), "B": m.group(1)}
-
-    m = re.match(r"\(sometime ([^\s\)]+)\)", tc)
-    if m:
-        return {"type": "sometime", "A": m.group(1), "B": ""}
-
-    m = re.match(r"\(at-most-once ([^\s\)]+)\)", tc)
-    if m:
-        return {"type": "at-most-once", "A": m.group(1), "B": ""}
-
-    m = re.match(r"\(always-next ([^\s\)]+) ([^\s\)]+)\)", tc)
-    if m:
-        return {"type": "always-next", "A": m.group(1), "B": m.group(2)}
-
-    m = re.match(r"\(sometime \(or ([^\s\)]+) ([^\s\)]+)\)\)", tc)
-    if m:
-        return {"type": "sometime-or", "A": m.group(1), "B": m.group(2)}
-
-    m = re.match(r"\(at-most-once \(or ([^\s\)]+) ([^\s\)]+)\)\)", tc)
-    if m:
-        return {"type": "at-most-once-or", "A": m.group(1), "B": m.group(2)}
+# (type, A, B) of a TC form, None for the forms without a Declare counterpart.
+# The same TC strings come back in every aggregation, so the result is cached and the
+# labels interned (equal activities share one string)
+@lru_cache(maxsize=None)
+def declare_form(tc):
+    try:
+        op, args = parse_tc(tc)
+    except ValueError as e:
+        print(f"[REVERSE WARNING] {e}, skipped")
+        return None
+
+    if len(args) == 2 and all(isinstance(a, str) for a in args):
+        A, B = sys.intern(args[0]), sys.intern(args[1])
+        if op in ("sometime-after", "always-next"):
+            return op, A, B
+        if op == "sometime-before":
+            return op, B, A
+
+    if len(args) == 1 and op in ("sometime", "at-most-once"):
+        arg = args[0]
+        if isinstance(arg, str):
+            return op, sys.intern(arg), ""
+        if len(arg) == 3 and arg[0] == "or":
+            return f"{op}-or", sys.intern(arg[1]), sys.intern(arg[2])
 
     return None
 
@@ -50,27 +48,22 @@ def tc_to_declare(tc_list):
     # Strutture per combinazioni
     unary = defaultdict(set)        # {A: set(["sometime","at-most-once"])}
     binary = defaultdict(set)       # {(A,B): set(["sometime-after","sometime-before"]) }
-    binary_or = {}                  # {(A,B): {"sometime-or": True, "at-most-once-or": True}}
+    binary_or = defaultdict(set)    # {(A,B): set(["sometime-or","at-most-once-or"])}
 
     # Prima pass: riempi le strutture
     for tc in tc_list:
-        parsed = parse_tc(tc)
+        parsed = declare_form(tc)
         if not parsed:
             continue
 
-        t = parsed["type"]
-        A = parsed["A"]
-        B = parsed["B"]
+        t, A, B = parsed
 
         if t in {"sometime", "at-most-once"}:
             unary[A].add(t)
         elif t in {"sometime-after", "sometime-before", "always-next"}:
             binary[(A,B)].add(t)
         elif t in {"sometime-or", "at-most-once-or"}:
-            key = tuple(sorted([A,B]))
-            if key not in binary_or:
-                binary_or[key] = {}
-            binary_or[key][t] = True
+            binary_or[(A,B) if A <= B else (B,A)].add(t)
 
     # Genera Declare vincoli singoli
     for (A,B), types in binary.items():
@@ -128,3 +121,20 @@ def apply_reverse_mapping(tc_csv_path, output_dir):
             writer.writerow(d)
 
     print(f"Reverse mapping completed: {output_csv.name}")
+    return output_csv
+
+# TC CSVs written by the TC stage (<stem>_tc.csv, minimized <stem>_tc_min.csv) under base_dir;
+# reports and other CSVs in the same folders are left out
+def find_tc_csvs(base_dir):
+    return sorted(
+        p for p in Path(base_dir).rglob("*.csv")
+        if p.stem.endswith(("_tc", "_tc_min")) and "recovered_declare" not in p.name
+    )
+
+# Reverse mapping of many TC CSVs, one process per file
+def reverse_map_all(tc_csv_paths, output_dir, max_workers=None):
+    if not tc_csv_paths:
+        return []
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(tc_csv_paths), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(apply_reverse_mapping, p, output_dir) for p in tc_csv_paths]
+        return [f.result() for f in futures]
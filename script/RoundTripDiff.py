@@ -0,0 +1,180 @@
+import os
+import re
+import csv
+import sys
+import argparse
+from functools import lru_cache
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from script.TC import clean_field, map_constraint, is_expressible
+
+# Round-trip check Declare -> TC -> Declare: the model recovered by the reverse mapping
+# (reverse_mapping/recovered_declare_<stem>_tc*.csv) is compared with the discovered one
+# (minerful/<stem>_minerful.csv). Both are loaded as sets of (template, activation, target)
+# and, per template, constraints are counted as
+#   kept           in both models
+#   changed        the same activities are constrained under another template (e.g. Response +
+#                  Precedence recovered as Succession)
+#   unexpressible  lost because script/TC.py has no TC form for them
+#   lost           lost otherwise (e.g. removed by the TC minimization)
+#   gained         recovered on activities the discovered model does not constrain
+
+SUMMARY_FIELDS = ["run", "model", "template", "original", "recovered", "kept", "changed", "unexpressible", "lost", "gained"]
+DETAIL_FIELDS = ["run", "model", "status", "template", "activation", "target", "other_templates"]
+
+# Template names with the same meaning are compared as one
+TEMPLATE_ALIASES = {
+    "Participation": "AtLeast1",
+    "Existence": "AtLeast1",
+    "AtLeastOnce": "AtLeast1",
+    "AtLeastOne": "AtLeast1",
+    "Existence(1)": "AtLeast1",
+    "AtMost1": "AtMostOnce",
+}
+# Templates whose activities can be swapped
+SYMMETRIC = {"Choice", "ExclusiveChoice", "CoExistence", "NotCoExistence"}
+
+
+# The same constraints come back in every run and repeat, so keys are cached
+@lru_cache(maxsize=None)
+def constraint_key(template, activation, target):
+    template = TEMPLATE_ALIASES.get(template, template)
+    a, b = sys.intern(clean_field(activation)), sys.intern(clean_field(target))
+    if template in SYMMETRIC and b < a:
+        a, b = b, a
+    return sys.intern(template), a, b
+
+# Declare model of a CSV with Template/Activation/Target columns (MINERful or recovered)
+def load_model(csv_path):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=";", quotechar="'")
+        header = next(reader, [])
+        if "Template" not in header:
+            return set()
+        it = header.index("Template")
+        ia = header.index("Activation") if "Activation" in header else None
+        ib = header.index("Target") if "Target" in header else None
+        return {
+            constraint_key(row[it], row[ia] if ia is not None else "", row[ib] if ib is not None and ib < len(row) else "")
+            for row in reader if len(row) > it and row[it]
+        }
+
+# Whether script/TC.py maps the template to some TC form (it depends on the template only)
+@lru_cache(maxsize=None)
+def has_tc_form(template, binary):
+    return any(is_expressible(tc) for tc in map_constraint(template, "a", "b" if binary else ""))
+
+def diff_models(original, recovered):
+    by_pair_original = {}
+    by_pair_recovered = {}
+    for t, a, b in original:
+        by_pair_original.setdefault((a, b), set()).add(t)
+    for t, a, b in recovered:
+        by_pair_recovered.setdefault((a, b), set()).add(t)
+
+    counts = Counter()
+    details = []
+    def count(template, field):
+        counts[template, field] += 1
+
+    for key in sorted(original):
+        t, a, b = key
+        count(t, "original")
+        if key in recovered:
+            count(t, "kept")
+            continue
+        others = by_pair_recovered.get((a, b))
+        if others:
+            status = "changed"
+        elif not has_tc_form(t, bool(b)):
+            status = "unexpressible"
+        else:
+            status = "lost"
+        count(t, status)
+        details.append({"status": status, "template": t, "activation": a, "target": b,
+                        "other_templates": " ".join(sorted(others or ()))})
+
+    for key in sorted(recovered):
+        t, a, b = key
+        count(t, "recovered")
+        if key not in original and (a, b) not in by_pair_original:
+            count(t, "gained")
+            details.append({"status": "gained", "template": t, "activation": a, "target": b, "other_templates": ""})
+
+    summary = [
+        {"template": t, **{f: counts[t, f] for f in SUMMARY_FIELDS[3:]}}
+        for t in sorted({t for t, _ in counts})
+    ]
+    return summary, details
+
+# Summary and detail rows of one (original, recovered) pair, labelled with run and model
+def diffRoundTrip(original_csv, recovered_csv, run="", model=""):
+    summary, details = diff_models(load_model(original_csv), load_model(recovered_csv))
+    label = {"run": run, "model": model}
+    return [{**label, **r} for r in summary], [{**label, **r} for r in details]
+
+
+# (run dir, model, original CSV, recovered CSV) of every run under root: a run is a folder
+# with a reverse_mapping/ subfolder next to minerful/
+def find_round_trips(root):
+    pairs = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        if os.path.basename(dirpath) != "reverse_mapping":
+            continue
+        run_dir = os.path.dirname(dirpath)
+        for file in sorted(files):
+            m = re.fullmatch(r"recovered_declare_(.+)_tc(_min)?\.csv", file)
+            if not m:
+                continue
+            original = os.path.join(run_dir, "minerful", f"{m.group(1)}_minerful.csv")
+            if os.path.exists(original):
+                model = file[len("recovered_declare_"):-len(".csv")]
+                pairs.append((run_dir, model, original, os.path.join(dirpath, file)))
+    return pairs
+
+# Diffs every pair in a process pool; writes roundtrip_summary.csv (per template, plus the
+# TOTAL of each pair) and roundtrip_details.csv (every constraint not kept) to output_dir
+def diffAll(pairs, output_dir, max_workers=None):
+    os.makedirs(output_dir, exist_ok=True)
+    summary_csv = os.path.join(output_dir, "roundtrip_summary.csv")
+    details_csv = os.path.join(output_dir, "roundtrip_details.csv")
+
+    totals = Counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+         open(summary_csv, "w", newline="", encoding="utf-8") as fs, \
+         open(details_csv, "w", newline="", encoding="utf-8") as fd:
+        summary_writer = csv.DictWriter(fs, fieldnames=SUMMARY_FIELDS, delimiter=";")
+        details_writer = csv.DictWriter(fd, fieldnames=DETAIL_FIELDS, delimiter=";")
+        summary_writer.writeheader()
+        details_writer.writeheader()
+
+        # Small chunks of pairs per task: thousands of files without one task each
+        chunksize = max(1, len(pairs) // (4 * (max_workers or os.cpu_count() or 1)))
+        jobs = [(original, recovered, run, model) for run, model, original, recovered in pairs]
+        results = executor.map(diffRoundTrip, *zip(*jobs), chunksize=chunksize) if jobs else []
+        for summary, details in results:
+            pair_total = Counter()
+            for row in summary:
+                pair_total.update({f: row[f] for f in SUMMARY_FIELDS[3:]})
+            summary_writer.writerows(summary)
+            if summary:
+                summary_writer.writerow({"run": summary[0]["run"], "model": summary[0]["model"],
+                                         "template": "TOTAL", **pair_total})
+            details_writer.writerows(details)
+            totals.update(pair_total)
+
+    print(f"[ROUNDTRIP] {len(pairs)} models: {totals['original']} discovered constraints, "
+          f"{totals['kept']} kept, {totals['changed']} changed, {totals['unexpressible']} unexpressible, "
+          f"{totals['lost']} lost, {totals['gained']} gained")
+    print(f"[ROUNDTRIP] Reports saved to: {summary_csv}, {details_csv}")
+    return summary_csv, details_csv
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare recovered Declare models with the discovered ones")
+    parser.add_argument("root", help="Results folder (e.g. results/ or results/<exp>/run_1)")
+    parser.add_argument("-o", "--output-dir", default=None, help="Report folder (default: root)")
+    parser.add_argument("-j", "--max-workers", type=int, default=None)
+    args = parser.parse_args()
+    diffAll(find_round_trips(args.root), args.output_dir or args.root, args.max_workers)
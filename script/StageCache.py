@@ -0,0 +1,172 @@
+import os
+import json
+import hashlib
+import inspect
+from pandas.util import hash_pandas_object
+
+# Make-style incremental re-execution: every stage records in <run_dir>/.stages/<stage>.json
+# the fingerprint of what it depends on, i.e. the contents of its input files and folders, its
+# configuration section, the source of the modules implementing it and the source of the stage
+# code calling the cache (the pipeline function in main.py), together with the result
+# it produced. When the pipeline runs again in the same run folder, a stage whose fingerprint is
+# unchanged and whose outputs still exist is skipped and its recorded result reused.
+# Inputs are hashed by content, so a stage that runs again and writes identical files does not
+# invalidate the stages after it: only what is downstream of a real change is recomputed.
+
+MANIFEST_DIR = ".stages"
+
+# Content hashes of the files seen by this process, keyed by (path, size, mtime)
+_file_hashes = {}
+
+
+def file_hash(path):
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _file_hashes:
+        hasher = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+        _file_hashes[key] = hasher.hexdigest()
+    return _file_hashes[key]
+
+# Hash of a file, or of the names and contents of every file under a folder
+def path_hash(path):
+    if os.path.isfile(path):
+        return file_hash(path)
+    if not os.path.isdir(path):
+        return "missing"
+    hasher = hashlib.sha1()
+    for dirpath, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != MANIFEST_DIR)
+        for file in sorted(files):
+            full = os.path.join(dirpath, file)
+            hasher.update(os.path.relpath(full, path).encode("utf-8"))
+            hasher.update(file_hash(full).encode("ascii"))
+    return hasher.hexdigest()
+
+# Source files of the module defining obj and of the modules of the same package it uses
+def code_sources(obj, sources):
+    module = inspect.getmodule(obj)
+    source = inspect.getsourcefile(module)
+    if source in sources:
+        return
+    sources.add(source)
+    package = module.__name__.split(".")[0]
+    for value in vars(module).values():
+        if inspect.isfunction(value) or inspect.isclass(value) or inspect.ismodule(value):
+            dep = inspect.getmodule(value)
+            if dep is not None and dep.__name__.split(".")[0] == package and hasattr(dep, "__file__"):
+                code_sources(dep, sources)
+
+# Version of the code of a stage: hash of the sources of the given functions and their dependencies
+def code_version(*objects):
+    sources = set()
+    for o in objects:
+        code_sources(o, sources)
+    hasher = hashlib.sha1()
+    for source in sorted(sources):
+        hasher.update(file_hash(source).encode("ascii"))
+    return hasher.hexdigest()
+
+# Hash of the source of a function (code object): the stage code itself, which lives outside
+# the script package. Without its source the whole file is hashed
+def caller_hash(code):
+    try:
+        return hashlib.sha1(inspect.getsource(code).encode("utf-8")).hexdigest()
+    except (OSError, TypeError):
+        return file_hash(code.co_filename) if os.path.isfile(code.co_filename) else "unknown"
+
+# Hash of an event log kept in memory (script/EventLogFrame.py) instead of its CSV
+def frame_hash(df):
+    hasher = hashlib.sha1("\t".join(map(str, df.columns)).encode("utf-8"))
+    hasher.update(hash_pandas_object(df, index=False).values.tobytes())
+    return hasher.hexdigest()
+
+def config_hash(conf):
+    return hashlib.sha1(json.dumps(conf, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def fingerprint(inputs, conf, code, frames=None, caller=None):
+    frames = frames or {}
+    version = code_version(*code)
+    if caller is not None:
+        version = hashlib.sha1(f"{version} {caller_hash(caller)}".encode("ascii")).hexdigest()
+    return {
+        "inputs": {str(p): frame_hash(frames[str(p)]) if str(p) in frames else path_hash(str(p))
+                   for p in inputs if p},
+        "config": config_hash(conf),
+        "code": version,
+    }
+
+
+class StageCache:
+    # frames: logs kept in memory, by the CSV path they stand for (hashed by content instead)
+    def __init__(self, run_dir, conf=None, frames=None):
+        conf = conf or {}
+        self.enabled = conf.get("enabled", False)
+        # Stages recomputed even when unchanged
+        self.force = set(conf.get("force") or [])
+        self.dir = os.path.join(run_dir, MANIFEST_DIR)
+        self.pending = {}
+        self.frames = frames if frames is not None else {}
+
+    def manifest_path(self, stage):
+        return os.path.join(self.dir, f"{stage}.json")
+
+    # The recorded manifest ("result", "outputs", ...) when the stage can be skipped, None when
+    # it must run. The fingerprint is taken now, before the stage modifies anything.
+    # caller: code object of the stage body, by default the function calling lookup
+    def lookup(self, stage, inputs=(), conf=None, code=(), caller=None):
+        if not self.enabled:
+            return None
+        caller = caller or inspect.currentframe().f_back.f_code
+        current = fingerprint(inputs, conf, code, self.frames, caller)
+
+        try:
+            with open(self.manifest_path(stage), encoding="utf-8") as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            old = None
+
+        if old is None:
+            reasons = ["no previous run"]
+        elif stage in self.force:
+            reasons = ["forced"]
+        else:
+            reasons = [part for part in ("config", "code") if old.get(part) != current[part]]
+            reasons += [f"input {p}" for p in sorted(set(old.get("inputs", {})) | set(current["inputs"]))
+                        if old.get("inputs", {}).get(p) != current["inputs"].get(p)]
+            reasons += [f"missing output {p}" for p in old.get("outputs", []) if not os.path.exists(p)]
+
+        if reasons:
+            print(f"[INCREMENTAL] {stage}: running ({', '.join(reasons[:3])}"
+                  f"{', ...' if len(reasons) > 3 else ''})")
+            # A run interrupted halfway must not leave a manifest claiming the old outputs
+            if old is not None:
+                os.remove(self.manifest_path(stage))
+            self.pending[stage] = current
+            return None
+
+        print(f"[INCREMENTAL] {stage}: unchanged, reusing its outputs")
+        return old
+
+    # Saves the manifest of a stage that has just run (nothing when it was reused);
+    # result must be JSON serializable. rewritten: inputs the stage changed in place, fingerprinted
+    # again as the stage left them (otherwise the next run would always find them changed)
+    def record(self, stage, result=None, outputs=(), rewritten=()):
+        if not self.enabled or stage not in self.pending:
+            return
+        current = self.pending.pop(stage)
+        for p in rewritten:
+            current["inputs"][str(p)] = path_hash(str(p))
+        os.makedirs(self.dir, exist_ok=True)
+        manifest = {
+            "stage": stage,
+            **current,
+            "outputs": [str(p) for p in outputs if p],
+            "result": result,
+        }
+        tmp = self.manifest_path(stage) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path(stage))
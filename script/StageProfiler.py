@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import resource
+import threading
+import tracemalloc
+import weakref
+
+# Resource profile of every stage and sub-task of a run, written to <run_dir>/profile.json next to
+# timings.csv: wall and CPU time (this process and its finished children: Fast Downward, java,
+# worker pools), peak RSS of the whole process tree, bytes read and written (/proc/self/io, which
+# includes children once they have exited) and the rows/traces each stage takes and produces.
+# The counters are process-wide, so stages running at the same time (the post-TC stages of the
+# scheduler) overlap. cProfile and tracemalloc captures of the top-level stages are optional.
+
+PROFILE_FIELDS = [
+    "stage", "wall_s", "cpu_s", "children_cpu_s", "peak_rss_mb", "children_peak_rss_mb",
+    "bytes_read", "bytes_written", "rows_in", "rows_out", "traces_in", "traces_out"
+]
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rusage():
+    me = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux
+    return (me.ru_utime + me.ru_stime, children.ru_utime + children.ru_stime,
+            me.ru_maxrss / 1024, children.ru_maxrss / 1024)
+
+# Bytes read and written by this process (None where /proc is not available)
+def read_io():
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def child_pids(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return children
+
+# Current RSS of a process and all its descendants, in MB
+def tree_rss_mb(pid=None):
+    total = 0
+    stack = [pid or os.getpid()]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/statm") as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+        stack.extend(child_pids(p))
+    return total / 2**20
+
+# Data rows of a CSV file (header excluded)
+def count_rows(csv_path):
+    if not csv_path or not os.path.exists(csv_path):
+        return None
+    with open(csv_path, "rb") as f:
+        return max(0, sum(1 for line in f if line.strip()) - 1)
+
+def delta(end, start):
+    return end - start if end is not None and start is not None else None
+
+
+# Samples the RSS of the process tree while stages are open; holds only a weak reference, so the
+# thread ends with the profiler even if a failed stage was never stopped
+def sample_loop(ref):
+    while True:
+        profiler = ref()
+        if profiler is None:
+            return
+        rss = tree_rss_mb()
+        with profiler.lock:
+            if not profiler.open:
+                profiler.sampler = None
+                return
+            for record in profiler.open:
+                record.peak = max(record.peak, rss)
+        interval = profiler.interval
+        del profiler
+        time.sleep(interval)
+
+
+class StageRecord:
+    def __init__(self, stage, counts):
+        self.fields = {"stage": stage, **counts}
+        self.top_level = "/" not in stage
+        self.t0 = time.perf_counter()
+        self.cpu, self.children_cpu, self.maxrss, self.children_maxrss = rusage()
+        self.read, self.written = read_io()
+        self.peak = tree_rss_mb()
+        self.cprofile = None
+        self.snapshot = None
+
+
+class StageProfiler:
+    def __init__(self, run_dir, conf=None):
+        conf = conf or {}
+        self.enabled = conf.get("enabled", False)
+        self.use_cprofile = conf.get("cprofile", False)
+        self.use_tracemalloc = conf.get("tracemalloc", False)
+        self.interval = conf.get("sample_interval", 0.1)
+        self.top = conf.get("top", 15)
+        self.profile_dir = os.path.join(run_dir, "profile")
+        self.records = []
+        self.open = []
+        self.lock = threading.Lock()
+        self.sampler = None
+
+    # Opens the record of a stage ("stage/sub-task" for sub-tasks); counts are rows_in, traces_in, ...
+    def start(self, stage, **counts):
+        if not self.enabled:
+            return None
+        record = StageRecord(stage, counts)
+
+        if record.top_level and self.use_cprofile:
+            record.cprofile = cProfile.Profile()
+            try:
+                record.cprofile.enable()
+            except ValueError:
+                # Another stage is being profiled in a concurrent thread
+                record.cprofile = None
+        if record.top_level and self.use_tracemalloc:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            record.snapshot = tracemalloc.take_snapshot()
+
+        with self.lock:
+            self.open.append(record)
+            self.records.append(record.fields)
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=sample_loop, args=(weakref.ref(self),), daemon=True)
+                self.sampler.start()
+        return record
+
+    def stop(self, record, **counts):
+        if record is None:
+            return
+        wall = time.perf_counter() - record.t0
+        cpu, children_cpu, maxrss, children_maxrss = rusage()
+        read, written = read_io()
+        with self.lock:
+            self.open.remove(record)
+        peak = max(record.peak, tree_rss_mb())
+        # Processes too short for the sampler still raise the lifetime maxima
+        if maxrss > record.maxrss:
+            peak = max(peak, maxrss)
+        children_peak = children_maxrss if children_maxrss > record.children_maxrss else None
+
+        record.fields.update({
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu - record.cpu, 4),
+            "children_cpu_s": round(children_cpu - record.children_cpu, 4),
+            "peak_rss_mb": round(max(peak, children_peak or 0), 1),
+            "children_peak_rss_mb": round(children_peak, 1) if children_peak is not None else None,
+            "bytes_read": delta(read, record.read),
+            "bytes_written": delta(written, record.written),
+            **counts,
+        })
+
+        if record.cprofile is not None:
+            record.cprofile.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            prof_file = os.path.join(self.profile_dir, f"{record.fields['stage']}.prof")
+            record.cprofile.dump_stats(prof_file)
+            stats = pstats.Stats(record.cprofile).stats
+            slowest = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+            record.fields["cprofile"] = prof_file
+            record.fields["top_functions"] = [
+                {"function": f"{file}:{line}({name})", "calls": nc, "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)}
+                for (file, line, name), (cc, nc, tt, ct, callers) in slowest
+            ]
+
+        if record.snapshot is not None:
+            current, traced_peak = tracemalloc.get_traced_memory()
+            growth = tracemalloc.take_snapshot().compare_to(record.snapshot, "lineno")[:self.top]
+            record.fields["tracemalloc_peak_mb"] = round(traced_peak / 2**20, 1)
+            record.fields["top_allocations"] = [
+                {"location": str(stat.traceback), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                for stat in growth
+            ]
+            record.snapshot = None
+            # Tracing slows everything down: only while a top-level stage needs it
+            with self.lock:
+                tracing = any(r.snapshot is not None for r in self.open)
+            if not tracing:
+                tracemalloc.stop()
+
+    # Record of a sub-task measured elsewhere (e.g. the per-job stats of the MINERful scheduler)
+    def add(self, stage, **fields):
+        if self.enabled:
+            self.records.append({"stage": stage, **fields})
+
+    def write(self, json_path):
+        if not self.enabled:
+            return None
+        stages = [{k: fields.get(k) for k in PROFILE_FIELDS} | fields for fields in self.records]
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"stages": stages}, f, indent=2)
+        print(f"[PROFILE] {len(stages)} stage records saved to: {json_path}")
+        return json_path
@@ -0,0 +1,110 @@
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Dependency-graph scheduler: each task declares the tasks it needs and the CPUs and memory it
+# takes; the ready tasks are started as long as they fit in the budget (a task larger than the
+# whole budget runs alone). The tasks depending on a failed one are skipped.
+# Threads suit tasks that mostly wait on subprocesses; processes (picklable module functions
+# only) suit tasks doing their own heavy Python work.
+
+
+class Task:
+    def __init__(self, name, fn, args=(), kwargs=None, deps=(), cpus=1, memory_mb=0):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.deps = list(deps)
+        self.cpus = max(1, int(cpus or 1))
+        self.memory_mb = int(memory_mb or 0)
+
+
+class TaskResult:
+    def __init__(self, status, result=None, error=None, elapsed=0.0):
+        self.status = status            # done, failed, skipped
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+
+def check_graph(tasks):
+    names = {t.name for t in tasks}
+    if len(names) != len(tasks):
+        raise ValueError("Duplicate task names in the stage graph")
+    for t in tasks:
+        missing = [d for d in t.deps if d not in names]
+        if missing:
+            raise ValueError(f"Task {t.name} depends on unknown tasks: {missing}")
+
+    # Kahn's algorithm: every task must be reachable without cycles
+    deps = {t.name: set(t.deps) for t in tasks}
+    done = set()
+    while len(done) < len(deps):
+        ready = [n for n, d in deps.items() if n not in done and d <= done]
+        if not ready:
+            raise ValueError(f"Cycle in the stage graph among: {sorted(set(deps) - done)}")
+        done.update(ready)
+
+def timed_call(fn, args, kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# Runs the graph; returns {task name: TaskResult}. Tasks are started in list order when ready.
+def runGraph(tasks, max_cpus=None, max_memory_mb=None, executor="thread"):
+    check_graph(tasks)
+    max_cpus = max_cpus or os.cpu_count() or 1
+    # A task larger than the budget takes the whole budget
+    for t in tasks:
+        t.cpus = min(t.cpus, max_cpus)
+    pending = list(tasks)
+    results = {}
+    running = {}
+    used_cpus = used_memory = 0
+
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_class(max_workers=max(1, min(len(tasks), max_cpus))) as pool:
+        while pending or running:
+            # Tasks whose dependencies failed are skipped
+            for t in list(pending):
+                failed = [d for d in t.deps if d in results and results[d].status != "done"]
+                if failed:
+                    pending.remove(t)
+                    results[t.name] = TaskResult("skipped", error=f"dependency {failed[0]} did not complete")
+                    print(f"[SCHEDULER] {t.name} skipped: {results[t.name].error}")
+
+            for t in list(pending):
+                if any(d not in results for d in t.deps):
+                    continue
+                fits = (used_cpus + t.cpus <= max_cpus and
+                        (not max_memory_mb or used_memory + t.memory_mb <= max_memory_mb))
+                if not fits and running:
+                    continue
+                pending.remove(t)
+                used_cpus += t.cpus
+                used_memory += t.memory_mb
+                running[pool.submit(timed_call, t.fn, t.args, t.kwargs)] = t
+                print(f"[SCHEDULER] {t.name} started ({t.cpus} CPU, {t.memory_mb} MB; "
+                      f"{used_cpus}/{max_cpus} CPU in use)")
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                t = running.pop(future)
+                used_cpus -= t.cpus
+                used_memory -= t.memory_mb
+                try:
+                    result, elapsed = future.result()
+                    results[t.name] = TaskResult("done", result=result, elapsed=elapsed)
+                    print(f"[SCHEDULER] {t.name} done in {elapsed:.2f} sec")
+                except Exception as e:
+                    results[t.name] = TaskResult("failed", error=f"{type(e).__name__}: {e}")
+                    print(f"[SCHEDULER] {t.name} failed: {results[t.name].error}")
+                    traceback.print_exception(type(e), e, e.__traceback__)
+
+    return results
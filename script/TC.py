@@ -1,7 +1,10 @@
 import csv
 import re
 import os
+import shutil
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from script.Pddl import TOKEN_RE, parse_expressions, scan_pddl, splice_sections
 
 # Removes unwanted characters like brackets and quotes, and strips leading/trailing whitespace
 def clean_field(s):
@@ -86,6 +89,25 @@ def map_constraint(template, activation, target):
 def is_expressible(tc):
     return not tc.startswith("UNEXPRESSIBLE")
 
+# Splits a TC form into (operator, arguments); an argument is a label or an (or ...) list.
+# Labels keep their case. Anything but a single (operator argument ...) form raises ValueError
+def parse_tc(tc):
+    try:
+        exprs = parse_expressions(TOKEN_RE.findall(tc or ""), lower=False)
+    except ValueError as e:
+        raise ValueError(f"Malformed trajectory constraint {tc!r}: {e}") from None
+
+    if len(exprs) != 1 or not isinstance(exprs[0], list):
+        raise ValueError(f"Malformed trajectory constraint {tc!r}: expected one (operator ...) form")
+    expr = exprs[0]
+    if len(expr) < 2 or not isinstance(expr[0], str):
+        raise ValueError(f"Malformed trajectory constraint {tc!r}: expected an operator and its arguments")
+    for arg in expr[1:]:
+        if isinstance(arg, list) and (len(arg) < 2 or not all(isinstance(a, str) for a in arg)):
+            raise ValueError(f"Malformed trajectory constraint {tc!r}: argument {arg} is not a flat (op label ...) list")
+
+    return expr[0], expr[1:]
+
 # Reads a CSV file containing declarative templates and generates a csv file with TC
 def read_constraints_from_csv(csv_path):
     tc_list = []
@@ -94,24 +116,31 @@ def read_constraints_from_csv(csv_path):
 
     with open(csv_path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f, delimiter=';', quotechar="'")
-        for i, row in enumerate(reader):
-            template_raw = row.get("Template")
-            activation_raw = row.get("Activation")
-            target_raw = row.get("Target")
-            
-            constraints = map_constraint(template_raw, activation_raw, target_raw)
-            
-            for con in constraints:
-                if is_expressible(con):
-                    tc_list.append({
-                        "template": template_raw,
-                        "activation": activation_raw,
-                        "target": target_raw,
-                        "tc": con
-                    })
+        tc_list = constraints_to_tc(reader)
             
     return tc_list
 
+# Maps Declare rows (Template/Activation/Target) to the list of expressible TC
+def constraints_to_tc(rows):
+    tc_list = []
+    for row in rows:
+        template_raw = row.get("Template")
+        activation_raw = row.get("Activation")
+        target_raw = row.get("Target")
+        
+        constraints = map_constraint(template_raw, activation_raw, target_raw)
+        
+        for con in constraints:
+            if is_expressible(con):
+                tc_list.append({
+                    "template": template_raw,
+                    "activation": activation_raw,
+                    "target": target_raw,
+                    "tc": con
+                })
+
+    return tc_list
+
 
 def write_tc_csv(tc_list, output_csv):
     with open(output_csv, "w", newline="", encoding="utf-8") as f:
@@ -133,24 +162,19 @@ def write_tc_pddl(tc_list, output_pddl):
 
 # Updates a PDDL file by inserting constraints, removing any existing (:constraints ...) blocks
 def insert_constraints_into_pddl(pddl_path, output_path, tc_list):
-    with open(pddl_path, "r", encoding="utf-8") as f:
-        text = f.read()
-
+    pddl_path = Path(pddl_path)
+    sections, _ = scan_pddl(pddl_path)
 
     # Check if the file contains a goal (problem file) or is a domain
-    match = re.search(r'\(:goal', text, re.IGNORECASE)
-    
-    if not match:
+    if not any(head == ":goal" for head, _, _ in sections):
         # Domain file: no constraints to insert
         print(f"{pddl_path.name} is a domain (no :goal found).")
-        with open(output_path, "w", encoding="utf-8") as out:
-            out.write(text)
+        shutil.copyfile(pddl_path, output_path)
         return
 
     # If no new constraints, save original file
     if not tc_list:
-        with open(output_path, "w", encoding="utf-8") as out:
-            out.write(text)
+        shutil.copyfile(pddl_path, output_path)
         return
 
     # Build the new constraints block
@@ -162,18 +186,27 @@ def insert_constraints_into_pddl(pddl_path, output_path, tc_list):
     constraints_content = "\n        ".join(c['tc'] for c in expressible_tc)
     constraints_block = f"(:constraints\n    (and\n        {constraints_content}\n    )\n)"
 
-    # Remove existing (:constraints ...) blocks
-    text = re.sub(r"\(:constraints[\s\S]*?\)(?=\s*\(|$)", "", text, flags=re.IGNORECASE)
-
-    last_paren = text.rfind(")")
-    
-    if last_paren != -1:
-        new_text = text[:last_paren] + "\n\n    " + constraints_block + "\n" + text[last_paren:]
-    else:
-        new_text = text + "\n" + constraints_block
-
-    with open(output_path, "w", encoding="utf-8") as out:
-        out.write(new_text)
+    # Existing (:constraints ...) blocks are replaced, whatever they contain
+    splice_sections(pddl_path, output_path, ":constraints", constraints_block)
+
+# Writes the problems of every (tc_csv, pddl_dir, output_dir) job with their constraints,
+# all the files of all the jobs in one process pool
+def rewrite_problem_sets(jobs, max_workers=None):
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for tc_csv, pddl_dir, output_dir in jobs:
+            with open(tc_csv, newline="", encoding="utf-8") as f:
+                tc_list = list(csv.DictReader(f, delimiter=";"))
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for pddl_file in sorted(Path(pddl_dir).glob("*.pddl")):
+                futures.append(executor.submit(
+                    insert_constraints_into_pddl, pddl_file, output_dir / pddl_file.name, tc_list
+                ))
+        # Wait for all the rewrites, raising the first error
+        for f in futures:
+            f.result()
+    print(f"Constraints written into {len(futures)} PDDL files ({len(jobs)} problem sets).")
 
 # Process all PDDL files in a directory
 def batch_convert(csv_path, pddl_dir, output_dir):
@@ -184,7 +217,7 @@ def batch_convert(csv_path, pddl_dir, output_dir):
 
     if not csv_path.exists():
         print(f"CSV not found: {csv_path}")
-        return
+        return None
 
     print(f"Using CSV: {csv_path.name}")
     tc_list = read_constraints_from_csv(csv_path)
@@ -213,6 +246,7 @@ def batch_convert(csv_path, pddl_dir, output_dir):
     #    insert_constraints_into_pddl(pddl_file, out_path, tc_list)
         
     print("Finished processing.")
+    return tc_csv_output
 
 def apply_trajectory_constraints(csv_path, pddl_dir, output_dir):
-    batch_convert(csv_path, pddl_dir, output_dir)
+    return batch_convert(csv_path, pddl_dir, output_dir)
@@ -0,0 +1,202 @@
+import os
+import csv
+from script.Pddl import read_pddl, write_pddl, section, sections, keyword_value, set_keyword_value, conjoin
+from script.TC import parse_tc
+from script.TCConformance import read_tc_csv
+
+# Compiles trajectory constraints (script/TC.py forms) into classical STRIPS, since Fast Downward
+# does not support PDDL3 (:constraints ...). Every constraint becomes a small monitoring automaton
+# whose state is kept in 0-ary predicates: the monitored actions update it in their effects, the
+# rejecting transitions are blocked by preconditions and acceptance is added to the goal.
+#   (sometime A)            A adds tcK_done                                  goal tcK_done
+#   (at-most-once A)        A requires and deletes tcK_free                  init tcK_free
+#   (sometime-after A B)    A deletes tcK_ok, B adds it                      init/goal tcK_ok
+#   (sometime-before B A)   A adds tcK_seen, B requires it
+#   (always-next A B)       A deletes tcK_ok, B adds it, the others need it  init/goal tcK_ok
+#   (pattern A A ...)       counter tcK_c0 .. tcK_cN advanced by A           init tcK_c0, goal tcK_cN
+# (or A B) arguments monitor both actions. Labels are the lifted action names of the event log;
+# constraints on other labels (grounded or compound activities) cannot be monitored and are skipped:
+# the skipped ones are counted in the output and in compile_report.csv, and the planning
+# benchmark refuses a folder where nothing was compiled.
+
+REPORT_FIELDS = ["tc", "compiled", "predicates"]
+
+
+class Monitors:
+    def __init__(self, actions):
+        self.actions = list(actions)
+        self.pre = {a: [] for a in self.actions}
+        self.eff = {a: [] for a in self.actions}
+        self.predicates = []
+        self.init = []
+        self.goal = []
+        self.conditional = False
+
+    def predicate(self, name):
+        self.predicates.append(name)
+        return [name]
+
+    # Adds the automaton of one constraint; False when it cannot be compiled
+    def add(self, k, op, args):
+        labels = [a[1:] if isinstance(a, list) and a[0] == "or" else [a] for a in args]
+        flat = [label for group in labels for label in group]
+        if not flat or any(not isinstance(label, str) or label not in self.pre for label in flat):
+            return False
+        # A label monitored twice (e.g. (sometime-after A A)) would add and delete the same state
+        if op != "pattern" and len(set(flat)) != len(flat):
+            return False
+
+        if op == "sometime" and len(args) == 1:
+            done = self.predicate(f"tc{k}_done")
+            for a in labels[0]:
+                self.eff[a].append(done)
+            self.goal.append(done)
+
+        elif op == "at-most-once" and len(args) == 1:
+            free = self.predicate(f"tc{k}_free")
+            for a in labels[0]:
+                self.pre[a].append(free)
+                self.eff[a].append(["not", free])
+            self.init.append(free)
+
+        elif op == "sometime-after" and len(flat) == 2 == len(args):
+            ok = self.predicate(f"tc{k}_ok")
+            self.eff[flat[0]].append(["not", ok])
+            self.eff[flat[1]].append(ok)
+            self.init.append(ok)
+            self.goal.append(ok)
+
+        elif op == "sometime-before" and len(flat) == 2 == len(args):
+            seen = self.predicate(f"tc{k}_seen")
+            self.eff[flat[1]].append(seen)
+            self.pre[flat[0]].append(seen)
+
+        elif op == "always-next" and len(flat) == 2 == len(args):
+            ok = self.predicate(f"tc{k}_ok")
+            for a in self.actions:
+                if a != flat[1]:
+                    self.pre[a].append(ok)
+            self.eff[flat[0]].append(["not", ok])
+            self.eff[flat[1]].append(ok)
+            self.init.append(ok)
+            self.goal.append(ok)
+
+        elif op == "pattern" and len(set(flat)) == 1 == len(labels[0]):
+            # Counter of the occurrences of A, saturated at N
+            counter = [self.predicate(f"tc{k}_c{i}") for i in range(len(flat) + 1)]
+            for i in range(len(flat)):
+                self.eff[flat[0]].append(["when", counter[i], ["and", ["not", counter[i]], counter[i + 1]]])
+            self.init.append(counter[0])
+            self.goal.append(counter[-1])
+            self.conditional = True
+
+        else:
+            return False
+        return True
+
+
+def compile_domain(domain, monitors):
+    if monitors.conditional:
+        requirements = section(domain, ":requirements")
+        if requirements is None:
+            requirements = [":requirements", ":strips"]
+            domain.insert(2, requirements)
+        if ":conditional-effects" not in requirements and ":adl" not in requirements:
+            requirements.append(":conditional-effects")
+
+    predicates = section(domain, ":predicates")
+    if predicates is None:
+        predicates = [":predicates"]
+        domain.insert(len(domain) - len(sections(domain, ":action")), predicates)
+    predicates.extend([p] for p in monitors.predicates)
+
+    for action in sections(domain, ":action"):
+        name = action[1]
+        if monitors.pre[name]:
+            precondition = conjoin(keyword_value(action, ":precondition"), monitors.pre[name])
+            set_keyword_value(action, ":precondition", precondition, before=":effect")
+        if monitors.eff[name]:
+            set_keyword_value(action, ":effect", conjoin(keyword_value(action, ":effect"), monitors.eff[name]))
+    return domain
+
+def compile_problem(problem, monitors):
+    init = section(problem, ":init")
+    if init is None:
+        init = [":init"]
+        problem.append(init)
+    init.extend(monitors.init)
+
+    goal = section(problem, ":goal")
+    if goal is None:
+        goal = [":goal", []]
+        problem.append(goal)
+    goal[1] = conjoin(goal[1], monitors.goal)
+    return problem
+
+
+# Compiles the constraints of tc_csv into the domain and every problem of problems_dir.
+# Writes output_dir/domain.pddl, one problem per input problem and compile_report.csv;
+# returns the compiled domain path (output_dir is the problems_dir for createPlans)
+def compileTC(tc_csv, domain_file, problems_dir, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    rows = read_tc_csv(tc_csv)
+    domain = read_pddl(domain_file)
+    monitors = Monitors(action[1] for action in sections(domain, ":action"))
+
+    report = []
+    for k, row in enumerate(rows):
+        try:
+            op, args = parse_tc(row["tc"].lower())
+        except ValueError as e:
+            print(f"[TC COMPILE WARNING] {e}, skipped")
+            report.append({"tc": row["tc"], "compiled": False, "predicates": ""})
+            continue
+        compiled = monitors.add(k, op, args)
+        if not compiled:
+            print(f"[TC COMPILE WARNING] Constraint not on domain actions, skipped: {row['tc']}")
+        report.append({
+            "tc": row["tc"],
+            "compiled": compiled,
+            "predicates": " ".join(p for p in monitors.predicates if p.startswith(f"tc{k}_")),
+        })
+
+    output_domain = os.path.join(output_dir, "domain.pddl")
+    write_pddl(compile_domain(domain, monitors), output_domain)
+
+    # Same problem files as createPlans
+    problems = sorted(
+        f for f in os.listdir(problems_dir)
+        if f.endswith(".pddl") and "domain" not in f.lower()
+    )
+    n_problems = 0
+    for f in problems:
+        problem = read_pddl(os.path.join(problems_dir, f))
+        # Domain files whose name does not say so (e.g. StripsRover.pddl) are left out
+        if not isinstance(problem[1], list) or problem[1][0] != "problem":
+            continue
+        write_pddl(compile_problem(problem, monitors), os.path.join(output_dir, f))
+        n_problems += 1
+
+    report_csv = os.path.join(output_dir, "compile_report.csv")
+    with open(report_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, delimiter=";")
+        writer.writeheader()
+        writer.writerows(report)
+
+    n_compiled = sum(r["compiled"] for r in report)
+    print(f"[TC COMPILE] {n_compiled}/{len(rows)} constraints compiled into "
+          f"{len(monitors.predicates)} monitor predicates, {n_problems} problems")
+    if n_compiled < len(rows):
+        print(f"[TC COMPILE WARNING] {len(rows) - n_compiled}/{len(rows)} constraints of {tc_csv} skipped: "
+              f"their labels are not action names of the domain (grounded or compound labels)")
+    if not n_compiled:
+        print("[TC COMPILE WARNING] No constraint compiled: the STRIPS problems are the original ones")
+    print(f"[TC COMPILE] STRIPS domain and problems saved to: {output_dir}")
+    return output_domain
+
+
+# (compiled, skipped) constraints of a compileTC output folder, from its compile_report.csv
+def compile_counts(output_dir):
+    with open(os.path.join(output_dir, "compile_report.csv"), newline="", encoding="utf-8") as f:
+        compiled = [row["compiled"] == "True" for row in csv.DictReader(f, delimiter=";")]
+    return sum(compiled), len(compiled) - sum(compiled)
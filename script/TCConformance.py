@@ -0,0 +1,215 @@
+import os
+import csv
+import numpy as np
+from script.TC import clean_field, parse_tc
+from script.XesStream import iter_xes_traces, VARIANT_COUNT_KEY
+
+# Conformance of trajectory constraints (script/TC.py forms) against an event log.
+# The log is indexed once per activity: sorted ids of the traces containing it, with first and
+# last position and number of occurrences, plus the same for every pair of consecutive events.
+# Each constraint is then evaluated with a few vectorized operations over those arrays.
+#
+# Semantics on a trace (sequence of instantaneous events):
+#   (sometime A)             A occurs
+#   (at-most-once A)         A occurs at most once
+#   (sometime-after A B)     A does not occur, or the last B follows the last A
+#   (sometime-before B A)    B does not occur, or the first A precedes the first B
+#   (always-next A B)        every A is immediately followed by B
+#   (pattern A A ...)        A occurs at least as many times as it is repeated
+#   (or A B) as argument of sometime / at-most-once stands for "an event A or B"
+
+CONSTRAINT_FIELDS = ["tc", "template", "activation", "target", "satisfied", "violated", "satisfaction_rate"]
+TRACE_FIELDS = ["case", "weight", "satisfied", "violated", "satisfaction_rate"]
+
+
+class LogIndex:
+    def __init__(self, labels, acts, lengths, weights, cases):
+        self.labels = labels
+        self.index = {label: i for i, label in enumerate(labels)}
+        self.n_traces = len(lengths)
+        self.weights = np.asarray(weights, dtype=float)
+        self.cases = cases
+
+        T, A = self.n_traces, max(1, len(labels))
+        trace_ids = np.repeat(np.arange(T, dtype=np.int64), lengths)
+        starts = np.cumsum(lengths) - lengths
+        positions = np.arange(len(acts), dtype=np.int64) - np.repeat(starts, lengths)
+
+        # (activity, trace) entries sorted by activity, then trace
+        codes = acts * T + trace_ids
+        order = np.argsort(codes, kind="stable")
+        codes, pos = codes[order], positions[order]
+        uniq, first_idx, counts = np.unique(codes, return_index=True, return_counts=True)
+        last_idx = first_idx + counts - 1
+
+        self.act_trace = uniq % T if T else uniq
+        self.act_first = pos[first_idx]
+        self.act_last = pos[last_idx]
+        self.act_count = counts
+        self.act_start = np.searchsorted(uniq // max(T, 1), np.arange(A + 1))
+
+        # Consecutive events (a, b) per trace: number of times a is immediately followed by b
+        same = trace_ids[:-1] == trace_ids[1:]
+        pair_codes = ((acts[:-1] * A + acts[1:]) * T + trace_ids[:-1])[same]
+        pair_uniq, pair_counts = np.unique(pair_codes, return_counts=True)
+        self.pair_key = pair_uniq // max(T, 1)
+        self.pair_trace = pair_uniq % T if T else pair_uniq
+        self.pair_count = pair_counts
+        self.A = A
+
+    # Traces containing the activity: (trace ids, first, last, count), sorted by trace
+    def activity(self, label):
+        i = self.index.get(label)
+        if i is None:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, empty
+        s, e = self.act_start[i], self.act_start[i + 1]
+        return self.act_trace[s:e], self.act_first[s:e], self.act_last[s:e], self.act_count[s:e]
+
+    # Traces where a is immediately followed by b: (trace ids, times), sorted by trace
+    def pair(self, a, b):
+        if a not in self.index or b not in self.index:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        key = self.index[a] * self.A + self.index[b]
+        s, e = np.searchsorted(self.pair_key, [key, key + 1])
+        return self.pair_trace[s:e], self.pair_count[s:e]
+
+
+# Reads an XES log into a LogIndex; labels are normalized like the TC fields
+def index_log(input_xes, keys=("concept:name",)):
+    alphabet = {}
+    acts, lengths, weights, cases = [], [], [], []
+    for attrs, labels in iter_xes_traces(input_xes, keys):
+        acts.extend(alphabet.setdefault(clean_field(label), len(alphabet)) for label in labels)
+        lengths.append(len(labels))
+        weights.append(float(attrs.get(VARIANT_COUNT_KEY) or 1))
+        cases.append(attrs.get("concept:name", str(len(cases))))
+
+    return LogIndex(list(alphabet), np.array(acts, dtype=np.int64), np.array(lengths, dtype=np.int64), weights, cases)
+
+
+# Traces (sorted ids) containing at least one event of the argument, with total occurrences
+def occurrences(log, arg):
+    labels = arg[1:] if isinstance(arg, list) and arg[0] == "or" else [arg]
+    ids = [log.activity(label)[0] for label in labels]
+    counts = [log.activity(label)[3] for label in labels]
+    all_ids = np.concatenate(ids)
+    traces, inverse = np.unique(all_ids, return_inverse=True)
+    return traces, np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+
+# Values of `values` (aligned with sorted `ids`) at the traces `at`; missing traces get `default`
+def lookup(ids, values, at, default):
+    idx = np.searchsorted(ids, at)
+    idx_clip = np.minimum(idx, max(len(ids) - 1, 0))
+    found = (idx < len(ids)) & (ids[idx_clip] == at) if len(ids) else np.zeros(len(at), dtype=bool)
+    out = np.full(len(at), default, dtype=np.int64)
+    out[found] = values[idx_clip[found]]
+    return out
+
+# Returns (ids of the traces where the form holds, True) or (ids where it is violated, False);
+# None for forms script/TC.py does not produce
+def evaluate(log, op, args):
+    if op == "sometime":
+        return occurrences(log, args[0])[0], True
+
+    if op == "at-most-once":
+        traces, counts = occurrences(log, args[0])
+        return traces[counts > 1], False
+
+    if op == "sometime-after":
+        a_ids, _, a_last, _ = log.activity(args[0])
+        b_ids, _, b_last, _ = log.activity(args[1])
+        return a_ids[lookup(b_ids, b_last, a_ids, -1) <= a_last], False
+
+    if op == "sometime-before":
+        b_ids, b_first, _, _ = log.activity(args[0])
+        a_ids, a_first, _, _ = log.activity(args[1])
+        a_before = lookup(a_ids, a_first, b_ids, np.iinfo(np.int64).max)
+        return b_ids[a_before >= b_first], False
+
+    if op == "always-next":
+        a_ids, _, _, a_count = log.activity(args[0])
+        p_ids, p_count = log.pair(args[0], args[1])
+        return a_ids[lookup(p_ids, p_count, a_ids, 0) < a_count], False
+
+    if op == "pattern" and len(set(args)) == 1:
+        ids, _, _, counts = log.activity(args[0])
+        return ids[counts >= len(args)], True
+
+    return None
+
+def read_tc_csv(tc_csv):
+    with open(tc_csv, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f, delimiter=";"))
+
+# Checks every constraint of tc_csv on input_xes and writes the per-constraint and per-trace reports
+def checkConformance(tc_csv, input_xes, output_dir, keys=("concept:name",)):
+    os.makedirs(output_dir, exist_ok=True)
+    rows = read_tc_csv(tc_csv)
+    log = index_log(input_xes, keys)
+    total = log.weights.sum()
+    print(f"[CONFORMANCE] {len(rows)} constraints, {log.n_traces} traces ({total:.0f} weighted)")
+
+    # Satisfied constraints per trace: positive forms add their satisfying traces,
+    # the others count as satisfied everywhere but in their violating traces
+    trace_sat = np.zeros(log.n_traces)
+    n_negative = 0
+    report = []
+    for row in rows:
+        try:
+            op, args = parse_tc(row["tc"])
+        except ValueError as e:
+            print(f"[CONFORMANCE WARNING] {e}, skipped")
+            continue
+        result = evaluate(log, op, args)
+        if result is None:
+            print(f"[CONFORMANCE WARNING] Unsupported constraint skipped: {row['tc']}")
+            continue
+
+        ids, positive = result
+        weight = log.weights[ids].sum()
+        satisfied = weight if positive else total - weight
+        if positive:
+            trace_sat[ids] += 1
+        else:
+            n_negative += 1
+            trace_sat[ids] -= 1
+
+        report.append({
+            "tc": row["tc"],
+            "template": row.get("template", ""),
+            "activation": row.get("activation", ""),
+            "target": row.get("target", ""),
+            "satisfied": satisfied,
+            "violated": total - satisfied,
+            "satisfaction_rate": round(satisfied / total, 6) if total else 0.0,
+        })
+
+    stem = os.path.splitext(os.path.basename(tc_csv))[0]
+    constraints_csv = os.path.join(output_dir, f"{stem}_conformance.csv")
+    traces_csv = os.path.join(output_dir, f"{stem}_trace_conformance.csv")
+
+    with open(constraints_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CONSTRAINT_FIELDS, delimiter=";")
+        writer.writeheader()
+        writer.writerows(report)
+
+    trace_sat += n_negative
+    n = len(report)
+    with open(traces_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS, delimiter=";")
+        writer.writeheader()
+        for case, weight, sat in zip(log.cases, log.weights, trace_sat):
+            writer.writerow({
+                "case": case,
+                "weight": weight,
+                "satisfied": int(sat),
+                "violated": int(n - sat),
+                "satisfaction_rate": round(sat / n, 6) if n else 1.0,
+            })
+
+    fitting = log.weights[trace_sat == n].sum()
+    print(f"[CONFORMANCE] Traces satisfying every constraint: {fitting / total:.2%}" if total else "")
+    print(f"[CONFORMANCE] Reports saved to: {constraints_csv}, {traces_csv}")
+    return constraints_csv, traces_csv
@@ -0,0 +1,161 @@
+import os
+import csv
+from collections import Counter
+from script.TC import write_tc_csv
+from script.TC import parse_tc
+from script.TCConformance import read_tc_csv
+
+# Removes the trajectory constraints entailed by the others (same semantics as script/TCConformance.py).
+# Entailments used:
+#   sometime-after A B, sometime-after B C   =>  sometime-after A C       (transitivity)
+#   sometime-before C B, sometime-before B A =>  sometime-before C A      (transitivity)
+#   always-next A B                          =>  sometime-after A B
+#   sometime A, sometime-after A B           =>  sometime B
+#   sometime B, sometime-before B A          =>  sometime A
+#   pattern A A ... (n times)                =>  sometime A, pattern A ... (fewer times)
+#   sometime A                               =>  sometime (or A B)
+#   at-most-once (or A B)                    =>  at-most-once A
+# Constraints are dropped one at a time when the remaining ones entail them, so the result is
+# equivalent to the input and no kept constraint is entailed by the others.
+
+# Removal order: weaker forms first, so they are the ones dropped when two constraints entail each other
+REMOVAL_ORDER = ["sometime", "at-most-once", "sometime-after", "sometime-before", "pattern", "always-next"]
+
+
+# Normalized form: (operator, arguments); (or ...) arguments become frozensets of labels
+def normalize(tc):
+    op, args = parse_tc(tc)
+    norm = tuple(frozenset(a[1:]) if isinstance(a, list) and a[0] == "or" else a for a in args)
+    return op, norm
+
+
+class Entailment:
+    def __init__(self, forms):
+        self.forms = Counter(forms)
+
+    def remove(self, form):
+        self.forms[form] -= 1
+        if not self.forms[form]:
+            del self.forms[form]
+
+    def add(self, form):
+        self.forms[form] += 1
+
+    # Directed edges of an operator between plain labels: sometime-after A B gives A -> B
+    def edges(self, *ops):
+        graph = {}
+        for (op, args) in self.forms:
+            if op in ops and len(args) == 2 and all(isinstance(a, str) for a in args):
+                graph.setdefault(args[0], set()).add(args[1])
+        return graph
+
+    @staticmethod
+    def reaches(graph, source, target):
+        seen, stack = {source}, [source]
+        while stack:
+            for nxt in graph.get(stack.pop(), ()):
+                if nxt == target:
+                    return True
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return False
+
+    # Labels that occur in every trace satisfying the constraints
+    def occurring(self):
+        known = set()
+        for op, args in self.forms:
+            if op == "sometime" and isinstance(args[0], str):
+                known.add(args[0])
+            elif op == "pattern" and len(set(args)) == 1:
+                known.add(args[0])
+
+        after = self.edges("sometime-after", "always-next")
+        before = self.edges("sometime-before")
+        stack = list(known)
+        while stack:
+            label = stack.pop()
+            for nxt in after.get(label, set()) | before.get(label, set()):
+                if nxt not in known:
+                    known.add(nxt)
+                    stack.append(nxt)
+        return known
+
+    def entails(self, form):
+        op, args = form
+        if self.forms.get(form):
+            return True
+
+        if op in ("sometime-after", "sometime-before") and all(isinstance(a, str) for a in args):
+            ops = ("sometime-after", "always-next") if op == "sometime-after" else ("sometime-before",)
+            return self.reaches(self.edges(*ops), args[0], args[1])
+
+        if op == "sometime":
+            labels = args[0] if isinstance(args[0], frozenset) else {args[0]}
+            if labels & self.occurring():
+                return True
+            return any(
+                o == "sometime" and isinstance(a[0], frozenset) and a[0] <= labels
+                for o, a in self.forms
+            )
+
+        if op == "at-most-once":
+            labels = args[0] if isinstance(args[0], frozenset) else {args[0]}
+            return any(
+                o == "at-most-once" and labels <= (a[0] if isinstance(a[0], frozenset) else {a[0]})
+                for o, a in self.forms
+            )
+
+        if op == "pattern" and len(set(args)) == 1:
+            return any(
+                o == "pattern" and len(set(a)) == 1 and a[0] == args[0] and len(a) >= len(args)
+                for o, a in self.forms
+            )
+
+        return False
+
+
+# Returns (kept, removed) lists of TC rows (dicts with a "tc" field), keeping the input order
+def minimize_tc(tc_list):
+    forms = [normalize(row["tc"]) for row in tc_list]
+    entailment = Entailment(forms)
+
+    rank = {op: i for i, op in enumerate(REMOVAL_ORDER)}
+    order = sorted(range(len(tc_list)), key=lambda i: (rank.get(forms[i][0], len(rank)), i))
+
+    removed = set()
+    for i in order:
+        entailment.remove(forms[i])
+        if entailment.entails(forms[i]):
+            removed.add(i)
+        else:
+            entailment.add(forms[i])
+
+    kept = [row for i, row in enumerate(tc_list) if i not in removed]
+    dropped = [row for i, row in enumerate(tc_list) if i in removed]
+    return kept, dropped
+
+
+# Minimizes a TC CSV: writes <stem>_min.csv and <stem>_min_report.csv, returns the minimized CSV
+def minimizeTCFile(tc_csv):
+    tc_list = read_tc_csv(tc_csv)
+    kept, dropped = minimize_tc(tc_list)
+
+    stem = os.path.splitext(tc_csv)[0]
+    output_csv = f"{stem}_min.csv"
+    report_csv = f"{stem}_min_report.csv"
+    write_tc_csv(kept, output_csv)
+
+    before = Counter(parse_tc(row["tc"])[0] for row in tc_list)
+    after = Counter(parse_tc(row["tc"])[0] for row in kept)
+    with open(report_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["operator", "before", "after", "removed"])
+        for op in sorted(before):
+            writer.writerow([op, before[op], after[op], before[op] - after[op]])
+        writer.writerow(["total", len(tc_list), len(kept), len(dropped)])
+
+    shrink = len(dropped) / len(tc_list) if tc_list else 0.0
+    print(f"[TC MIN] {len(tc_list)} -> {len(kept)} constraints ({shrink:.1%} entailed and removed)")
+    print(f"[TC MIN] Minimized TC: {output_csv}")
+    return output_csv
@@ -0,0 +1,65 @@
+import os
+import csv
+from itertools import product
+from script.DeclareMiner import (
+    load_traces, count_traces, constraint_statistics, prune_hierarchy, write_constraints_csv
+)
+from script.TC import constraints_to_tc, write_tc_csv
+
+# Threshold sweeps: the per-constraint support/confidence/coverage statistics are computed
+# once per log, then every point of the (support, confidence, coverage) grid is only a filter.
+
+SUMMARY_FIELDS = ["support", "confidence", "coverage", "constraints", "tc_constraints", "constraints_csv", "tc_csv"]
+
+
+def thresholdSweep(input_xes, output_dir, minerful_conf, sweep_conf):
+    os.makedirs(output_dir, exist_ok=True)
+
+    supports = sweep_conf.get("support") or [minerful_conf["support"]]
+    confidences = sweep_conf.get("confidence") or [minerful_conf["confidence"]]
+    coverages = sweep_conf.get("coverage") or [minerful_conf["coverage"]]
+    pruning = minerful_conf.get("pruning_strategy", "hierarchy")
+
+    print(f"[SWEEP] Computing constraint statistics for {input_xes}...")
+    counters = count_traces(*load_traces(input_xes, minerful_conf))
+
+    # Candidates above the loosest grid point; every grid point is a subset of them
+    candidates = constraint_statistics(counters, min(supports), min(confidences), min(coverages))
+    candidates.sort(key=lambda r: (r["Template"], r["Activation"], r["Target"]))
+    print(f"[SWEEP] {len(candidates)} candidate constraints, {len(supports) * len(confidences) * len(coverages)} grid points")
+
+    summary = []
+    for sup, conf, cov in product(supports, confidences, coverages):
+        rows = [
+            r for r in candidates
+            if r["Support"] >= sup and r["Confidence level"] >= conf and r["Coverage"] >= cov
+        ]
+        if pruning and pruning != "none":
+            rows = prune_hierarchy(rows)
+
+        tag = f"s{sup}_c{conf}_g{cov}"
+        constraints_csv = os.path.join(output_dir, f"{tag}_minerful.csv")
+        tc_csv = os.path.join(output_dir, f"{tag}_tc.csv")
+
+        tc_list = constraints_to_tc(rows)
+        write_constraints_csv(rows, constraints_csv)
+        write_tc_csv(tc_list, tc_csv)
+
+        summary.append({
+            "support": sup,
+            "confidence": conf,
+            "coverage": cov,
+            "constraints": len(rows),
+            "tc_constraints": len(tc_list),
+            "constraints_csv": constraints_csv,
+            "tc_csv": tc_csv,
+        })
+
+    summary_csv = os.path.join(output_dir, "sweep_summary.csv")
+    with open(summary_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summary)
+
+    print(f"[SWEEP] Summary saved to: {summary_csv}")
+    return summary_csv
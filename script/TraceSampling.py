@@ -0,0 +1,166 @@
+import os
+import csv
+import random
+from itertools import combinations
+import numpy as np
+from script.XesStream import iter_xes_traces, transform_xes, VARIANT_COUNT_KEY
+from script.DeclareMiner import count_traces, select_constraints
+from script.EventLogFrame import read_log
+from script.VariantCompression import VARIANT_COUNT_COL
+
+# Variant-stratified trace sampling for discovery on very large logs.
+# Every variant (sequence of event labels) contributes fraction * its number of traces, with
+# random rounding, so frequent behaviour is kept in proportion and rare variants are drawn at
+# random. The sample grows until the discovered constraint set stops changing.
+# The sample keeps the name of the log (minerful/sampling/<stem>/<log>.xes, with its .csv);
+# the fraction it was drawn with is the `selected` row of sampling_report.csv.
+
+REPORT_FIELDS = [
+    "fraction", "sampled_traces", "sampled_variants", "constraints",
+    "jaccard_replicates", "jaccard_previous", "support_sd", "confidence_sd", "selected"
+]
+
+
+# Variant (label sequence), weight and case id of every trace, in log order
+def trace_variants(input_xes, keys=("concept:name",)):
+    variants, weights, cases = [], [], []
+    for attrs, labels in iter_xes_traces(input_xes, keys):
+        variants.append(tuple(labels))
+        weights.append(int(float(attrs.get(VARIANT_COUNT_KEY) or 1)))
+        cases.append(attrs.get("concept:name"))
+    return variants, weights, cases
+
+# Stratified sample: {trace index: multiplicity}, one representative trace per sampled variant
+def stratified_sample(variants, weights, fraction, rng):
+    groups = {}
+    for i, variant in enumerate(variants):
+        groups.setdefault(variant, []).append(i)
+
+    sample = {}
+    for idx in groups.values():
+        expected = fraction * sum(weights[i] for i in idx)
+        n = int(expected) + (rng.random() < expected - int(expected))
+        if n:
+            sample[rng.choice(idx)] = n
+    return sample
+
+# Constraints discovered on a sample: (Template, Activation, Target) -> row
+def discover_sample(variants, sample, minerful_conf):
+    traces = [list(variants[i]) for i in sample]
+    counters = count_traces(traces, list(sample.values()))
+    rows = select_constraints(
+        counters,
+        minerful_conf["support"],
+        minerful_conf["confidence"],
+        minerful_conf["coverage"],
+        minerful_conf.get("pruning_strategy", "hierarchy"),
+    )
+    return {(r["Template"], r["Activation"], r["Target"]): r for r in rows}
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+# Mean standard deviation of a statistic across replicates (constraints found in all of them)
+def mean_sd(results, field):
+    common = set.intersection(*(set(r) for r in results))
+    if not common or len(results) < 2:
+        return 0.0
+    return float(np.mean([np.std([r[k][field] for r in results]) for k in common]))
+
+
+# Draws growing samples until the constraints are stable, writes the chosen sample to
+# output_dir and returns its path (the input log itself when the whole log was needed).
+# input_csv: events of the log (default: the CSV next to input_xes)
+def sampleLog(input_xes, output_dir, minerful_conf, sampling_conf, input_csv=None):
+    os.makedirs(output_dir, exist_ok=True)
+
+    fraction = sampling_conf.get("start_fraction", 0.1)
+    growth = sampling_conf.get("growth", 2.0)
+    max_fraction = sampling_conf.get("max_fraction", 1.0)
+    replicates = max(1, int(sampling_conf.get("replicates", 3)))
+    threshold = sampling_conf.get("stability", 0.95)
+    seed = sampling_conf.get("seed", 42)
+
+    keys = minerful_conf["classifier_keys"].split() if minerful_conf.get("use_classifier") else ["concept:name"]
+    variants, weights, cases = trace_variants(input_xes, keys)
+    print(f"[SAMPLING] {sum(weights)} traces, {len(set(variants))} variants in {input_xes}")
+
+    report = []
+    previous = None
+    while True:
+        samples = [stratified_sample(variants, weights, fraction, random.Random(seed + r)) for r in range(replicates)]
+        results = [discover_sample(variants, sample, minerful_conf) for sample in samples]
+        sets = [set(r) for r in results]
+
+        pairs = list(combinations(sets, 2))
+        jaccard_replicates = float(np.mean([jaccard(a, b) for a, b in pairs])) if pairs else 1.0
+        jaccard_previous = jaccard(sets[0], previous) if previous is not None else None
+
+        report.append({
+            "fraction": round(fraction, 6),
+            "sampled_traces": sum(samples[0].values()),
+            "sampled_variants": len(samples[0]),
+            "constraints": len(sets[0]),
+            "jaccard_replicates": round(jaccard_replicates, 4),
+            "jaccard_previous": "" if jaccard_previous is None else round(jaccard_previous, 4),
+            "support_sd": round(mean_sd(results, "Support"), 6),
+            "confidence_sd": round(mean_sd(results, "Confidence level"), 6),
+            "selected": 0,
+        })
+        print(f"[SAMPLING] fraction {fraction:.4f}: {len(sets[0])} constraints, "
+              f"replicate Jaccard {jaccard_replicates:.3f}, previous Jaccard {report[-1]['jaccard_previous']}")
+
+        # Stable: the replicates agree and a larger sample did not change the constraints
+        stable = jaccard_replicates >= threshold and jaccard_previous is not None and jaccard_previous >= threshold
+        if stable or fraction >= max_fraction:
+            break
+
+        previous = sets[0]
+        fraction = min(max_fraction, fraction * growth)
+
+    applied = fraction < 1.0
+    report[-1]["selected"] = int(applied)
+
+    report_csv = os.path.join(output_dir, "sampling_report.csv")
+    with open(report_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report)
+    print(f"[SAMPLING] Report saved to: {report_csv}")
+
+    if not applied:
+        print("[SAMPLING] Constraints not stable before the full log: sampling not applied")
+        return input_xes
+
+    # The sampled variants are written once, with their multiplicity as variant_count
+    sample = samples[0]
+    output_xes = os.path.join(output_dir, os.path.basename(input_xes))
+    transform_xes(input_xes, output_xes, retype_numeric=False, trace_hook=lambda i: sample.get(i, 0))
+    print(f"[SAMPLING] Sample of {sum(sample.values())} traces ({len(sample)} variants, "
+          f"fraction {fraction:g}): {output_xes}")
+
+    write_sample_csv(input_csv or os.path.splitext(input_xes)[0] + ".csv", output_xes,
+                     {cases[i]: n for i, n in sample.items()}, sampling_conf.get("csv_separator", ";"))
+
+    return output_xes
+
+
+# Events of the sampled cases of input_csv, with their multiplicities, next to the sample
+def write_sample_csv(input_csv, output_xes, counts, sep=";"):
+    if not os.path.exists(input_csv):
+        print(f"[SAMPLING WARNING] {input_csv} not found: the sample has no CSV")
+        return None
+
+    df = read_log(input_csv, sep=sep, keep_default_na=False)
+    case_col = next((c for c in ("case:concept:name", "case_id") if c in df.columns), None)
+    if case_col is None:
+        print(f"[SAMPLING WARNING] No case column in {input_csv}: the sample has no CSV")
+        return None
+
+    df = df[df[case_col].isin(counts)].copy()
+    df[VARIANT_COUNT_COL] = df[case_col].map(counts).astype(str)
+
+    output_csv = os.path.splitext(output_xes)[0] + ".csv"
+    df.to_csv(output_csv, sep=sep, index=False, encoding="utf-8")
+    print(f"[SAMPLING] Sample CSV: {output_csv}")
+    return output_csv
@@ -0,0 +1,91 @@
+import pandas as pd
+from pm4py.objects.log.util import dataframe_utils
+from pm4py.objects.conversion.log import converter as log_converter
+from pm4py.objects.log.exporter.xes import exporter as xes_exporter
+from script.XesStream import VARIANT_COUNT_KEY
+from script.EventLogFrame import read_log, handoff_frame
+
+# Trace variant compression: traces with exactly the same sequence of events are kept once,
+# with their multiplicity in the case attribute `case:variant_count` (the XES trace attribute
+# `variant_count`). Later stages keep the column, and discovery weights every variant by it.
+
+VARIANT_COUNT_COL = f"case:{VARIANT_COUNT_KEY}"
+
+
+# csvInput: CSV path or the DataFrame of the previous stage; csvOutput/xesOutput None: that file
+# is not written. Returns the compressed DataFrame
+def compressVariants(csvInput, csvOutput, xesOutput, variant_conf=None):
+    # Initialize configuration
+    if variant_conf is None:
+        variant_conf = {}
+
+    sep = variant_conf["csv_separator"]
+    plan_col = variant_conf["plan_column"]
+    timestamp_col = variant_conf["timestamp_column"]
+    activity_col = variant_conf["activity_column"]
+    # Columns compared between traces (null = every event column)
+    key_columns = variant_conf.get("key_columns")
+
+    df = read_log(csvInput, sep=sep, keep_default_na=False)
+    df = df.fillna("")
+
+    if plan_col not in df.columns:
+        raise RuntimeError(f"[VARIANTS ERROR] Plan column '{plan_col}' not found. Available columns: {list(df.columns)}")
+
+    # Identifiers and timestamps differ in every plan, they never define a variant
+    ignored = {plan_col, timestamp_col, "event_id", VARIANT_COUNT_COL}
+    if key_columns:
+        missing = [c for c in key_columns if c not in df.columns]
+        if missing:
+            raise RuntimeError(f"[VARIANTS ERROR] Missing key columns: {missing}")
+        cols = [activity_col] + [c for c in key_columns if c != activity_col]
+    else:
+        cols = [c for c in df.columns if c not in ignored]
+
+    # Logs compressed before keep their multiplicities
+    if VARIANT_COUNT_COL in df.columns:
+        weights = pd.to_numeric(df[VARIANT_COUNT_COL], errors="coerce").fillna(1).astype(int)
+    else:
+        weights = pd.Series(1, index=df.index)
+
+    values = df[cols].to_numpy()
+    case_weights = weights.to_numpy()
+
+    # First case of every variant, in order of appearance, and its multiplicity
+    representative = {}
+    counts = {}
+    for case, idx in df.groupby(plan_col, sort=False).indices.items():
+        key = tuple(map(tuple, values[idx]))
+        if key not in representative:
+            representative[key] = case
+            counts[case] = 0
+        counts[representative[key]] += int(case_weights[idx[0]])
+
+    n_cases = df[plan_col].nunique()
+    compressed = df[df[plan_col].isin(counts)].copy()
+    compressed[VARIANT_COUNT_COL] = compressed[plan_col].map(counts).astype(str)
+
+    print(f"[VARIANTS] {n_cases} traces -> {len(counts)} variants "
+          f"({len(df)} -> {len(compressed)} events)")
+
+    variants = handoff_frame(compressed)
+    if csvOutput:
+        compressed.to_csv(csvOutput, sep=sep, index=False, encoding="utf-8")
+        print(f"[VARIANTS] CSV generated: {csvOutput}")
+    if not xesOutput:
+        return variants
+
+    compressed = compressed.rename(columns={
+        plan_col: "case:concept:name",
+        activity_col: "concept:name",
+        timestamp_col: "time:timestamp"
+    })
+    compressed = dataframe_utils.convert_timestamp_columns_in_df(compressed)
+
+    log = log_converter.apply(compressed, parameters={
+        log_converter.Variants.TO_EVENT_LOG.value.Parameters.CASE_ID_KEY: "case:concept:name"
+    })
+    xes_exporter.apply(log, xesOutput)
+    print(f"[VARIANTS] XES generated: {xesOutput}")
+
+    return variants
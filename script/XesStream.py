@@ -0,0 +1,254 @@
+import xml.sax
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import XMLGenerator
+
+# Streaming XES rewriting: the log is read with SAX and written out element by element,
+# so memory stays bounded whatever the size of the log.
+
+# Trace attribute holding the multiplicity of a compressed trace variant
+VARIANT_COUNT_KEY = "variant_count"
+
+
+# SAX handler copying an XES document while applying the transformations
+class XesTransformer(xml.sax.handler.ContentHandler):
+    def __init__(self, out, classifiers=(), retype_numeric=True, expand_variants=False, event_hook=None,
+                 trace_hook=None):
+        super().__init__()
+        self.writer = XMLGenerator(out, encoding="utf-8", short_empty_elements=True)
+        self.classifiers = list(classifiers)
+        self.retype_numeric = retype_numeric
+        self.expand_variants = expand_variants
+        # Called with the attributes (key -> value) of every event, plus those of its trace as
+        # "case:<key>": returns None to drop the event, or the event attribute values to replace
+        # or add ({} keeps the event unchanged)
+        self.event_hook = event_hook
+        # Called with the index of every trace: returns its multiplicity (0 drops the trace)
+        self.trace_hook = trace_hook
+        self.trace_index = 0
+        self.depth = 0
+        # Output calls of the current trace, replayed at its end
+        self.trace_buffer = None
+        self.variant_count = 1
+        self.skip_depth = None
+        # Position of the variant_count attribute in the trace buffer
+        self.count_at = None
+        # Current event: position in the trace buffer and of each of its attributes
+        self.event_start = None
+        self.event_attrs = {}
+        # Attributes of the current trace (key -> value)
+        self.trace_attrs = {}
+
+    def startDocument(self):
+        self.writer.startDocument()
+
+    def endDocument(self):
+        self.writer.endDocument()
+
+    def retyped(self, name):
+        if self.retype_numeric:
+            for numeric in ("float", "int"):
+                if name.endswith(numeric):
+                    return name[:-len(numeric)] + "string"
+        return name
+
+    # Output call to the writer, or to the buffer of the current trace
+    def emit(self, method, *args):
+        if self.trace_buffer is not None:
+            self.trace_buffer.append((method, args))
+        else:
+            getattr(self.writer, method)(*args)
+
+    def startElement(self, name, attrs):
+        attrs = dict(attrs)
+        self.depth += 1
+
+        if self.skip_depth is not None:
+            return
+
+        # Numeric attributes become strings and 'NaN' or null values become empty strings
+        retyped = self.retyped(name)
+        if retyped != name:
+            val = attrs.get("value")
+            if val is None or val.lower() == "nan":
+                attrs["value"] = ""
+            name = retyped
+
+        if self.depth == 2 and name.endswith("trace") and (self.expand_variants or self.event_hook or self.trace_hook):
+            self.trace_buffer = []
+            self.count_at = None
+            self.trace_attrs = {}
+        elif self.trace_buffer is not None:
+            if self.depth == 3 and attrs.get("key") == VARIANT_COUNT_KEY:
+                if self.expand_variants:
+                    # The multiplicity is consumed here: every copy is a plain trace
+                    self.variant_count = max(1, int(float(attrs.get("value") or 1)))
+                    self.skip_depth = self.depth
+                    return
+                self.count_at = len(self.trace_buffer)
+            if self.depth == 3 and name.endswith("event"):
+                self.event_start = len(self.trace_buffer)
+                self.event_attrs = {}
+            elif self.depth == 3 and "key" in attrs:
+                self.trace_attrs[attrs["key"]] = attrs.get("value", "")
+            elif self.depth == 4 and self.event_start is not None and "key" in attrs:
+                self.event_attrs[attrs["key"]] = len(self.trace_buffer)
+
+        self.emit("startElement", name, attrs)
+
+        # Classifiers are injected as the first children of the root (log) element
+        if self.depth == 1 and self.classifiers:
+            prefix = name[:-len("log")] if name.endswith("log") else ""
+            for classifier_name, keys in self.classifiers:
+                self.writer.ignorableWhitespace("\n\t")
+                self.writer.startElement(f"{prefix}classifier", {"name": classifier_name, "keys": keys})
+                self.writer.endElement(f"{prefix}classifier")
+
+    def endElement(self, name):
+        depth = self.depth
+        self.depth -= 1
+
+        if self.skip_depth is not None:
+            if depth == self.skip_depth:
+                self.skip_depth = None
+            return
+
+        if depth == 3 and self.event_hook and self.event_start is not None:
+            kept = self.apply_event_hook()
+            self.event_start = None
+            if not kept:
+                return
+
+        self.emit("endElement", self.retyped(name))
+
+        if depth == 2 and self.trace_buffer is not None:
+            if self.trace_hook and not self.apply_trace_hook(name):
+                self.trace_buffer, self.variant_count = None, 1
+                return
+            self.replay_trace()
+
+    def characters(self, content):
+        if self.skip_depth is None:
+            self.emit("characters", content)
+
+    def ignorableWhitespace(self, content):
+        if self.skip_depth is None:
+            self.emit("ignorableWhitespace", content)
+
+    # Runs the event hook on the buffered event: drops it or rewrites its attribute values
+    # (new keys are appended to the event as string attributes)
+    def apply_event_hook(self):
+        buffer = self.trace_buffer
+        values = {f"case:{key}": value for key, value in self.trace_attrs.items()}
+        values.update({key: buffer[i][1][1].get("value", "") for key, i in self.event_attrs.items()})
+        replace = self.event_hook(values)
+
+        if replace is None:
+            del buffer[self.event_start:]
+            return False
+
+        prefix = buffer[self.event_start][1][0][:-len("event")]
+        for key, value in replace.items():
+            if key in self.event_attrs:
+                i = self.event_attrs[key]
+                method, (name, attrs) = buffer[i]
+                buffer[i] = (method, (name, dict(attrs, value=value)))
+            else:
+                buffer.extend([
+                    ("startElement", (f"{prefix}string", {"key": key, "value": value})),
+                    ("endElement", (f"{prefix}string",)),
+                ])
+        return True
+
+    # Runs the trace hook on the buffered trace: False drops it, otherwise its multiplicity is set
+    def apply_trace_hook(self, trace_name):
+        count = self.trace_hook(self.trace_index)
+        self.trace_index += 1
+        if not count:
+            return False
+
+        if self.expand_variants:
+            self.variant_count = count
+        elif self.count_at is not None:
+            method, (name, attrs) = self.trace_buffer[self.count_at]
+            self.trace_buffer[self.count_at] = (method, (name, dict(attrs, value=str(count))))
+        else:
+            # New variant_count attribute, first child of the trace
+            prefix = trace_name[:-len("trace")]
+            self.trace_buffer[1:1] = [
+                ("startElement", (f"{prefix}string", {"key": VARIANT_COUNT_KEY, "value": str(count)})),
+                ("endElement", (f"{prefix}string",)),
+            ]
+        return True
+
+    # Writes the buffered trace once per occurrence of its variant;
+    # copies after the first get distinct case names ("<name>#<copy>")
+    def replay_trace(self):
+        buffer, count = self.trace_buffer, self.variant_count
+        self.trace_buffer, self.variant_count = None, 1
+
+        # The case name is the concept:name attribute directly under the trace
+        depth, case_name_at = 1, None
+        for i, (method, args) in enumerate(buffer):
+            if method == "startElement":
+                depth += 1
+                if depth == 3 and args[1].get("key") == "concept:name":
+                    case_name_at = i
+            elif method == "endElement":
+                depth -= 1
+
+        for copy in range(count):
+            for i, (method, args) in enumerate(buffer):
+                if copy > 0 and i == case_name_at:
+                    args = (args[0], dict(args[1], value=f"{args[1].get('value', '')}#{copy}"))
+                getattr(self.writer, method)(*args)
+
+
+# Single pass over input_file: retypes numeric attributes and injects classifiers (name, keys).
+# With expand_variants, traces carrying a variant_count attribute are written that many times;
+# event_hook can drop or relabel single events, trace_hook can drop or reweight traces (see XesTransformer).
+def transform_xes(input_file, output_file, classifiers=(), retype_numeric=True, expand_variants=False,
+                  event_hook=None, trace_hook=None):
+    parser = xml.sax.make_parser()
+    parser.setFeature(xml.sax.handler.feature_namespaces, False)
+    parser.setFeature(xml.sax.handler.feature_external_ges, False)
+
+    with open(output_file, "w", encoding="utf-8") as out:
+        parser.setContentHandler(XesTransformer(out, classifiers, retype_numeric, expand_variants, event_hook, trace_hook))
+        parser.parse(input_file)
+
+    return output_file
+
+
+# Streams the traces of an XES log, one at a time: yields (trace attributes, event labels).
+# An event label is the value of `keys` joined with '+' (the activity name by default).
+def iter_xes_traces(input_file, keys=("concept:name",)):
+    stack = []
+    root = None
+    trace_attrs, labels, event_attrs = {}, [], {}
+
+    for ev, elem in ET.iterparse(input_file, events=("start", "end")):
+        tag = elem.tag.rsplit("}", 1)[-1]
+
+        if ev == "start":
+            if root is None:
+                root = elem
+            stack.append(tag)
+            if tag == "trace":
+                trace_attrs, labels = {}, []
+            elif tag == "event":
+                event_attrs = {}
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+
+        if tag == "event":
+            labels.append("+".join(event_attrs.get(k, "") for k in keys))
+        elif tag == "trace":
+            yield trace_attrs, labels
+            # Drop the parsed trace so memory does not grow with the log
+            root.clear()
+        elif parent == "event":
+            event_attrs[elem.get("key")] = elem.get("value", "")
+        elif parent == "trace":
+            trace_attrs[elem.get("key")] = elem.get("value", "")
@@ -0,0 +1,93 @@
+import java.io.BufferedReader;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.security.Permission;
+
+// Long-lived MINERful process: the classpath is loaded (and JIT-warmed) once, then one
+// mining job is run for every line read from stdin.
+// A job line holds the MinerFulMinerStarter arguments separated by tabs.
+// After each job the worker prints "@@MINERFUL_DONE <status>" on its own line, on the
+// protocol fd given by -Dminerful.worker.fd: stdout and stderr are left to MINERful.
+public class MinerfulWorker {
+    // System.exit called by a job, turned into an exception so that the worker survives it
+    static class ExitTrap extends SecurityException {
+        final int status;
+
+        ExitTrap(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+
+    // The guard needs a SecurityManager, which Java 18-23 only accept with
+    // -Djava.security.manager=allow and Java 24+ never: without it the worker dies with the
+    // job and the Python side reruns it in its own JVM
+    static void installExitGuard() {
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkExit(int status) {
+                    throw new ExitTrap(status);
+                }
+
+                @Override
+                public void checkPermission(Permission perm) {
+                }
+
+                @Override
+                public void checkPermission(Permission perm, Object context) {
+                }
+            });
+        } catch (UnsupportedOperationException | SecurityException e) {
+            System.err.println("[MINERful worker] No exit guard: " + e);
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        String starter = args.length > 0 ? args[0] : "minerful.MinerFulMinerStarter";
+        Method starterMain = Class.forName(starter).getMethod("main", String[].class);
+
+        installExitGuard();
+
+        String fd = System.getProperty("minerful.worker.fd");
+        PrintStream out = fd == null
+                ? System.out
+                : new PrintStream(new FileOutputStream("/dev/fd/" + fd), true, "UTF-8");
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, "UTF-8"));
+
+        out.println("@@MINERFUL_READY");
+        out.flush();
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.isEmpty()) {
+                continue;
+            }
+            String[] jobArgs = line.split("\t");
+            String status = "OK";
+
+            try {
+                starterMain.invoke(null, (Object) jobArgs);
+            } catch (InvocationTargetException e) {
+                if (e.getCause() instanceof ExitTrap) {
+                    int code = ((ExitTrap) e.getCause()).status;
+                    status = code == 0 ? "OK" : "ERROR exit " + code;
+                } else {
+                    e.getCause().printStackTrace();
+                    status = "ERROR " + e.getCause();
+                }
+            } catch (Throwable t) {
+                t.printStackTrace();
+                status = "ERROR " + t;
+            }
+
+            System.out.flush();
+            System.err.flush();
+            out.println("@@MINERFUL_DONE " + status.replace('\n', ' '));
+            out.flush();
+        }
+    }
+}
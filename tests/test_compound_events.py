@@ -0,0 +1,101 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from main import compound_file
+from script.GeneralCompoundEvents import link_chains, merge_generic_events
+
+
+# Reference matcher of the original implementation: from the chain end, scan every later
+# unused event for the first one whose source equals the chain's destination
+def quadratic_chains(sources, destinations):
+    used = set()
+    chains = []
+    for i in range(len(sources)):
+        if i in used:
+            continue
+        chain = [i]
+        progress = True
+        while progress:
+            progress = False
+            for j in range(i + 1, len(sources)):
+                if j in used or j in chain:
+                    continue
+                if destinations[chain[-1]] == sources[j]:
+                    chain.append(j)
+                    progress = True
+                    break
+        chains.append(chain)
+        used.update(chain)
+    return chains
+
+
+def random_log(seed, cases=4, events=30):
+    rng = random.Random(seed)
+    rows = []
+    for c in range(cases):
+        for k in range(rng.randint(1, events)):
+            rows.append({
+                "case_id": f"plan_{c}",
+                "event_id": str(k + 1),
+                "timestamp": f"2025-01-01 00:{k:02d}:00",
+                "activity": rng.choice(["navigate", "drive", "drop"]),
+                "waypoint_1": rng.choice("abcd"),
+                "waypoint_2": rng.choice("abcd"),
+            })
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_link_chains_matches_quadratic_matcher(seed):
+    rng = random.Random(seed)
+    n = rng.randint(0, 40)
+    # One or two column pairs with few distinct values, so that chains branch and repeat
+    width = 1 + seed % 2
+    sources = [tuple(rng.choice("abc") for _ in range(width)) for _ in range(n)]
+    destinations = [tuple(rng.choice("abc") for _ in range(width)) for _ in range(n)]
+
+    assert link_chains(sources, destinations) == quadratic_chains(sources, destinations)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_case_workers_match_serial(seed):
+    df = random_log(seed).rename(columns={
+        "case_id": "case:concept:name", "activity": "concept:name", "timestamp": "time:timestamp"})
+
+    serial = merge_generic_events(df.copy(), workers=1)
+    parallel = merge_generic_events(df.copy(), workers=3)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_file_workers_match_serial(tmp_path):
+    conf = {"csv_separator": ";", "case_column": "case_id",
+            "timestamp_column": "timestamp", "activity_column": "activity"}
+    jobs = []
+    for seed in range(3):
+        g_csv = tmp_path / f"grounded_{seed}.csv"
+        random_log(seed).to_csv(g_csv, sep=";", index=False)
+        jobs.append(str(g_csv))
+
+    def outputs(folder):
+        folder.mkdir()
+        return [(g_csv, str(folder / f"compound_{k}.csv"), str(folder / f"compound_{k}.xes"))
+                for k, g_csv in enumerate(jobs)]
+
+    serial = outputs(tmp_path / "serial")
+    for g_csv, out_csv, out_xes in serial:
+        compound_file(g_csv, out_csv, out_xes, conf)
+
+    # Same dispatch as the compound stage with compound.file_workers > 1
+    parallel = outputs(tmp_path / "parallel")
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(compound_file, g_csv, out_csv, out_xes, conf)
+                   for g_csv, out_csv, out_xes in parallel]
+        [f.result() for f in futures]
+
+    for (_, serial_csv, _), (_, parallel_csv, _) in zip(serial, parallel):
+        with open(serial_csv) as a, open(parallel_csv) as b:
+            assert a.read() == b.read()
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from script.DeclareMiner import (
+    BINARY_TEMPLATES, count_traces, constraint_statistics, mineDeclare,
+)
+from script.TC import map_constraint, read_constraints_from_csv
+
+
+# Reference semantics of every template on one trace: (activated, satisfied)
+def holds(template, trace, a, b):
+    ca, cb = trace.count(a), trace.count(b)
+    pa = [i for i, x in enumerate(trace) if x == a]
+    pb = [i for i, x in enumerate(trace) if x == b]
+    response = all(any(j > i for j in pb) for i in pa)
+    precedence = all(any(i < j for i in pa) for j in pb)
+
+    if template == "AtLeast1":
+        return True, ca > 0
+    if template == "AtMostOnce":
+        return True, ca <= 1
+    if template == "ExactlyOne":
+        return True, ca == 1
+    if template == "Choice":
+        return True, ca > 0 or cb > 0
+    if template == "ExclusiveChoice":
+        return True, (ca > 0) != (cb > 0)
+    if template == "Response":
+        return ca > 0, response
+    if template == "Precedence":
+        return cb > 0, precedence
+    if template == "Succession":
+        return ca > 0 or cb > 0, response and precedence
+    if template == "ChainResponse":
+        return ca > 0, all(i + 1 < len(trace) and trace[i + 1] == b for i in pa)
+    raise ValueError(template)
+
+
+def random_log(seed):
+    rng = random.Random(seed)
+    alphabet = list("abcde")[:rng.randint(1, 5)]
+    traces = [[rng.choice(alphabet) for _ in range(rng.randint(0, 8))] for _ in range(rng.randint(1, 30))]
+    weights = [rng.randint(1, 3) for _ in traces]
+    return traces, weights, rng.choice([1, 7, 1000])
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_statistics_match_brute_force(seed):
+    traces, weights, block_cells = random_log(seed)
+    counters = count_traces(traces, weights, block_cells=block_cells)
+    rows = constraint_statistics(counters)
+    total = sum(weights)
+
+    for r in rows:
+        t, a, b = r["Template"], r["Activation"], r["Target"]
+        activated = sum(w for trace, w in zip(traces, weights) if holds(t, trace, a, b)[0])
+        satisfied = sum(w for trace, w in zip(traces, weights) if all(holds(t, trace, a, b)))
+        assert r["Support"] == pytest.approx(satisfied / total), (t, a, b)
+        assert r["Coverage"] == pytest.approx(activated / total), (t, a, b)
+        assert r["Confidence level"] == pytest.approx(satisfied / activated), (t, a, b)
+
+    # Every activated ordered pair is reported for the binary templates
+    reported = {(r["Template"], r["Activation"], r["Target"]) for r in rows}
+    for t in BINARY_TEMPLATES:
+        for a in counters.activities:
+            for b in counters.activities:
+                if a != b and any(holds(t, trace, a, b)[0] for trace in traces):
+                    assert (t, a, b) in reported
+
+
+XES = """<?xml version="1.0" encoding="UTF-8"?>
+<log xes.version="1.0">
+{traces}
+</log>
+"""
+
+
+def write_xes(path, traces):
+    body = "\n".join(
+        f'<trace><string key="concept:name" value="plan_{k}"/>'
+        + "".join(f'<event><string key="concept:name" value="{label}"/></event>' for label in trace)
+        + "</trace>"
+        for k, trace in enumerate(traces)
+    )
+    path.write_text(XES.format(traces=body))
+
+
+def test_csv_is_read_by_tc(tmp_path):
+    traces = [
+        ["navigate_rover0", "sample_rock", "drop", "navigate_rover0"],
+        ["navigate_rover0", "sample_rock", "drop"],
+        ["calibrate", "navigate_rover0", "sample_rock", "drop"],
+    ]
+    input_xes = tmp_path / "log.xes"
+    write_xes(input_xes, traces)
+    output_csv = tmp_path / "constraints.csv"
+
+    conf = {"support": 0.5, "confidence": 0.5, "coverage": 0.0, "pruning_strategy": "none"}
+    mineDeclare(str(input_xes), str(output_csv), str(tmp_path / "constraints.json"), conf)
+
+    counters = count_traces(traces)
+    expected = constraint_statistics(counters, 0.5, 0.5, 0.0)
+    tc_list = read_constraints_from_csv(str(output_csv))
+
+    assert expected
+    mapped = [tc for r in expected for tc in map_constraint(r["Template"], r["Activation"], r["Target"])]
+    assert sorted(entry["tc"] for entry in tc_list) == sorted(mapped)
+    assert {(e["template"], e["activation"], e["target"]) for e in tc_list} == \
+        {(r["Template"], r["Activation"], r["Target"]) for r in expected}